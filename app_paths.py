@@ -0,0 +1,19 @@
+"""Locations of the files the app keeps between runs."""
+import os
+import sys
+
+APP_NAME = "CacheManagerApp"
+
+
+def app_data_dir():
+    """Return (and create) the per-user directory for app state."""
+    if sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    elif os.name == "nt":
+        base = os.getenv("LOCALAPPDATA") or os.path.expanduser("~\\AppData\\Local")
+    else:
+        # Not XDG_CACHE_HOME: that is one of the trees this app cleans
+        base = os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,432 @@
+"""Archive cache files instead of deleting them, and restore them on demand.
+
+Deleting a media cache forces the application to rebuild it, which for
+Adobe's conformed audio and peak files can take a long time. Archiving
+takes the files of a DeletionPlan, compresses them into an archive folder
+and only then deletes them, so a cold cache frees most of its space while
+any of its files can still be brought back.
+
+An archive folder holds one zip per compression thread and a manifest
+listing every file with its zip and member name. Files are streamed into
+the zips in small chunks, so memory stays bounded whatever their size, and
+the threads run in parallel because zlib, bz2 and lzma release the GIL
+while compressing. Restoring reads the manifest and extracts only the
+requested members, through each zip's central directory.
+"""
+import fnmatch
+import json
+import os
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from app_paths import app_data_dir
+from deleter import DeleteResult, file_identity
+from planner import DeletionPlan, PlanTarget, execute_plan
+from size_engine import default_workers, human_readable_size
+
+ARCHIVE_VERSION = 1
+MANIFEST = "manifest.json"
+
+COMPRESSION = {
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+    "store": zipfile.ZIP_STORED,
+}
+
+# link is the symlink's target for archived symlinks, which have no member
+ArchiveEntry = namedtuple("ArchiveEntry", "target path size mtime_ns mode part member link")
+
+
+def archives_dir():
+    """Return the default folder for new archives."""
+    return os.path.join(app_data_dir(), "archives")
+
+
+def _inside(path, root):
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class Archive:
+    """The manifest of one archive folder."""
+
+    def __init__(self, path, targets, entries, created=None, compression="deflate", parts=()):
+        self.path = path
+        self.targets = list(targets)
+        self.entries = list(entries)
+        self.created = created or time.time()
+        self.compression = compression
+        self.parts = list(parts)
+
+    @property
+    def total_bytes(self):
+        return sum(entry.size for entry in self.entries)
+
+    @property
+    def archive_bytes(self):
+        """Bytes the archive itself uses on disk."""
+        size = 0
+        for part in self.parts:
+            try:
+                size += os.stat(os.path.join(self.path, part)).st_size
+            except OSError:
+                pass
+        return size
+
+    def select(self, patterns=None):
+        """Return the entries matching any of ``patterns``, or all of them.
+
+        A pattern matches a file's original path exactly, any folder above
+        it, or as a glob.
+        """
+        if not patterns:
+            return list(self.entries)
+        patterns = [pattern.rstrip(os.sep) or os.sep for pattern in patterns]
+        return [
+            entry for entry in self.entries
+            if any(_inside(entry.path, pattern) or fnmatch.fnmatch(entry.path, pattern) for pattern in patterns)
+        ]
+
+    def summary(self):
+        lines = [
+            f"Archive {self.path}: {len(self.entries)} files, {human_readable_size(self.total_bytes)} "
+            f"stored in {human_readable_size(self.archive_bytes)}"
+        ]
+        for target in self.targets:
+            entries = [entry for entry in self.entries if entry.target == target.name]
+            lines.append(f"{target.label}: {len(entries)} files, {human_readable_size(sum(e.size for e in entries))}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "version": ARCHIVE_VERSION,
+            "created": self.created,
+            "compression": self.compression,
+            "parts": self.parts,
+            "total_bytes": self.total_bytes,
+            "targets": [target._asdict() for target in self.targets],
+            "entries": [list(entry) for entry in self.entries],
+        }
+
+    def save(self):
+        """Write the manifest, replacing any previous one in one step."""
+        path = os.path.join(self.path, MANIFEST)
+        temp = path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version {data.get('version')!r}")
+        return cls(
+            path,
+            [PlanTarget(**target) for target in data["targets"]],
+            [ArchiveEntry(*entry) for entry in data["entries"]],
+            data["created"],
+            data["compression"],
+            data["parts"],
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __str__(self):
+        return self.summary()
+
+
+class RestoreResult:
+    """Counts and errors of one restore run."""
+
+    def __init__(self, title="Restored"):
+        self.title = title
+        self.files = 0
+        self.bytes_restored = 0
+        # Files left alone because something already exists at their path
+        self.skipped = []
+        self.errors = []
+        self.cancelled = False
+
+    def add_error(self, path, error):
+        self.errors.append((path, str(error)))
+
+    def merge(self, other):
+        self.files += other.files
+        self.bytes_restored += other.bytes_restored
+        self.skipped.extend(other.skipped)
+        self.errors.extend(other.errors)
+        self.cancelled = self.cancelled or other.cancelled
+        return self
+
+    @property
+    def ok(self):
+        return not self.errors and not self.cancelled
+
+    def summary(self, max_errors=5):
+        title = "Cancelled" if self.cancelled else self.title
+        lines = [f"{title}. Files restored: {self.files}, {human_readable_size(self.bytes_restored)}"]
+        if self.skipped:
+            lines.append(f"{len(self.skipped)} files already existed and were kept")
+        if self.errors:
+            lines.append(f"{len(self.errors)} files could not be restored:")
+            for path, message in self.errors[:max_errors]:
+                lines.append(f"  {path}: {message}")
+            if len(self.errors) > max_errors:
+                lines.append(f"  ... and {len(self.errors) - max_errors} more")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "files": self.files,
+            "bytes_restored": self.bytes_restored,
+            "cancelled": self.cancelled,
+            "skipped": list(self.skipped),
+            "errors": [{"path": path, "message": message} for path, message in self.errors],
+        }
+
+    def __str__(self):
+        return self.summary()
+
+
+def _member_name(entry, roots):
+    """Name a file inside the zip by its target and path below the target root."""
+    root = roots.get(entry.target)
+    if root and _inside(entry.path, root):
+        rel = os.path.relpath(entry.path, root)
+    else:
+        rel = entry.path.lstrip(os.sep)
+    return "/".join([entry.target] + rel.split(os.sep))
+
+
+class _PartWriter:
+    """One compression thread, writing the files it takes into its own zip."""
+
+    def __init__(self, path, compression, level, roots):
+        self.path = path
+        self.compression = compression
+        self.level = level
+        self.roots = roots
+        self.archived = []
+        # target name -> DeleteResult of the files that changed or could not be read
+        self.results = {}
+        self.cancelled = False
+
+    def _result(self, entry):
+        result = self.results.get(entry.target)
+        if result is None:
+            result = self.results[entry.target] = DeleteResult()
+        return result
+
+    def run(self, take, progress):
+        part = os.path.basename(self.path)
+        with open(self.path, "wb") as f:
+            with zipfile.ZipFile(
+                f, "w", COMPRESSION[self.compression], compresslevel=self.level, strict_timestamps=False
+            ) as zf:
+                for entry in iter(take, None):
+                    if progress is not None and progress.cancelled:
+                        self.cancelled = True
+                        break
+                    self._add(zf, part, entry, progress)
+            # Nothing is deleted before its archived copy is on disk
+            f.flush()
+            os.fsync(f.fileno())
+        return self
+
+    def _add(self, zf, part, entry, progress):
+        planned = (entry.dev, entry.ino, entry.mtime_ns)
+        try:
+            st = os.lstat(entry.path)
+            if file_identity(st) != planned:
+                self._result(entry).changed.append(entry.path)
+                return
+            if os.path.islink(entry.path):
+                archived = ArchiveEntry(
+                    entry.target, entry.path, 0, st.st_mtime_ns, st.st_mode, part, None, os.readlink(entry.path)
+                )
+            else:
+                member = _member_name(entry, self.roots)
+                zf.write(entry.path, member)
+                # A file written to while it was read may be torn in the zip
+                if file_identity(os.lstat(entry.path)) != planned:
+                    self._result(entry).changed.append(entry.path)
+                    return
+                archived = ArchiveEntry(
+                    entry.target, entry.path, st.st_size, st.st_mtime_ns, st.st_mode, part, member, None
+                )
+        except OSError as e:
+            self._result(entry).add_error(entry.path, e, size=entry.size)
+            return
+        self.archived.append((archived, entry))
+        if progress is not None:
+            progress.add(1, archived.size, entry.path)
+
+
+def archive_plan(plan, dest=None, compression="deflate", level=None, max_workers=None, progress=None):
+    """Archive the planned files, then delete them.
+
+    Returns (Archive, target name -> DeleteResult). Files that changed
+    since planning, or while being read, stay in place and are listed as
+    changed; files that could not be read are reported as errors. A
+    cancelled run stops archiving, but still deletes what was archived.
+    """
+    if compression not in COMPRESSION:
+        raise ValueError(f"Unknown compression {compression!r}")
+    dest = dest or os.path.join(archives_dir(), time.strftime("%Y%m%d-%H%M%S"))
+    roots = {target.name: target.path for target in plan.targets if target.path}
+    if any(_inside(os.path.abspath(dest), root) for root in roots.values()):
+        raise ValueError(f"Archive folder {dest} is inside a folder being archived")
+    os.makedirs(dest, exist_ok=True)
+
+    # Read from the plan's trees a folder at a time as the threads ask for files
+    pending = iter(plan.entries)
+    lock = threading.Lock()
+
+    def take():
+        with lock:
+            return next(pending, None)
+
+    workers = max(1, min(max_workers or default_workers(), len(plan.entries) or 1))
+    writers = [
+        _PartWriter(os.path.join(dest, f"part-{number:02d}.zip"), compression, level, roots)
+        for number in range(workers)
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(writer.run, take, progress) for writer in writers]:
+            future.result()
+
+    archived = sorted(
+        (pair for writer in writers for pair in writer.archived), key=lambda pair: pair[0].path
+    )
+    archive = Archive(
+        dest, plan.targets, [entry for entry, planned in archived], None, compression,
+        [os.path.basename(writer.path) for writer in writers],
+    )
+    archive.save()
+
+    cancelled = any(writer.cancelled for writer in writers)
+    results = execute_plan(
+        DeletionPlan(plan.targets, [planned for entry, planned in archived], plan.dirs, plan.created),
+        max_workers,
+        None if cancelled else progress,
+    )
+    for target in plan.targets:
+        results[target.name].title = f"{target.label} archived"
+    for writer in writers:
+        for name, result in writer.results.items():
+            results[name].errors.extend(result.errors)
+            results[name].changed.extend(result.changed)
+    if cancelled:
+        for result in results.values():
+            result.cancelled = True
+    return archive, results
+
+
+def _restore_one(zf, entry, overwrite):
+    """Write one archived file back to its path through a temporary file."""
+    if os.path.lexists(entry.path) and not overwrite:
+        return False
+    os.makedirs(os.path.dirname(entry.path), exist_ok=True)
+    temp = f"{entry.path}.restore-{os.getpid()}-{threading.get_ident()}"
+    try:
+        if entry.link is not None:
+            os.symlink(entry.link, temp)
+        else:
+            with zf.open(entry.member) as src, open(temp, "wb") as dst:
+                while True:
+                    chunk = src.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.chmod(temp, entry.mode & 0o7777)
+            os.utime(temp, ns=(entry.mtime_ns, entry.mtime_ns))
+        os.replace(temp, entry.path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+def _restore_part(archive, part, entries, overwrite, progress):
+    result = RestoreResult()
+    roots = {target.name: target.path for target in archive.targets}
+    try:
+        zf = zipfile.ZipFile(os.path.join(archive.path, part))
+    except (OSError, zipfile.BadZipFile) as e:
+        for entry in entries:
+            result.add_error(entry.path, e)
+        return result
+    with zf:
+        for entry in entries:
+            if progress is not None and progress.cancelled:
+                result.cancelled = True
+                break
+            # Never write outside the targets, whatever the manifest says
+            if not roots.get(entry.target) or not _inside(os.path.normpath(entry.path), roots[entry.target]):
+                result.add_error(entry.path, "outside its target folder")
+                continue
+            try:
+                restored = _restore_one(zf, entry, overwrite)
+            except (OSError, KeyError, zipfile.BadZipFile) as e:
+                result.add_error(entry.path, e)
+                continue
+            if not restored:
+                result.skipped.append(entry.path)
+                continue
+            result.files += 1
+            result.bytes_restored += entry.size
+            if progress is not None:
+                progress.add(1, entry.size, entry.path)
+    return result
+
+
+def restore_archive(path, patterns=None, overwrite=False, max_workers=None, progress=None):
+    """Restore the files of an archive folder matching ``patterns`` (all by default).
+
+    Existing files are kept unless ``overwrite`` is set. The zips are read
+    in parallel, one thread per zip.
+    """
+    archive = Archive.load(path)
+    by_part = {}
+    for entry in archive.select(patterns):
+        by_part.setdefault(entry.part, []).append(entry)
+    result = RestoreResult(f"Restored from {os.path.basename(path.rstrip(os.sep))}")
+    if not by_part:
+        return result
+    with ThreadPoolExecutor(max_workers=min(max_workers or default_workers(), len(by_part))) as pool:
+        futures = [
+            pool.submit(_restore_part, archive, part, entries, overwrite, progress)
+            for part, entries in by_part.items()
+        ]
+        for future in futures:
+            result.merge(future.result())
+    return result
+
+
+def list_archives(folder=None):
+    """Return the readable archives in ``folder``, newest first."""
+    folder = folder or archives_dir()
+    archives = []
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return archives
+    for name in names:
+        try:
+            archives.append(Archive.load(os.path.join(folder, name)))
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    archives.sort(key=lambda archive: archive.created, reverse=True)
+    return archives
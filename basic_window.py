@@ -0,0 +1,134 @@
+"""Window shared by the one-click platform scripts.
+
+"Cache Clear(Mac)Released.py" and "Cache Clear(WIN) Pre-Release.py" each
+subclass CacheManagerWindow, set their title and list their buttons in
+``buttons``; the greeting, the light/dark theme, the app folder dialog and
+the result boxes live here.
+"""
+import os
+
+from PyQt5.QtCore import Qt, QSettings
+from PyQt5.QtWidgets import QLabel, QMainWindow, QMessageBox, QPushButton, QVBoxLayout, QWidget
+
+from cache_ops import app_support_dir, delete_app_folder, greet_user
+from dialogs import AppFolderDialog
+
+THEMES = {
+    "light": """
+        QMainWindow {
+            background-color: white;
+        }
+        QPushButton {
+            background-color: #0078D7;
+            color: white;
+            border-radius: 5px;
+            padding: 5px;
+        }
+        QPushButton:hover {
+            background-color: #005EA6;
+        }
+        QLabel {
+            color: black;
+        }
+    """,
+    "dark": """
+        QMainWindow {
+            background-color: #2B2B2B;
+        }
+        QPushButton {
+            background-color: #444;
+            color: white;
+            border-radius: 5px;
+            padding: 5px;
+        }
+        QPushButton:hover {
+            background-color: #666;
+        }
+        QLabel {
+            color: white;
+        }
+    """,
+}
+
+
+class CacheManagerWindow(QMainWindow):
+    """A column of buttons, each running one cleanup and showing its result."""
+
+    title = "Cache Manager"
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle(self.title)
+        self.setGeometry(200, 200, 400, 300)
+
+        # Persistent settings
+        self.settings = QSettings("CacheManagerApp", "Settings")
+
+        # Load theme
+        self.current_theme = self.settings.value("theme", "light")
+        self.apply_theme(self.current_theme)
+
+        layout = QVBoxLayout()
+
+        user_name = greet_user()
+        self.greeting_label = QLabel(f"Hello, {user_name}! Manage your cache below:")
+        self.greeting_label.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.greeting_label)
+
+        for label, slot in self.buttons() + [("Toggle Theme", self.toggle_theme)]:
+            button = QPushButton(label)
+            button.clicked.connect(slot)
+            layout.addWidget(button)
+
+        container = QWidget()
+        container.setLayout(layout)
+        self.setCentralWidget(container)
+
+    def buttons(self):
+        """Return the (label, slot) of every button above the theme toggle."""
+        return [("Delete App Folder", self.delete_folder_action)]
+
+    def action(self, title, clear):
+        """Return a slot running ``clear()`` and showing its result under ``title``."""
+        def run():
+            QMessageBox.information(self, title, str(clear()))
+        return run
+
+    def apply_theme(self, theme):
+        """Apply the selected theme."""
+        if theme in THEMES:
+            self.setStyleSheet(THEMES[theme])
+
+    def toggle_theme(self):
+        """Toggle between light and dark themes."""
+        self.current_theme = "dark" if self.current_theme == "light" else "light"
+        self.apply_theme(self.current_theme)
+        self.settings.setValue("theme", self.current_theme)
+
+    def delete_folder_action(self):
+        base_dir = app_support_dir()
+        if not base_dir or not os.path.exists(base_dir):
+            QMessageBox.warning(self, "Error", "Base directory does not exist.")
+            return
+
+        # Folders and their sizes are filled in after the dialog opens
+        dialog = AppFolderDialog(base_dir, self)
+
+        def on_empty():
+            dialog.close()
+            QMessageBox.information(self, "Delete Folder", "No folders found to delete.")
+
+        def on_folder_selected(folder_path):
+            reply = QMessageBox.question(
+                self, "Confirm Deletion",
+                f"Are you sure you want to delete {folder_path}?",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                result = delete_app_folder(folder_path)
+                QMessageBox.information(self, "Delete Folder", str(result))
+            dialog.close()
+
+        dialog.empty.connect(on_empty)
+        dialog.folder_selected.connect(on_folder_selected)
+        dialog.show()
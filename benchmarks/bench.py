@@ -0,0 +1,344 @@
+"""Time scan, plan and delete for every engine on a synthetic cache tree.
+
+Each case runs in a fresh child process, so peak RSS is its own, on a tree
+built from the same spec and seed: cases that delete get a new copy of the
+tree, the others share one. Every case reports wall and CPU time, files/s,
+bytes/s, peak RSS and the file system calls it made, counted through audit
+hooks (open, scandir, unlink, rmdir, ...; CPython does not audit stat, so
+those are not included). Results go to JSON; --compare prints the change
+against an earlier result file and exits 1 if a case got slower than
+--tolerance.
+
+Usage: python benchmarks/bench.py [--files 100000] [--depth 3] [--fan-out 10] [--sizes cache]
+                                  [--dir /dev/shm] [--cases scan,plan,delete] [--workers N]
+                                  [--output results.json] [--compare old.json]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from treegen import PRESETS, TreeSpec, build_tree  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCAN = "scan"
+PLAN = "plan"
+DELETE = "delete"
+
+
+def _target(root):
+    from targets import CacheTarget
+
+    return CacheTarget("bench", root)
+
+
+# Setups run before the clock starts and return the state handed to the case
+
+def _warm_index(root, workers, index_path, tree_bytes):
+    from scan_index import ScanIndex
+    from target_engine import scan_targets
+
+    index = ScanIndex(index_path)
+    scan_targets([_target(root)], index=index, max_workers=workers)
+    return index
+
+
+def _policy(root, workers, index_path, tree_bytes):
+    from policies import EvictionPolicy
+
+    return EvictionPolicy(max_age_days=30, keep_newest_per_app=tree_bytes // 20, budget=tree_bytes // 4)
+
+
+def _plan(root, workers, index_path, tree_bytes):
+    from planner import make_plan
+
+    return make_plan([_target(root)], max_workers=workers)
+
+
+def folder_size(root, workers, state):
+    from size_engine import folder_size
+
+    return folder_size(root, max_workers=workers)
+
+
+def scan_targets(root, workers, index):
+    from target_engine import scan_targets
+
+    return scan_targets([_target(root)], index=index, max_workers=workers)
+
+
+def collect_targets(root, workers, state):
+    from target_engine import collect_targets
+
+    return sum(1 for _ in collect_targets([_target(root)], max_workers=workers))
+
+
+def collect_list(root, workers, state):
+    from target_engine import collect_targets
+
+    return list(collect_targets([_target(root)], max_workers=workers))
+
+
+def collect_tree(root, workers, state):
+    from scan_tree import ScanTree
+    from target_engine import collect_targets
+
+    tree = ScanTree()
+    for found in collect_targets([_target(root)], max_workers=workers):
+        tree.add(found.path, found.size, found.atime, found.mtime_ns, found.dev, found.ino, found.target)
+    return tree
+
+
+def make_plan(root, workers, policy):
+    from planner import make_plan
+
+    return make_plan([_target(root)], {"bench": policy} if policy else None, max_workers=workers)
+
+
+def delete_serial(root, workers, state):
+    from bench_delete import serial_clear
+
+    return serial_clear(root)
+
+
+def delete_contents(root, workers, state):
+    from deleter import delete_contents
+
+    return delete_contents(root, max_workers=workers)
+
+
+def clear_targets(root, workers, state):
+    from target_engine import clear_targets
+
+    return clear_targets([_target(root)], max_workers=workers)
+
+
+def execute_plan(root, workers, plan):
+    from planner import execute_plan
+
+    return execute_plan(plan, max_workers=workers)
+
+
+# name -> (phase, setup or None, case)
+CASES = {
+    "folder_size": (SCAN, None, folder_size),
+    "scan_targets": (SCAN, None, scan_targets),
+    "scan_targets_indexed": (SCAN, _warm_index, scan_targets),
+    "collect_targets": (SCAN, None, collect_targets),
+    # Found tuples kept in a list against the same files kept in a ScanTree
+    "collect_list": (SCAN, None, collect_list),
+    "collect_tree": (SCAN, None, collect_tree),
+    "plan_clear": (PLAN, None, make_plan),
+    "plan_policy": (PLAN, _policy, make_plan),
+    "delete_serial": (DELETE, None, delete_serial),
+    "delete_contents": (DELETE, None, delete_contents),
+    "clear_targets": (DELETE, None, clear_targets),
+    "execute_plan": (DELETE, _plan, execute_plan),
+}
+
+
+class CallCounter:
+    """Counts file system calls through a sys audit hook while enabled."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self.enabled = False
+        self._lock = threading.Lock()
+        sys.addaudithook(self._hook)
+
+    def _hook(self, event, args):
+        if self.enabled and (event == "open" or event.startswith("os.")):
+            with self._lock:
+                self.counts[event] += 1
+
+
+def _peak_rss():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_child(args):
+    """Run one case in this process and print its measurements as JSON."""
+    counter = CallCounter()
+    phase, setup, run = CASES[args.child]
+    state = setup(args.root, args.workers, args.index, args.tree_bytes) if setup else None
+    cpu = _cpu_seconds()
+    counter.enabled = True
+    started = time.perf_counter()
+    run(args.root, args.workers, state)
+    seconds = time.perf_counter() - started
+    counter.enabled = False
+    json.dump({
+        "seconds": seconds,
+        "cpu_seconds": None if cpu is None else _cpu_seconds() - cpu,
+        "peak_rss": _peak_rss(),
+        "fs_calls": sum(counter.counts.values()),
+        "fs_calls_by_kind": dict(counter.counts.most_common()),
+    }, sys.stdout)
+
+
+def _measure(case, root, workers, tree_bytes, scratch):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", case, "--root", root,
+        "--index", os.path.join(scratch, f"{case}.sqlite3"), "--tree-bytes", str(tree_bytes),
+    ]
+    if workers:
+        command += ["--workers", str(workers)]
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, cwd=HERE).stdout
+    return json.loads(output)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, check=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(spec, cases, base, workers, log):
+    """Build trees and measure ``cases``; returns the result document."""
+    scratch = tempfile.mkdtemp(prefix="cachemgr_bench_", dir=base)
+    results = []
+    shared = None
+    try:
+        for case in cases:
+            phase = CASES[case][0]
+            root = os.path.join(scratch, "tree")
+            if phase == DELETE or shared is None:
+                shutil.rmtree(root, ignore_errors=True)
+                shared = build_tree(root, spec)
+                log(f"built {shared.files:,} files in {shared.seconds:.1f} s")
+            stats = shared
+            measured = _measure(case, root, workers, stats.bytes, scratch)
+            if phase == DELETE:
+                # The tree is gone; the next case needs a fresh one
+                shared = None
+            seconds = measured["seconds"]
+            result = dict(
+                measured,
+                case=case,
+                phase=phase,
+                files=stats.files,
+                bytes=stats.bytes,
+                files_per_second=stats.files / seconds if seconds else None,
+                bytes_per_second=stats.bytes / seconds if seconds else None,
+            )
+            results.append(result)
+            log(
+                f"{case:<22} {seconds:8.3f} s  {result['files_per_second']:>12,.0f} files/s  "
+                f"{result['fs_calls']:>10,} calls  {(result['peak_rss'] or 0) / 1024 ** 2:8.1f} MB RSS"
+            )
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {
+        "commit": _git_commit(),
+        "created": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": workers,
+        "dir": base or tempfile.gettempdir(),
+        "spec": spec.to_dict(),
+        "results": results,
+    }
+
+
+def compare(old, new, tolerance, log):
+    """Print the change per case; returns True if none got slower than ``tolerance``."""
+    before = {result["case"]: result for result in old["results"]}
+    ok = True
+    log(f"compared with {old.get('commit') or 'an earlier run'}:")
+    if old.get("spec") != new["spec"]:
+        log("warning: the trees were built from different specs, so the times are not comparable")
+    for result in new["results"]:
+        previous = before.get(result["case"])
+        if previous is None:
+            continue
+        change = result["seconds"] / previous["seconds"] - 1 if previous["seconds"] else 0.0
+        slower = change > tolerance
+        ok = ok and not slower
+        log(
+            f"{result['case']:<22} {previous['seconds']:8.3f} s -> {result['seconds']:8.3f} s  "
+            f"{change:+7.1%}{'  SLOWER' if slower else ''}"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=10)
+    parser.add_argument("--sizes", default="cache", help=f"size distribution or preset ({', '.join(PRESETS)})")
+    parser.add_argument("--age-days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dir", default=None, help="where to build the trees (tmpfs or real disk)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--cases", default="scan,plan,delete", help="phases or case names, comma separated (default: all)"
+    )
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="compare with results written by an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="slow-down that fails --compare (0.1 = 10%%)")
+    # Internal: run one case in a child process
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--root", help=argparse.SUPPRESS)
+    parser.add_argument("--index", help=argparse.SUPPRESS)
+    parser.add_argument("--tree-bytes", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return 0
+
+    wanted = args.cases.split(",")
+    cases = [name for name, (phase, setup, run) in CASES.items() if name in wanted or phase in wanted]
+    if not cases:
+        parser.error(f"no cases match {args.cases!r}; cases are {', '.join(CASES)}")
+
+    def log(line):
+        sys.stderr.write(line + "\n")
+
+    spec = TreeSpec(args.files, args.depth, args.fan_out, args.sizes, args.age_days, args.seed)
+    document = run_suite(spec, cases, args.dir, args.workers, log)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+    else:
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            return 0 if compare(json.load(f), document, args.tolerance, log) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
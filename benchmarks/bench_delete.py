@@ -0,0 +1,61 @@
+"""Compare the parallel deleter with the old serial listdir/rmtree loop.
+
+Usage: python benchmarks/bench_delete.py [--files 1000000] [--dir /tmp]
+
+benchmarks/bench.py times every engine; this compares the deleter alone
+with the loop it replaced.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from deleter import delete_contents  # noqa: E402
+from treegen import TreeSpec, build_tree  # noqa: E402
+
+
+def serial_clear(root):
+    """The loop every clear function used before the deleter."""
+    total_deleted = 0
+    for item in os.listdir(root):
+        item_path = os.path.join(root, item)
+        if os.path.isdir(item_path):
+            shutil.rmtree(item_path)
+        else:
+            os.remove(item_path)
+        total_deleted += 1
+    return total_deleted
+
+
+def run(name, fn, files, base):
+    root = tempfile.mkdtemp(prefix="bench_delete_", dir=base)
+    try:
+        build_tree(root, TreeSpec(files, sizes="tiny", age_days=0))
+        start = time.perf_counter()
+        fn(root)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print(f"{name:<10} {elapsed:8.2f} s  {files / elapsed:12,.0f} files/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--dir", default=None, help="where to build the trees (tmpfs or real disk)")
+    args = parser.parse_args()
+
+    print(f"Deleting {args.files:,} files, dir_fd={'yes' if os.unlink in os.supports_dir_fd else 'no'}")
+    serial = run("serial", serial_clear, args.files, args.dir)
+    parallel = run("parallel", lambda root: delete_contents(root, max_workers=args.workers), args.files, args.dir)
+    print(f"speed-up   {serial / parallel:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
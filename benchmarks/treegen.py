@@ -0,0 +1,169 @@
+"""Build reproducible synthetic cache trees for the benchmarks.
+
+The same spec and seed always give the same tree: the same folders, file
+names, sizes and timestamps. Files are sparse by default, so a tree with
+millions of large files costs inodes but hardly any disk space or write
+time; pass --dense to write real contents (needed to benchmark anything
+that reads files). Build the tree on a tmpfs such as /dev/shm to take the
+disk out of the measurement.
+
+Usage: python benchmarks/treegen.py ROOT [--files 100000] [--depth 3] [--fan-out 10]
+                                         [--sizes cache] [--age-days 60] [--seed 1] [--dense]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from policies import parse_size  # noqa: E402
+
+# Named size distributions; "cache" resembles browser and media caches:
+# mostly small files with a long tail of large ones
+PRESETS = {
+    "tiny": "fixed:1",
+    "cache": "lognormal:16KB,2.0",
+    "media": "lognormal:4MB,1.5",
+}
+MAX_FILE_SIZE = 256 * 1024 ** 2
+
+
+def size_sampler(spec, rng):
+    """Return a function drawing file sizes for "fixed:SIZE", "uniform:MIN-MAX",
+    "lognormal:MEDIAN,SIGMA" or a preset name."""
+    kind, _, args = PRESETS.get(spec, spec).partition(":")
+    if kind == "fixed":
+        size = parse_size(args)
+        return lambda: size
+    if kind == "uniform":
+        low, high = (parse_size(value) for value in args.split("-"))
+        return lambda: rng.randint(low, high)
+    if kind == "lognormal":
+        median, sigma = args.split(",")
+        mu = math.log(parse_size(median))
+        sigma = float(sigma)
+        return lambda: min(MAX_FILE_SIZE, int(rng.lognormvariate(mu, sigma)))
+    raise ValueError(f"Unknown size distribution {spec!r}")
+
+
+class TreeSpec:
+    """Shape of a synthetic tree.
+
+    ``files`` are spread evenly over the fan_out ** depth leaf folders; the
+    top-level folders play the part of per-app cache folders. Access and
+    modification times are spread over the last ``age_days`` days.
+    """
+
+    def __init__(self, files=100000, depth=3, fan_out=10, sizes="cache", age_days=60, seed=1, sparse=True):
+        self.files = files
+        self.depth = depth
+        self.fan_out = fan_out
+        self.sizes = sizes
+        self.age_days = age_days
+        self.seed = seed
+        self.sparse = sparse
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    def leaves(self):
+        """Yield the relative path of every leaf folder, in a fixed order."""
+        for number in range(self.fan_out ** self.depth):
+            parts = []
+            for _ in range(self.depth):
+                parts.append(f"d{number % self.fan_out}")
+                number //= self.fan_out
+            yield os.path.join(*reversed(parts)) if parts else ""
+
+
+class TreeStats:
+    """What build_tree created."""
+
+    def __init__(self):
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+def _write(path, size, payload, sparse):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        if sparse:
+            os.ftruncate(fd, size)
+        else:
+            while size > 0:
+                size -= os.write(fd, payload[:size])
+    finally:
+        os.close(fd)
+
+
+def build_tree(root, spec, progress=None):
+    """Create the tree described by ``spec`` under ``root``; returns TreeStats."""
+    started = time.perf_counter()
+    rng = random.Random(spec.seed)
+    sample = size_sampler(spec.sizes, rng)
+    # Incompressible-looking but cheap contents for dense files
+    payload = random.Random(spec.seed).randbytes(1024 * 1024) if not spec.sparse else b""
+    now = time.time()
+    stats = TreeStats()
+    leaves = list(spec.leaves())
+    per_leaf, extra = divmod(spec.files, len(leaves))
+    folders = set()
+    for number, leaf in enumerate(leaves):
+        folder = os.path.join(root, leaf)
+        os.makedirs(folder, exist_ok=True)
+        folders.add(folder)
+        for index in range(per_leaf + (1 if number < extra else 0)):
+            path = os.path.join(folder, f"f{index:06d}.cache")
+            size = sample()
+            _write(path, size, payload, spec.sparse)
+            if spec.age_days:
+                used = now - rng.random() * spec.age_days * 86400
+                os.utime(path, (used, used - rng.random() * 3600))
+            stats.files += 1
+            stats.bytes += size
+        if progress is not None:
+            progress(stats)
+    # Old folder mtimes, as in a real cache, so the scan index trusts them at once
+    if spec.age_days:
+        created = set()
+        for folder in folders:
+            while folder != root and folder not in created:
+                created.add(folder)
+                folder = os.path.dirname(folder)
+        old = now - spec.age_days * 86400
+        for folder in created:
+            os.utime(folder, (old, old))
+    stats.dirs = sum(spec.fan_out ** level for level in range(1, spec.depth + 1))
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="folder to build the tree in")
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=10)
+    parser.add_argument("--sizes", default="cache", help=f"distribution or preset ({', '.join(PRESETS)})")
+    parser.add_argument("--age-days", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dense", action="store_true", help="write real contents instead of sparse files")
+    args = parser.parse_args()
+
+    spec = TreeSpec(args.files, args.depth, args.fan_out, args.sizes, args.age_days, args.seed, not args.dense)
+    stats = build_tree(args.root, spec)
+    json.dump({"spec": spec.to_dict(), "stats": stats.to_dict()}, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
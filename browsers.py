@@ -0,0 +1,264 @@
+"""Find the profiles of Chrome, Edge, Brave and Firefox and clear their caches.
+
+Every profile of every installed browser is found, not only "Default":
+Chromium browsers list theirs in the "Local State" file of the user data
+folder, Firefox in profiles.ini. Only the folders that hold disposable
+cache data are touched (Cache, Code Cache and GPUCache for Chromium, cache2
+for Firefox), wherever the platform keeps them; on macOS and Linux the HTTP
+cache lives in the per-user cache folder, apart from the profile itself.
+
+A browser that is running holds a lock on its profile (Chromium on the
+whole user data folder). Locked profiles are skipped and reported; the
+caches of all other profiles are cleared together in one parallel pass.
+"""
+import configparser
+import json
+import os
+import socket
+import sys
+from collections import namedtuple
+
+from target_engine import clear_targets, combine, scan_targets
+from targets import CacheTarget, expand_root
+
+CHROMIUM_CACHES = ("Cache", "Code Cache", "GPUCache")
+FIREFOX_CACHES = ("cache2",)
+
+# name -> (label, kind, platform -> (profile folder, cache folder or None))
+BROWSERS = {
+    "chrome": ("Google Chrome", "chromium", {
+        "darwin": ("~/Library/Application Support/Google/Chrome", "~/Library/Caches/Google/Chrome"),
+        "win32": ("${LOCALAPPDATA}/Google/Chrome/User Data", None),
+        "linux": ("${XDG_CONFIG_HOME:-~/.config}/google-chrome", "${XDG_CACHE_HOME:-~/.cache}/google-chrome"),
+    }),
+    "edge": ("Microsoft Edge", "chromium", {
+        "darwin": ("~/Library/Application Support/Microsoft Edge", "~/Library/Caches/Microsoft Edge"),
+        "win32": ("${LOCALAPPDATA}/Microsoft/Edge/User Data", None),
+        "linux": ("${XDG_CONFIG_HOME:-~/.config}/microsoft-edge", "${XDG_CACHE_HOME:-~/.cache}/microsoft-edge"),
+    }),
+    "brave": ("Brave", "chromium", {
+        "darwin": (
+            "~/Library/Application Support/BraveSoftware/Brave-Browser",
+            "~/Library/Caches/BraveSoftware/Brave-Browser",
+        ),
+        "win32": ("${LOCALAPPDATA}/BraveSoftware/Brave-Browser/User Data", None),
+        "linux": (
+            "${XDG_CONFIG_HOME:-~/.config}/BraveSoftware/Brave-Browser",
+            "${XDG_CACHE_HOME:-~/.cache}/BraveSoftware/Brave-Browser",
+        ),
+    }),
+    "firefox": ("Firefox", "firefox", {
+        "darwin": ("~/Library/Application Support/Firefox", "~/Library/Caches/Firefox"),
+        "win32": ("${APPDATA}/Mozilla/Firefox", "${LOCALAPPDATA}/Mozilla/Firefox"),
+        "linux": ("~/.mozilla/firefox", "${XDG_CACHE_HOME:-~/.cache}/mozilla/firefox"),
+    }),
+}
+
+# caches are the existing cache folders of the profile
+BrowserProfile = namedtuple("BrowserProfile", "browser label name path caches locked")
+
+
+def browser_folders(name, platform=None):
+    """Return the expanded (profile folder, cache folder) of a browser on this platform."""
+    platform = platform or sys.platform
+    for prefix, (data, cache) in BROWSERS[name][2].items():
+        if platform.startswith(prefix):
+            return expand_root(data), expand_root(cache) if cache else None
+    return None, None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Running, as another user
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _symlink_lock_held(path, host_separator):
+    """True if a lock symlink ("host-pid" for Chromium, "ip:+pid" for Firefox)
+    names a process still running on this machine."""
+    try:
+        value = os.readlink(path)
+    except OSError:
+        return False
+    host, _, pid = value.rpartition(host_separator)
+    if host_separator == "-" and host != socket.gethostname():
+        # Held by another machine sharing this home folder: leave it alone
+        return True
+    try:
+        return _pid_alive(int(pid))
+    except ValueError:
+        return True
+
+
+def _file_lock_held(path):
+    """True if another process holds a lock on ``path``."""
+    if not os.path.exists(path):
+        return False
+    if os.name == "nt":
+        # The browser keeps the file open without sharing
+        try:
+            with open(path, "a"):
+                return False
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+    import fcntl
+
+    try:
+        fd = os.open(path, os.O_WRONLY)
+    except OSError:
+        return False
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return True
+    else:
+        fcntl.lockf(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+def chromium_locked(user_data):
+    """True if a Chromium browser is running on this user data folder."""
+    if os.name == "nt":
+        return _file_lock_held(os.path.join(user_data, "lockfile"))
+    return _symlink_lock_held(os.path.join(user_data, "SingletonLock"), "-")
+
+
+def firefox_locked(profile):
+    """True if Firefox is running on this profile."""
+    if os.name == "nt":
+        return _file_lock_held(os.path.join(profile, "parent.lock"))
+    return _symlink_lock_held(os.path.join(profile, "lock"), ":+") or _file_lock_held(
+        os.path.join(profile, ".parentlock")
+    )
+
+
+def _existing(folders):
+    """Return the folders that exist, each real folder once."""
+    found = {}
+    for path in folders:
+        if os.path.isdir(path):
+            found.setdefault(os.path.realpath(path), path)
+    return tuple(found.values())
+
+
+def _chromium_profiles(name, user_data, cache_root):
+    try:
+        with open(os.path.join(user_data, "Local State"), encoding="utf-8") as f:
+            info = json.load(f).get("profile", {}).get("info_cache", {})
+    except (OSError, ValueError, AttributeError):
+        info = {}
+    folders = set(info)
+    try:
+        with os.scandir(user_data) as it:
+            for entry in it:
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, "Preferences")):
+                    folders.add(entry.name)
+    except OSError:
+        return []
+    locked = chromium_locked(user_data)
+    profiles = []
+    for folder in sorted(folders):
+        path = os.path.join(user_data, folder)
+        if not os.path.isdir(path):
+            continue
+        candidates = [os.path.join(path, cache) for cache in CHROMIUM_CACHES]
+        if cache_root:
+            candidates.insert(0, os.path.join(cache_root, folder, "Cache"))
+        entry = info.get(folder)
+        label = entry.get("name") if isinstance(entry, dict) else None
+        profiles.append(BrowserProfile(name, label or folder, folder, path, _existing(candidates), locked))
+    return profiles
+
+
+def _firefox_profiles(name, data, cache_root):
+    ini = configparser.ConfigParser(interpolation=None)
+    try:
+        if not ini.read(os.path.join(data, "profiles.ini"), encoding="utf-8"):
+            return []
+    except configparser.Error:
+        return []
+    profiles = []
+    for section in ini.sections():
+        if not section.startswith("Profile") or "Path" not in ini[section]:
+            continue
+        relative = ini[section].get("IsRelative", "1") == "1"
+        rel_path = ini[section]["Path"].replace("/", os.sep)
+        path = os.path.join(data, rel_path) if relative else rel_path
+        if not os.path.isdir(path):
+            continue
+        candidates = [os.path.join(path, cache) for cache in FIREFOX_CACHES]
+        if relative and cache_root:
+            candidates.insert(0, os.path.join(cache_root, rel_path, "cache2"))
+        label = ini[section].get("Name") or os.path.basename(path)
+        profiles.append(BrowserProfile(
+            name, label, os.path.basename(path), path, _existing(candidates), firefox_locked(path)
+        ))
+    return profiles
+
+
+def find_profiles(browsers=None, platform=None):
+    """Return a BrowserProfile for every profile of the installed browsers."""
+    profiles = []
+    for name in browsers or BROWSERS:
+        data, cache_root = browser_folders(name, platform)
+        if not data or not os.path.isdir(data):
+            continue
+        if BROWSERS[name][1] == "firefox":
+            profiles.extend(_firefox_profiles(name, data, cache_root))
+        else:
+            profiles.extend(_chromium_profiles(name, data, cache_root))
+    return profiles
+
+
+def profile_targets(profiles):
+    """Return one CacheTarget per cache folder of the given profiles.
+
+    A profile may have a folder of the same name in the profile and in the
+    per-user cache folder, so the name says which one it is. A folder
+    reached twice, e.g. through a symlink, gets one target.
+    """
+    targets = []
+    seen = set()
+    for profile in profiles:
+        browser_label = BROWSERS[profile.browser][0]
+        for path in profile.caches:
+            real = os.path.realpath(path)
+            if real in seen:
+                continue
+            seen.add(real)
+            kind = os.path.basename(path)
+            where = "profile" if path.startswith(profile.path.rstrip(os.sep) + os.sep) else "cache"
+            slug = f"{profile.browser}-{profile.name}-{where}-{kind}".lower().replace(" ", "-")
+            targets.append(CacheTarget(
+                slug, path, label=f"{browser_label} {profile.label} {kind} ({where} folder)", group="browser"
+            ))
+    return targets
+
+
+def scan_browser_caches(browsers=None, max_workers=None, progress=None):
+    """Measure the caches of every profile; returns (profiles, target name -> FolderTotal)."""
+    profiles = find_profiles(browsers)
+    return profiles, scan_targets(profile_targets(profiles), max_workers=max_workers, progress=progress)
+
+
+def clear_browser_caches(browsers=None, max_workers=None, progress=None, title="Browser caches cleared"):
+    """Clear the caches of every profile whose browser is not running.
+
+    Returns one DeleteResult; the locked profiles are listed in ``skipped``.
+    """
+    profiles = find_profiles(browsers)
+    targets = profile_targets(profile for profile in profiles if not profile.locked)
+    result = combine(clear_targets(targets, max_workers, progress), title)
+    result.skipped.extend(profile.path for profile in profiles if profile.locked and profile.caches)
+    return result
@@ -0,0 +1,194 @@
+"""Cache clearing operations shared by the GUI and the command line.
+
+Nothing here imports PyQt5, so the command line starts without paying for it.
+The engines are imported by the functions that use them, so importing this
+module for one operation (the GUI's first tab, say) does not load them all.
+The directories themselves come from the target registry (cache_targets.json),
+which lists them per platform, so the same functions serve the macOS, Windows
+and Linux front ends.
+"""
+import getpass
+
+from targets import load_registry
+
+_registry = None
+
+def greet_user():
+    """Return the username for greeting."""
+    return getpass.getuser()
+
+def registry():
+    """Return the target registry, loaded on first use."""
+    global _registry
+    if _registry is None:
+        _registry = load_registry()
+    return _registry
+
+def app_support_dir():
+    """Return the directory holding per-app data folders on this platform, or None."""
+    folders = registry().platform_folders("app_data_dirs")
+    return folders[0] if folders else None
+
+def policies_for(targets, evict=False, policy=None):
+    """Return name -> EvictionPolicy, or None to clear the targets completely.
+
+    With ``evict`` each target uses its configured policy; ``policy``
+    applies one EvictionPolicy to all of them.
+    """
+    from policies import configured_policies, uniform_policies
+    if policy is not None:
+        return uniform_policies(targets, policy)
+    if evict:
+        return configured_policies(targets)
+    return None
+
+def clear_group(names, title, progress=None, evict=False, policy=None):
+    """Clear the registry targets matching target or group names in one pass."""
+    from planner import evict_targets
+    from target_engine import clear_targets, combine
+    targets = registry().select(names)
+    policies = policies_for(targets, evict, policy)
+    if policies is not None:
+        return combine(evict_targets(targets, policies, progress=progress), title)
+    return combine(clear_targets(targets, progress=progress), title)
+
+def plan_group(names, progress=None, evict=False, policy=None):
+    """Return the DeletionPlan clear_group would carry out, without deleting."""
+    from planner import make_plan
+    targets = registry().select(names)
+    return make_plan(targets, policies_for(targets, evict, policy), progress=progress)
+
+def apply_plan(plan, title, progress=None):
+    """Carry out a DeletionPlan and return one combined DeleteResult."""
+    from planner import execute_plan
+    from target_engine import combine
+    return combine(execute_plan(plan, progress=progress), title)
+
+def archive_group(names, title, progress=None, evict=False, policy=None, dest=None):
+    """Archive, then delete, what clear_group would delete.
+
+    Returns (Archive, combined DeleteResult).
+    """
+    from archiver import archive_plan
+    from target_engine import combine
+    archive, results = archive_plan(plan_group(names, progress, evict, policy), dest, progress=progress)
+    return archive, combine(results, title)
+
+def scan_groups(names=None, index=None, progress=None, record=False):
+    """Measure registry targets in one pass; returns target name -> FolderTotal.
+
+    With ``record`` the sizes are added to the history store for the trends.
+    """
+    from history import HistoryStore
+    from target_engine import scan_targets
+    totals = scan_targets(registry().select(names), index=index, progress=progress)
+    if record:
+        HistoryStore().record_scan(totals)
+    return totals
+
+def clear_cache(progress=None, evict=False, policy=None):
+    """Clear the system cache group (~/Library/Caches, ~/.cache)."""
+    return clear_group(["system"], "Cache cleared", progress=progress, evict=evict, policy=policy)
+
+def plan_cache(progress=None, evict=False, policy=None):
+    """Plan clearing the system cache group without deleting anything."""
+    return plan_group(["system"], progress=progress, evict=evict, policy=policy)
+
+def delete_app_folder(selected_folder):
+    """Delete a selected app folder."""
+    from deleter import delete_contents
+    return delete_contents(selected_folder, remove_root=True, title=f"Deleted {selected_folder}")
+
+def clear_adobe_media_cache(progress=None, evict=False, policy=None):
+    """Clear Adobe media cache in specific folders."""
+    return clear_group(["adobe"], "Adobe Media Cache cleared", progress=progress, evict=evict, policy=policy)
+
+def clear_browser_cache(progress=None):
+    """Clear the caches of every browser profile, skipping running browsers."""
+    from browsers import clear_browser_caches
+    return clear_browser_caches(progress=progress)
+
+def scan_browser_cache(progress=None):
+    """Measure the browser profile caches; returns (profiles, name -> FolderTotal)."""
+    from browsers import scan_browser_caches
+    return scan_browser_caches(progress=progress)
+
+def delete_app_folders(folders, progress=None):
+    """Delete several app folders, or leftover files, as one batch."""
+    from deleter import delete_folders
+    return delete_folders(folders, progress=progress, title=f"Deleted {len(folders)} app folders")
+
+def find_orphaned_folders(progress=None):
+    """Rank the app data folders and files left behind by uninstalled apps."""
+    from orphans import find_orphans
+    return find_orphans(
+        registry().platform_folders("app_dirs"), registry().platform_folders("app_data_dirs"), progress=progress
+    )
+
+def find_duplicate_files(names, index=None, progress=None):
+    """Group identical files across the named targets, most reclaimable first."""
+    from duplicates import find_duplicates
+    return find_duplicates(registry().select(names), index=index, progress=progress)
+
+def archive_adobe_media_cache(progress=None, evict=False, policy=None):
+    """Archive the Adobe media cache so it can be restored instead of rebuilt."""
+    return archive_group(["adobe"], "Adobe Media Cache archived", progress=progress, evict=evict, policy=policy)
+
+def restore_from_archive(path, patterns=None, progress=None):
+    """Restore archived files that are not back in place yet."""
+    from archiver import restore_archive
+    return restore_archive(path, patterns, progress=progress)
+
+def watch_groups(names=None, on_change=None, cleanup=False, on_cleanup=None, poll=False, throttle=None):
+    """Start a Watcher keeping the named targets' sizes current."""
+    from watcher import Watcher
+    return Watcher(
+        registry().select(names), on_change=on_change, cleanup=cleanup, on_cleanup=on_cleanup, poll=poll,
+        throttle=throttle,
+    ).start()
+
+def schedules(names=None):
+    """Return the configured Schedules, or only the named ones."""
+    from scheduler import Schedule
+    return [
+        Schedule.from_dict(item) for name, item in registry().schedules.items() if names is None or name in names
+    ]
+
+def start_scheduler(on_run=None, names=None, on_error=None):
+    """Start a Scheduler running the configured schedules."""
+    from scheduler import Scheduler
+    return Scheduler(schedules(names), registry(), on_run=on_run, on_error=on_error).start()
+
+def target_trends(names=None, history=None):
+    """Return a Trend for every target with history, against its policy budget.
+
+    ``names`` are target or group names; None or "all" lists every target.
+    """
+    from history import HistoryStore
+    if names is not None and (not names or "all" in names):
+        names = None
+    history = history or HistoryStore()
+    targets = {target.name: target for target in registry().select(names)}
+    trends = []
+    for name in history.names():
+        if names is not None and name not in targets:
+            continue
+        target = targets.get(name)
+        budget = target.policy.budget if target is not None and target.policy is not None else None
+        trends.append(history.trend(name, budget))
+    return trends
+
+def dashboard_trends(names=None, progress=None):
+    """Return (trends, target name -> label) for the GUI's growth chart."""
+    labels = {target.name: target.label for target in registry().available()}
+    return target_trends(names), labels
+
+def plan_adobe_media_cache(progress=None, evict=False, policy=None):
+    """Plan clearing the Adobe media cache without deleting anything."""
+    return plan_group(["adobe"], progress=progress, evict=evict, policy=policy)
+
+def list_app_folders(progress=None):
+    """Stream the folders in the per-app data directory."""
+    from pipeline import iter_app_folders
+    folder = app_support_dir()
+    return iter_app_folders(folder, progress=progress) if folder else iter(())
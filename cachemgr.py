@@ -0,0 +1,602 @@
+"""Headless command line for scanning and clearing caches.
+
+Usage:
+    python cachemgr.py scan [TARGET ...] [--top N] [--format text|json|ndjson] [--no-index] [--record]
+    python cachemgr.py clear TARGET ... [--evict] [--older-than DAYS] [--keep-newest-per-app SIZE]
+                             [--budget SIZE] [--order atime|mtime] [--format text|json|ndjson]
+    python cachemgr.py plan TARGET ... [eviction options as for clear] [--save FILE] [--format ...]
+    python cachemgr.py apply FILE [--format text|json|ndjson]
+    python cachemgr.py archive TARGET ... [eviction options as for clear] [--to DIR]
+                               [--compression deflate|bzip2|lzma|store] [--level N] [--format ...]
+    python cachemgr.py restore ARCHIVE [PATH ...] [--overwrite] [--list] [--format ...]
+    python cachemgr.py list-archives [--format text|json|ndjson]
+    python cachemgr.py watch [TARGET ...] [--cleanup] [--threshold SIZE] [--poll [SECONDS]] [--format ...]
+    python cachemgr.py schedule [SCHEDULE ...] [--once] [--format text|json|ndjson]
+    python cachemgr.py trends [TARGET ...] [--format text|json|ndjson]
+    python cachemgr.py list-targets [--format text|json|ndjson]
+    python cachemgr.py list-app-folders [--sizes] [--format text|json|ndjson]
+    python cachemgr.py orphans [--format text|json|ndjson]
+    python cachemgr.py duplicates [TARGET ...] [--min-size SIZE] [--link | --delete] [--no-index] [--format ...]
+    python cachemgr.py browsers [chrome|edge|brave|firefox ...] [--clear] [--format text|json|ndjson]
+
+Every command also takes --metrics FILE (write per-phase timings and
+counters as JSON, or in the Prometheus text format for .prom),
+--profile cpu|memory (write a profile report to the app data directory) and
+--background (run at low CPU and I/O priority with deletes rate limited,
+adjusted with --max-ops N and --max-rate SIZE per second).
+
+TARGET is a target or group name from cache_targets.json, or "all" for every
+safe and review target; unsafe targets run only when named.
+
+Never imports PyQt5, so it is cheap to run from cron or fleet scripts.
+
+Exit codes: 0 success, 1 partial failure (some items could not be read or
+deleted), 2 bad usage, 3 cancelled, 4 a scheduled run failed or the
+scheduler stopped, 130 interrupted.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+
+import metrics
+import profiling
+from archiver import COMPRESSION, Archive, archive_plan, list_archives, restore_archive
+from browsers import BROWSERS, clear_browser_caches, profile_targets, scan_browser_caches
+from cache_ops import (
+    find_orphaned_folders, list_app_folders, policies_for, registry, schedules, target_trends
+)
+from history import HistoryStore
+from duplicates import MIN_SIZE, delete_duplicates, find_duplicates, link_duplicates
+from planner import DeletionPlan, evict_targets, execute_plan, make_plan
+from policies import EvictionPolicy, parse_size
+from progress import Progress
+from scan_index import ScanIndex
+from scheduler import Scheduler
+from size_engine import TOP_FILES, folder_size, human_readable_size
+from target_engine import clear_targets, combine, scan_targets
+from throttle import DEFAULT_BYTES_PER_SECOND, DEFAULT_OPS_PER_SECOND, Throttle, lower_process_priority
+from watcher import POLL_INTERVAL, Watcher
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_CANCELLED = 3
+EXIT_FAILED = 4
+EXIT_INTERRUPTED = 130
+
+
+
+class Output:
+    """Writes records as text, a single JSON document or NDJSON lines."""
+
+    def __init__(self, fmt, stream=None):
+        self.fmt = fmt
+        self.stream = stream or sys.stdout
+        self.records = []
+        # Throttle for the deletes of --background, --max-ops and --max-rate
+        self.throttle = None
+
+    def record(self, record, text=None):
+        """Emit one result record; JSON output collects them until close()."""
+        if self.fmt == "ndjson":
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+        elif self.fmt == "json":
+            self.records.append(record)
+        elif text is not None:
+            self.stream.write(text + "\n")
+
+    def event(self, record):
+        """Emit a transient event such as progress; only NDJSON carries these."""
+        if self.fmt == "ndjson":
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    def close(self, **extra):
+        if self.fmt == "json":
+            json.dump(dict(extra, results=self.records), self.stream, indent=2)
+            self.stream.write("\n")
+
+
+def progress_for(output):
+    """Return a Progress that streams snapshots as NDJSON events."""
+    def emit(snapshot):
+        output.event({
+            "event": "progress",
+            "items": snapshot.items,
+            "bytes": snapshot.bytes,
+            "bytes_per_second": round(snapshot.bytes_per_second),
+            "path": snapshot.path,
+        })
+    return Progress(callback=emit if output.fmt == "ndjson" else None, throttle=output.throttle)
+
+
+def selected_targets(names):
+    """Resolve target and group names; "all" or none selects every safe and review target."""
+    return registry().select(None if not names or "all" in names else names)
+
+
+def cmd_scan(args, output):
+    index = None if args.no_index else ScanIndex()
+    targets = selected_targets(args.targets)
+    top_n = TOP_FILES if args.top is None else args.top
+    totals = scan_targets(targets, index=index, progress=progress_for(output), top_n=top_n)
+    if args.record:
+        HistoryStore().record_scan(totals)
+
+    status = EXIT_OK
+    for target in targets:
+        total = totals[target.name]
+        if total.errors:
+            status = EXIT_PARTIAL
+        output.record(
+            {
+                "event": "scan",
+                "target": target.name,
+                "group": target.group,
+                "path": target.path,
+                "exists": total.exists,
+                "size": total.size,
+                "files": total.files,
+                "dirs": total.dirs,
+                "errors": total.errors,
+                "children": total.children,
+                "largest_dirs": [{"path": path, "size": size} for size, path in total.largest_dirs],
+                "largest_files": [{"path": path, "size": size} for size, path in total.largest_files],
+            },
+            f"{target.name:<24} {human_readable_size(total.size):>12}  {total.files:>9} files  {target.path}",
+        )
+        if args.top and output.fmt == "text":
+            for kind, entries in (("dir ", total.largest_dirs), ("file", total.largest_files)):
+                for size, path in entries:
+                    output.record(None, f"  {kind} {human_readable_size(size):>12}  {path}")
+    return EXIT_CANCELLED if any(total.cancelled for total in totals.values()) else status
+
+
+def policy_from_args(args):
+    """Return the EvictionPolicy given by the clear options, or None."""
+    if args.older_than is None and args.keep_newest_per_app is None and args.budget is None:
+        return None
+    return EvictionPolicy(args.older_than, args.keep_newest_per_app, args.budget, args.order)
+
+
+def report_results(output, results, groups):
+    """Emit one record per target result and return the exit code."""
+    for name, result in results.items():
+        record = dict(result.to_dict(), event="clear", target=name, group=groups.get(name))
+        output.record(record, result.summary())
+    combined = combine(results, "Cleared")
+    if combined.cancelled:
+        return EXIT_CANCELLED
+    return EXIT_OK if combined.ok else EXIT_PARTIAL
+
+
+def cmd_clear(args, output):
+    targets = selected_targets(args.targets)
+    policies = policies_for(targets, args.evict, policy_from_args(args))
+    if policies is not None:
+        results = evict_targets(targets, policies, progress=progress_for(output))
+    else:
+        results = clear_targets(targets, progress=progress_for(output))
+    return report_results(output, results, {target.name: target.group for target in targets})
+
+
+def cmd_plan(args, output):
+    targets = selected_targets(args.targets)
+    policies = policies_for(targets, args.evict, policy_from_args(args))
+    plan = make_plan(targets, policies, progress=progress_for(output))
+    if args.save:
+        plan.save(args.save)
+    for entry in plan:
+        output.record(
+            {"event": "plan_entry", "target": entry.target, "path": entry.path,
+             "size": entry.size, "reason": entry.reason}
+        )
+    output.record(
+        {"event": "plan", "files": len(plan), "total_bytes": plan.total_bytes, "saved_to": args.save},
+        plan.summary(),
+    )
+    return EXIT_CANCELLED if plan.cancelled else EXIT_OK
+
+
+def cmd_apply(args, output):
+    try:
+        plan = DeletionPlan.load(args.plan)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        sys.stderr.write(f"cachemgr: cannot read plan {args.plan}: {e}\n")
+        return EXIT_USAGE
+    if plan.cancelled:
+        sys.stderr.write(f"cachemgr: {args.plan} is from a cancelled scan and incomplete\n")
+        return EXIT_USAGE
+    results = execute_plan(plan, progress=progress_for(output))
+    return report_results(output, results, {})
+
+
+def cmd_archive(args, output):
+    targets = selected_targets(args.targets)
+    policies = policies_for(targets, args.evict, policy_from_args(args))
+    progress = progress_for(output)
+    plan = make_plan(targets, policies, progress=progress)
+    if plan.cancelled:
+        return EXIT_CANCELLED
+    try:
+        archive, results = archive_plan(plan, args.to, args.compression, args.level, progress=progress)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"cachemgr: cannot archive: {e}\n")
+        return EXIT_USAGE
+    output.record(
+        {"event": "archive", "path": archive.path, "files": len(archive),
+         "total_bytes": archive.total_bytes, "archive_bytes": archive.archive_bytes},
+        archive.summary(),
+    )
+    return report_results(output, results, {target.name: target.group for target in targets})
+
+
+def cmd_restore(args, output):
+    try:
+        archive = Archive.load(args.archive)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        sys.stderr.write(f"cachemgr: cannot read archive {args.archive}: {e}\n")
+        return EXIT_USAGE
+    if args.list:
+        for entry in archive.select(args.paths):
+            output.record(
+                {"event": "archive_entry", "target": entry.target, "path": entry.path, "size": entry.size},
+                f"{human_readable_size(entry.size):>12}  {entry.path}",
+            )
+        return EXIT_OK
+    result = restore_archive(args.archive, args.paths, args.overwrite, progress=progress_for(output))
+    output.record(dict(result.to_dict(), event="restore", archive=args.archive), result.summary())
+    if result.cancelled:
+        return EXIT_CANCELLED
+    return EXIT_OK if result.ok else EXIT_PARTIAL
+
+
+def cmd_list_archives(args, output):
+    for archive in list_archives():
+        output.record(
+            {"event": "archive", "path": archive.path, "created": archive.created, "files": len(archive),
+             "total_bytes": archive.total_bytes, "archive_bytes": archive.archive_bytes,
+             "targets": [target.name for target in archive.targets]},
+            f"{human_readable_size(archive.total_bytes):>12} in {human_readable_size(archive.archive_bytes):>12}  "
+            f"{len(archive):>9} files  {archive.path}",
+        )
+    return EXIT_OK
+
+
+def cmd_watch(args, output):
+    targets = selected_targets(args.targets)
+    lock = threading.Lock()
+    last = {}
+
+    def on_change(totals):
+        with lock:
+            for target in targets:
+                size, files = totals[target.name]
+                if last.get(target.name) == (size, files):
+                    continue
+                last[target.name] = (size, files)
+                output.record(
+                    {"event": "size", "target": target.name, "size": size, "files": files},
+                    f"{target.name:<24} {human_readable_size(size):>12}  {files:>9} files",
+                )
+
+    def on_cleanup(name, result):
+        with lock:
+            output.record(dict(result.to_dict(), event="clear", target=name), result.summary())
+
+    thresholds = None if args.threshold is None else {target.name: args.threshold for target in targets}
+    watcher = Watcher(
+        targets, on_change=on_change, cleanup=args.cleanup, thresholds=thresholds, on_cleanup=on_cleanup,
+        poll=args.poll is not None, interval=args.poll or POLL_INTERVAL, throttle=output.throttle,
+    ).start()
+    try:
+        # Runs until interrupted; waits in slices so Ctrl-C is seen
+        while not watcher.wait(1.0):
+            pass
+    finally:
+        watcher.stop()
+    return EXIT_OK
+
+
+def cmd_schedule(args, output):
+    configured = {schedule.name for schedule in schedules()}
+    unknown = [name for name in args.schedules if name not in configured]
+    if unknown:
+        sys.stderr.write(f"cachemgr: unknown schedule: {', '.join(unknown)}\n")
+        return EXIT_USAGE
+    lock = threading.Lock()
+    status = EXIT_OK
+
+    def on_run(schedule, results):
+        nonlocal status
+        with lock:
+            for name, result in results.items():
+                if not result.ok:
+                    status = EXIT_PARTIAL
+                output.record(
+                    dict(result.to_dict(), event="scheduled", schedule=schedule.name, target=name),
+                    f"[{schedule.name}] {result.summary()}",
+                )
+
+    def on_error(schedule, error):
+        nonlocal status
+        name = schedule.name if schedule is not None else None
+        with lock:
+            status = EXIT_FAILED
+            output.record(
+                {"event": "schedule_error", "schedule": name, "error": str(error)},
+                f"[{name or 'scheduler'}] failed: {error}",
+            )
+
+    scheduler = Scheduler(schedules(args.schedules or None), registry(), on_run=on_run, on_error=on_error)
+    if args.once:
+        scheduler.run_all()
+        return status
+    scheduler.start()
+    try:
+        # Runs until interrupted; waits in slices so Ctrl-C is seen
+        while not scheduler.wait(1.0):
+            pass
+    finally:
+        scheduler.stop()
+    # Only stop() ends the scheduler thread, so getting here means it died
+    sys.stderr.write("cachemgr: the scheduler stopped unexpectedly\n")
+    return EXIT_FAILED
+
+
+def cmd_trends(args, output):
+    for trend in target_trends(args.targets or None):
+        rate = "-" if trend.rate is None else f"{human_readable_size(trend.rate)}/day"
+        full = "-" if trend.full_at is None else time.strftime("%Y-%m-%d", time.localtime(trend.full_at))
+        output.record(
+            dict(trend._asdict(), event="trend"),
+            f"{trend.target:<24} {human_readable_size(trend.size or 0):>12}  {rate:>14}  budget reached: {full}",
+        )
+    return EXIT_OK
+
+
+def cmd_list_targets(args, output):
+    for target in registry().available():
+        output.record(
+            dict(target.to_dict(), event="target", path=target.path),
+            f"{target.name:<24} {target.group:<16} {target.safety:<7} {target.path}",
+        )
+    return EXIT_OK
+
+
+def cmd_list_app_folders(args, output):
+    for entry in list_app_folders():
+        record = {"event": "app_folder", "name": entry.name, "path": entry.path}
+        text = entry.name
+        if args.sizes:
+            record["size"] = folder_size(entry.path)
+            text = f"{human_readable_size(record['size']):>12}  {entry.name}"
+        output.record(record, text)
+    return EXIT_OK
+
+
+def cmd_orphans(args, output):
+    progress = progress_for(output)
+    for orphan in find_orphaned_folders(progress=progress):
+        output.record(
+            dict(orphan.to_dict(), event="orphan"),
+            f"{orphan.score:>4.0%} {human_readable_size(orphan.size):>12}  {orphan.reason:<9}  "
+            f"{orphan.kind:<20} {orphan.path}",
+        )
+    return EXIT_CANCELLED if progress.cancelled else EXIT_OK
+
+
+def cmd_browsers(args, output):
+    unknown = [name for name in args.browsers if name not in BROWSERS]
+    if unknown:
+        sys.stderr.write(f"cachemgr: unknown browser: {', '.join(unknown)}\n")
+        return EXIT_USAGE
+    progress = progress_for(output)
+    profiles, totals = scan_browser_caches(args.browsers or None, progress=progress)
+    for profile in profiles:
+        size = sum(totals[target.name].size for target in profile_targets([profile]))
+        output.record(
+            {"event": "browser_profile", "browser": profile.browser, "profile": profile.label,
+             "path": profile.path, "caches": list(profile.caches), "size": size, "locked": profile.locked},
+            f"{profile.browser:<8} {profile.label:<20} {human_readable_size(size):>12}  "
+            f"{'in use' if profile.locked else '':<6}  {profile.path}",
+        )
+    if progress.cancelled:
+        return EXIT_CANCELLED
+    if not args.clear:
+        return EXIT_OK
+    result = clear_browser_caches(args.browsers or None, progress=progress)
+    output.record(dict(result.to_dict(), event="clear", group="browser"), result.summary())
+    if result.cancelled:
+        return EXIT_CANCELLED
+    return EXIT_OK if result.ok else EXIT_PARTIAL
+
+
+def cmd_duplicates(args, output):
+    index = None if args.no_index else ScanIndex()
+    progress = progress_for(output)
+    groups = find_duplicates(selected_targets(args.targets), index=index, min_size=args.min_size, progress=progress)
+    for group in groups:
+        output.record(
+            dict(group.to_dict(), event="duplicates"),
+            f"{human_readable_size(group.reclaimable):>12}  {len(group.files)} x {human_readable_size(group.size)}  "
+            f"{group.files[0].path}",
+        )
+    if progress.cancelled:
+        return EXIT_CANCELLED
+    if not (args.link or args.delete):
+        return EXIT_OK
+    result = link_duplicates(groups, progress) if args.link else delete_duplicates(groups, progress)
+    output.record(dict(result.to_dict(), event="dedup"), result.summary())
+    if result.cancelled:
+        return EXIT_CANCELLED
+    return EXIT_OK if result.ok else EXIT_PARTIAL
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        "--format", choices=["text", "json", "ndjson"], default="text", help="output format (default: text)"
+    )
+    common.add_argument(
+        "--metrics", metavar="FILE", help="write phase timings and counters to FILE (.prom for Prometheus)"
+    )
+    common.add_argument("--profile", choices=profiling.MODES, help="write a CPU or memory profile report")
+    common.add_argument(
+        "--background", action="store_true",
+        help="run at low priority and rate limit deletes, backing off while the disk is busy",
+    )
+    common.add_argument("--max-ops", type=int, metavar="N", help="delete at most N files and folders per second")
+    common.add_argument(
+        "--max-rate", type=parse_size, metavar="SIZE", help="delete at most SIZE (e.g. 50MB) per second"
+    )
+    parser = argparse.ArgumentParser(prog="cachemgr", description="Scan and clear caches without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", parents=[common], help="measure the cache directories")
+    scan.add_argument("targets", nargs="*", metavar="TARGET", help="target or group names (default: all)")
+    scan.add_argument("--no-index", action="store_true", help="ignore the incremental scan index")
+    scan.add_argument("--record", action="store_true", help="add the sizes to the history used by trends")
+    scan.add_argument(
+        "--top", type=int, metavar="N", help=f"list the N largest folders and files per target (at most {TOP_FILES})"
+    )
+    scan.set_defaults(func=cmd_scan)
+
+    evict = argparse.ArgumentParser(add_help=False)
+    evict.add_argument("targets", nargs="+", metavar="TARGET", help="target or group names, or all")
+    evict.add_argument("--evict", action="store_true", help="trim by each target's configured policy")
+    evict.add_argument("--older-than", type=int, metavar="DAYS", help="only delete files not used for DAYS days")
+    evict.add_argument(
+        "--keep-newest-per-app", type=parse_size, metavar="SIZE", help="keep the newest SIZE (e.g. 500MB) per app"
+    )
+    evict.add_argument("--budget", type=parse_size, metavar="SIZE", help="trim each target to SIZE")
+    evict.add_argument(
+        "--order", choices=["atime", "mtime"], default="atime", help="what counts as use (default: atime)"
+    )
+
+    clear = commands.add_parser("clear", parents=[common, evict], help="delete cache contents")
+    clear.set_defaults(func=cmd_clear)
+
+    plan = commands.add_parser("plan", parents=[common, evict], help="show what clear would delete")
+    plan.add_argument("--save", metavar="FILE", help="write the plan to FILE for a later apply")
+    plan.set_defaults(func=cmd_plan)
+
+    apply = commands.add_parser("apply", parents=[common], help="carry out a saved plan")
+    apply.add_argument("plan", metavar="FILE", help="plan written by plan --save")
+    apply.set_defaults(func=cmd_apply)
+
+    archive = commands.add_parser(
+        "archive", parents=[common, evict], help="compress cache contents into an archive, then delete them"
+    )
+    archive.add_argument("--to", metavar="DIR", help="archive folder (default: a new folder in the app data)")
+    archive.add_argument(
+        "--compression", choices=list(COMPRESSION), default="deflate", help="zip compression (default: deflate)"
+    )
+    archive.add_argument("--level", type=int, metavar="N", help="compression level (default: the codec's own)")
+    archive.set_defaults(func=cmd_archive)
+
+    restore = commands.add_parser("restore", parents=[common], help="put archived files back in place")
+    restore.add_argument("archive", metavar="ARCHIVE", help="archive folder written by archive")
+    restore.add_argument(
+        "paths", nargs="*", metavar="PATH", help="files, folders or glob patterns to restore (default: all)"
+    )
+    restore.add_argument("--overwrite", action="store_true", help="replace files that exist again")
+    restore.add_argument("--list", action="store_true", help="only list the matching archived files")
+    restore.set_defaults(func=cmd_restore)
+
+    archives = commands.add_parser("list-archives", parents=[common], help="list the archives in the app data")
+    archives.set_defaults(func=cmd_list_archives)
+
+    watch = commands.add_parser("watch", parents=[common], help="report size changes as they happen")
+    watch.add_argument("targets", nargs="*", metavar="TARGET", help="target or group names (default: all)")
+    watch.add_argument(
+        "--cleanup", action="store_true", help="trim a target by its policy once it outgrows its threshold"
+    )
+    watch.add_argument(
+        "--threshold", type=parse_size, metavar="SIZE", help="cleanup threshold (default: 110%% of the policy budget)"
+    )
+    watch.add_argument(
+        "--poll", type=float, nargs="?", const=POLL_INTERVAL, metavar="SECONDS",
+        help=f"poll instead of using inotify (default interval: {POLL_INTERVAL:g}s)",
+    )
+    watch.set_defaults(func=cmd_watch)
+
+    schedule = commands.add_parser("schedule", parents=[common], help="run the configured schedules on their timers")
+    schedule.add_argument("schedules", nargs="*", metavar="SCHEDULE", help="schedule names (default: all)")
+    schedule.add_argument("--once", action="store_true", help="run each schedule now, once, and exit")
+    schedule.set_defaults(func=cmd_schedule)
+
+    trends = commands.add_parser("trends", parents=[common], help="show growth per target and when budgets fill")
+    trends.add_argument("targets", nargs="*", metavar="TARGET", help="target or group names (default: all)")
+    trends.set_defaults(func=cmd_trends)
+
+    targets = commands.add_parser("list-targets", parents=[common], help="list the configured targets")
+    targets.set_defaults(func=cmd_list_targets)
+
+    folders = commands.add_parser("list-app-folders", parents=[common], help="list per-app data folders")
+    folders.add_argument("--sizes", action="store_true", help="also measure each folder")
+    folders.set_defaults(func=cmd_list_app_folders)
+
+    orphans = commands.add_parser("orphans", parents=[common], help="list data left behind by removed apps")
+    orphans.set_defaults(func=cmd_orphans)
+
+    dupes = commands.add_parser("duplicates", parents=[common], help="find identical files in the targets")
+    dupes.add_argument("targets", nargs="*", metavar="TARGET", help="target or group names (default: all)")
+    dupes.add_argument(
+        "--min-size", type=parse_size, default=MIN_SIZE, metavar="SIZE", help="ignore smaller files (default: 64KB)"
+    )
+    dupes.add_argument("--no-index", action="store_true", help="do not reuse or store file hashes")
+    action = dupes.add_mutually_exclusive_group()
+    action.add_argument("--link", action="store_true", help="replace copies with hard links to one file")
+    action.add_argument("--delete", action="store_true", help="delete copies, keeping one file")
+    dupes.set_defaults(func=cmd_duplicates)
+
+    browsers = commands.add_parser("browsers", parents=[common], help="list browser profiles and their caches")
+    browsers.add_argument(
+        "browsers", nargs="*", metavar="BROWSER", help=f"{', '.join(BROWSERS)} (default: all)"
+    )
+    browsers.add_argument("--clear", action="store_true", help="clear the caches of profiles not in use")
+    browsers.set_defaults(func=cmd_browsers)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    output = Output(args.format)
+    if getattr(args, "targets", None):
+        known = {target.name for target in registry().available()} | set(registry().groups()) | {"all"}
+        unknown = [name for name in args.targets if name not in known]
+        if unknown:
+            parser.print_usage(sys.stderr)
+            sys.stderr.write(f"cachemgr: unknown target: {', '.join(unknown)}\n")
+            return EXIT_USAGE
+    if args.metrics:
+        metrics.enable()
+    profiling.set_mode(args.profile)
+    if args.background:
+        lower_process_priority()
+        output.throttle = Throttle(args.max_ops or DEFAULT_OPS_PER_SECOND, args.max_rate or DEFAULT_BYTES_PER_SECOND)
+    elif args.max_ops or args.max_rate:
+        output.throttle = Throttle(args.max_ops, args.max_rate, lower_priority=False, adaptive=False)
+    try:
+        status = profiling.profiled(args.command, args.func, args, output)
+    except KeyboardInterrupt:
+        return EXIT_INTERRUPTED
+    finally:
+        if args.metrics:
+            metrics.write(args.metrics)
+        if args.profile and profiling.last_report:
+            sys.stderr.write(f"cachemgr: profile written to {profiling.last_report}\n")
+    output.close(command=args.command, exit_code=status)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Small painted charts for the dashboard, without the QtChart add-on."""
+import time
+
+from PyQt5.QtCore import QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter
+from PyQt5.QtWidgets import QSizePolicy, QWidget
+
+from size_engine import human_readable_size
+
+ROW_HEIGHT = 52
+BAR_HEIGHT = 8
+# Bars turn to this colour when the budget fills within WARN_DAYS
+WARN_COLOR = QColor("#d9534f")
+BAR_COLOR = QColor("#4a90d9")
+WARN_DAYS = 7
+
+
+def _due_text(trend, now):
+    if trend.full_at is None:
+        return "no budget" if not trend.budget else "not growing"
+    days = (trend.full_at - now) / 86400
+    if days <= 0:
+        return "over budget"
+    if days < 1:
+        return "budget full today"
+    return f"budget full in {days:.0f} days ({time.strftime('%b %d', time.localtime(trend.full_at))})"
+
+
+class GrowthChart(QWidget):
+    """One bar per target: its growth per day, scaled to the fastest one,
+    captioned with its size and when it reaches its budget."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # None until the first set_trends, while the history is still loading
+        self._trends = None
+        self._labels = {}
+        self.setMinimumHeight(ROW_HEIGHT)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
+
+    def set_trends(self, trends, labels=None):
+        """Show Trend tuples (see history.py); ``labels`` maps names to display names."""
+        self._trends = [trend for trend in trends if trend.size is not None]
+        self._labels = labels or {}
+        self.setMinimumHeight(max(1, len(self._trends)) * ROW_HEIGHT)
+        self.updateGeometry()
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        text_color = self.palette().windowText().color()
+        if not self._trends:
+            painter.setPen(text_color)
+            message = "Loading history..." if self._trends is None else "No history yet: scan or run a schedule first."
+            painter.drawText(self.rect(), Qt.AlignCenter, message)
+            return
+        now = time.time()
+        fastest = max((trend.rate or 0 for trend in self._trends), default=0) or 1
+        width = self.width() - 8
+        for row, trend in enumerate(self._trends):
+            top = row * ROW_HEIGHT
+            rate = trend.rate or 0
+            caption = (
+                f"{self._labels.get(trend.target, trend.target)}: {human_readable_size(trend.size)}, "
+                + ("growth unknown" if trend.rate is None else f"+{human_readable_size(rate)}/day")
+                + f", {_due_text(trend, now)}"
+            )
+            painter.setPen(text_color)
+            caption_rect = QRectF(4, top, width, ROW_HEIGHT - BAR_HEIGHT - 4)
+            painter.drawText(caption_rect, Qt.AlignLeft | Qt.AlignBottom | Qt.TextWordWrap, caption)
+            warn = trend.full_at is not None and trend.full_at - now < WARN_DAYS * 86400
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(WARN_COLOR if warn else BAR_COLOR)
+            painter.drawRoundedRect(
+                QRectF(4, top + ROW_HEIGHT - BAR_HEIGHT - 2, max(2, width * rate / fastest), BAR_HEIGHT), 3, 3
+            )
@@ -0,0 +1,629 @@
+"""Parallel bulk deletion engine shared by every clear function.
+
+Files are unlinked in parallel, one worker task per directory, and the
+emptied directories are then removed bottom-up. Where the platform supports
+it every unlink and rmdir is relative to an open directory descriptor, so
+each directory path is resolved once instead of once per file.
+
+A failure never stops a run: every error is recorded with its errno and
+classified, and transient ones (a file held open, a busy mount) are retried
+with backoff in a separate pass once everything else is gone.
+"""
+import errno
+import os
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+
+import metrics
+from size_engine import InodeSet, default_workers, human_readable_size
+
+# Windows has no *at() calls, so it falls back to full paths
+USE_DIR_FD = (
+    os.unlink in os.supports_dir_fd
+    and os.rmdir in os.supports_dir_fd
+    and os.open in os.supports_dir_fd
+    and os.stat in os.supports_dir_fd
+    and os.scandir in os.supports_fd
+)
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)
+_NOFOLLOW = getattr(os, "O_NOFOLLOW", 0)
+
+# Error classes
+TRANSIENT = "transient"
+PERMISSION = "permission"
+BLOCKED = "blocked"
+OTHER = "other"
+
+TRANSIENT_ERRNOS = {
+    code for code in (
+        errno.EBUSY, errno.EAGAIN, errno.EINTR, getattr(errno, "ETXTBSY", None)
+    ) if code is not None
+}
+PERMISSION_ERRNOS = {errno.EACCES, errno.EPERM, errno.EROFS}
+BLOCKED_ERRNOS = {errno.ENOTEMPTY, errno.EEXIST}
+# ERROR_SHARING_VIOLATION and ERROR_LOCK_VIOLATION: another process has the file open
+WINDOWS_TRANSIENT_ERRORS = {32, 33}
+
+# Seconds to wait before each retry of the transient errors
+RETRY_DELAYS = (0.1, 0.5, 2.0)
+
+# Folders queued on the pool per worker by delete_groups
+PENDING_PER_WORKER = 4
+
+
+def classify_error(error):
+    """Return the error class of an OSError, or None if the path is already gone."""
+    if getattr(error, "winerror", None) in WINDOWS_TRANSIENT_ERRORS:
+        return TRANSIENT
+    code = error.errno
+    if code == errno.ENOENT:
+        return None
+    if code in TRANSIENT_ERRNOS:
+        return TRANSIENT
+    if code in PERMISSION_ERRNOS:
+        return PERMISSION
+    if code in BLOCKED_ERRNOS:
+        return BLOCKED
+    return OTHER
+
+
+def open_dir(path, follow=True):
+    """Open a directory for the *at() calls, or return None where unsupported."""
+    if not USE_DIR_FD:
+        return None
+    return os.open(path, _DIR_FLAGS | (0 if follow else _NOFOLLOW))
+
+
+def freed_size(inodes, st):
+    """Return the bytes given back by unlinking ``st``: its size the first
+    time its inode is seen in ``inodes``, 0 for further hard links."""
+    return st.st_size if inodes.add_unlinked(st) else 0
+
+
+class DeleteError:
+    """One path that could not be deleted."""
+
+    __slots__ = ("path", "errno", "message", "kind", "size", "is_dir", "attempts", "replay")
+
+    def __init__(self, path, error, kind, size=None, is_dir=False, replay=None):
+        self.path = path
+        self.errno = error.errno
+        self.message = error.strerror or str(error)
+        self.kind = kind
+        self.size = size
+        self.is_dir = is_dir
+        self.attempts = 1
+        # For a folder that could not be listed: replay(workers, progress)
+        # lists and empties it again as the failed run would have, returning
+        # a DeleteResult. Other errors retry their single unlink or rmdir.
+        self.replay = replay
+
+    @property
+    def retryable(self):
+        return self.kind == TRANSIENT
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "errno": self.errno,
+            "message": self.message,
+            "kind": self.kind,
+            "size": self.size,
+            "is_dir": self.is_dir,
+            "attempts": self.attempts,
+        }
+
+    def __str__(self):
+        return f"{self.path}: {self.message}"
+
+    def __repr__(self):
+        return f"DeleteError({self.path!r}, errno={self.errno}, kind={self.kind!r})"
+
+
+class DeleteResult:
+    """Counts, freed bytes and errors of one deletion run."""
+
+    def __init__(self, title="Deleted"):
+        self.title = title
+        self.files = 0
+        self.dirs = 0
+        self.bytes_freed = 0
+        self.errors = []
+        self.missing = []
+        # Planned files left alone because they changed after planning
+        self.changed = []
+        # Folders left alone on purpose, e.g. the caches of a running browser
+        self.skipped = []
+        self.retried = 0
+        self.cancelled = False
+
+    def add_error(self, path, error, size=None, is_dir=False, replay=None):
+        """Record an OSError; vanished paths are not errors."""
+        kind = classify_error(error)
+        if kind is not None:
+            self.errors.append(DeleteError(path, error, kind, size, is_dir, replay))
+
+    def merge(self, other):
+        """Add the totals of another result to this one."""
+        self.files += other.files
+        self.dirs += other.dirs
+        self.bytes_freed += other.bytes_freed
+        self.errors.extend(other.errors)
+        self.missing.extend(other.missing)
+        self.changed.extend(other.changed)
+        self.skipped.extend(other.skipped)
+        self.retried += other.retried
+        self.cancelled = self.cancelled or other.cancelled
+        return self
+
+    @property
+    def ok(self):
+        return not self.errors and not self.cancelled
+
+    @property
+    def bytes_left(self):
+        """Bytes of the files that could not be deleted, where known."""
+        return sum(error.size or 0 for error in self.errors)
+
+    def error_counts(self):
+        return Counter(error.kind for error in self.errors)
+
+    def summary(self, max_errors=5):
+        """Return a short human-readable report of the run."""
+        title = "Cancelled" if self.cancelled else self.title
+        lines = [
+            f"{title}. Files deleted: {self.files}, folders deleted: {self.dirs}, "
+            f"freed: {human_readable_size(self.bytes_freed)}"
+        ]
+        for path in self.missing:
+            lines.append(f"Not found: {path}")
+        if self.changed:
+            lines.append(f"{len(self.changed)} files changed since planning and were kept")
+        for path in self.skipped:
+            lines.append(f"Skipped, in use: {path}")
+        if self.errors:
+            counts = ", ".join(f"{count} {kind}" for kind, count in sorted(self.error_counts().items()))
+            lines.append(
+                f"{len(self.errors)} items could not be deleted ({counts}), "
+                f"{human_readable_size(self.bytes_left)} left:"
+            )
+            for error in self.errors[:max_errors]:
+                lines.append(f"  {error}")
+            if len(self.errors) > max_errors:
+                lines.append(f"  ... and {len(self.errors) - max_errors} more")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "title": self.title,
+            "files": self.files,
+            "dirs": self.dirs,
+            "bytes_freed": self.bytes_freed,
+            "retried": self.retried,
+            "cancelled": self.cancelled,
+            "missing": list(self.missing),
+            "changed": list(self.changed),
+            "skipped": list(self.skipped),
+            "errors": [error.to_dict() for error in self.errors],
+        }
+
+    def __str__(self):
+        return self.summary()
+
+    def __repr__(self):
+        return (
+            f"DeleteResult(files={self.files}, dirs={self.dirs}, "
+            f"bytes_freed={self.bytes_freed}, errors={len(self.errors)})"
+        )
+
+
+class _DirTask:
+    """Outcome of unlinking the files of one directory."""
+
+    def __init__(self):
+        self.result = DeleteResult()
+        self.subdirs = []
+
+
+def _unlink_files(path, inodes, progress, follow_root):
+    """Unlink every non-directory entry of ``path`` and list its subdirectories."""
+    task = _DirTask()
+    result = task.result
+    fd = None
+    try:
+        if USE_DIR_FD:
+            # Subdirectories must not be swapped for symlinks behind our back
+            fd = os.open(path, _DIR_FLAGS | (0 if follow_root else _NOFOLLOW))
+            listing = os.scandir(fd)
+        else:
+            listing = os.scandir(path)
+    except OSError as e:
+        result.add_error(path, e, is_dir=True, replay=partial(_relist, path, follow_root))
+        return task
+
+    tally = metrics.Tally() if metrics.ENABLED else None
+    throttle = progress.throttle if progress is not None else None
+    timed = tally is not None or throttle is not None
+    if timed:
+        listed = time.perf_counter()
+        stat_seconds = unlink_seconds = waited = 0.0
+    try:
+        with listing as it:
+            for entry in it:
+                if progress is not None and progress.cancelled:
+                    result.cancelled = True
+                    break
+                entry_path = os.path.join(path, entry.name)
+                st = None
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        task.subdirs.append(entry_path)
+                        continue
+                    if timed:
+                        started = time.perf_counter()
+                        st = entry.stat(follow_symlinks=False)
+                        stopped = time.perf_counter()
+                        stat_seconds += stopped - started
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                    if fd is not None:
+                        os.unlink(entry.name, dir_fd=fd)
+                    else:
+                        os.unlink(entry_path)
+                    if timed:
+                        took = time.perf_counter() - stopped
+                        unlink_seconds += took
+                except OSError as e:
+                    result.add_error(entry_path, e, size=st.st_size if st else None)
+                    continue
+                result.files += 1
+                result.bytes_freed += freed_size(inodes, st)
+                if throttle is not None:
+                    waited += throttle.charge(1, st.st_size, took)
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+    if tally is not None:
+        calls = result.files + len(result.errors)
+        tally.add(metrics.LIST, time.perf_counter() - listed - stat_seconds - unlink_seconds - waited)
+        tally.add(metrics.STAT, stat_seconds, calls)
+        tally.add(metrics.UNLINK, unlink_seconds, result.files)
+        if waited:
+            tally.add(metrics.THROTTLE, waited)
+        tally.count("dirs_listed")
+        tally.count("errors", len(result.errors))
+        tally.flush()
+    if progress is not None:
+        progress.add(result.files, result.bytes_freed, path)
+    return task
+
+
+def _remove_dirs(parent, names, progress=None):
+    """Remove empty subdirectories of one parent directory."""
+    result = DeleteResult()
+    fd = None
+    started = time.perf_counter() if metrics.ENABLED else None
+    throttle = progress.throttle if progress is not None else None
+    waited = 0.0
+    try:
+        if USE_DIR_FD:
+            fd = os.open(parent, _DIR_FLAGS)
+        for name in names:
+            if throttle is not None:
+                removing = time.perf_counter()
+            try:
+                if fd is not None:
+                    os.rmdir(name, dir_fd=fd)
+                else:
+                    os.rmdir(os.path.join(parent, name))
+            except OSError as e:
+                result.add_error(os.path.join(parent, name), e, is_dir=True)
+                continue
+            result.dirs += 1
+            if throttle is not None:
+                waited += throttle.charge(1, 0, time.perf_counter() - removing)
+    except OSError as e:
+        for name in names:
+            result.add_error(os.path.join(parent, name), e, is_dir=True)
+    finally:
+        if fd is not None:
+            os.close(fd)
+    if started is not None:
+        metrics.record(metrics.RMDIR, time.perf_counter() - started - waited, len(names))
+        if waited:
+            metrics.record(metrics.THROTTLE, waited)
+    return result
+
+
+def _delete_tree(root, workers, progress, remove_root, follow_root=True):
+    """Single parallel pass over one directory tree, without retries."""
+    return _delete_trees([root], workers, progress, remove_root, follow_root)
+
+
+def _relist(path, follow, workers, progress):
+    """Empty a folder that could not be listed; the folder itself is left
+    to the rmdir that failed behind it, retried once it is empty."""
+    return _delete_tree(path, workers, progress, False, follow)
+
+
+def _delete_trees(roots, workers, progress, remove_root, follow_root=True):
+    """Single parallel pass over several directory trees sharing one pool, without retries."""
+    result = DeleteResult()
+    inodes = InodeSet()
+    # Every directory found, grouped by depth below its root for the bottom-up pass
+    levels = defaultdict(list)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_unlink_files, root, inodes, progress, follow_root): 0 for root in roots}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                task = future.result()
+                result.merge(task.result)
+                if result.cancelled:
+                    continue
+                for subdir in task.subdirs:
+                    levels[depth + 1].append(subdir)
+                    pending[pool.submit(_unlink_files, subdir, inodes, progress, False)] = depth + 1
+
+        if result.cancelled:
+            return result
+
+        for depth in sorted(levels, reverse=True):
+            by_parent = defaultdict(list)
+            for path in levels[depth]:
+                parent, name = os.path.split(path)
+                by_parent[parent].append(name)
+            futures = [pool.submit(_remove_dirs, parent, names, progress) for parent, names in by_parent.items()]
+            for future in futures:
+                result.merge(future.result())
+
+    if remove_root:
+        for root in roots:
+            try:
+                os.rmdir(root)
+            except OSError as e:
+                result.add_error(root, e, is_dir=True)
+            else:
+                result.dirs += 1
+    return result
+
+
+def _unlink_one(path):
+    """Delete a single file or symlink, returning a DeleteResult."""
+    result = DeleteResult()
+    try:
+        st = os.lstat(path)
+    except OSError as e:
+        result.add_error(path, e)
+        return result
+    try:
+        os.unlink(path)
+    except OSError as e:
+        result.add_error(path, e, size=st.st_size)
+    else:
+        result.files += 1
+        result.bytes_freed += st.st_size
+    return result
+
+
+def remove_empty_dirs(paths, result=None):
+    """Remove directories that are empty, deepest first, into ``result``.
+
+    Directories that still hold entries are left alone without an error.
+    """
+    result = result or DeleteResult()
+    paths = sorted(paths, key=lambda p: p.count(os.sep), reverse=True)
+    with metrics.timer(metrics.RMDIR):
+        for path in paths:
+            try:
+                os.rmdir(path)
+            except OSError as e:
+                if classify_error(e) != BLOCKED:
+                    result.add_error(path, e, is_dir=True)
+            else:
+                result.dirs += 1
+    return result
+
+
+def retry_errors(result, workers=None, progress=None, delays=RETRY_DELAYS):
+    """Retry the transient errors of ``result`` with backoff, in place.
+
+    Each retry repeats only the operation that failed: one unlink, one
+    rmdir, or the listing of a folder, with the filters of the run that
+    listed it. Directories left non-empty by a failure are removed again,
+    deepest first, once their blocking entries are gone.
+    """
+    if not any(error.retryable or error.kind == BLOCKED for error in result.errors):
+        return result
+
+    for delay in delays:
+        retry = [error for error in result.errors if error.retryable]
+        if not retry or (progress is not None and progress.cancelled):
+            break
+        time.sleep(delay)
+        result.errors = [error for error in result.errors if not error.retryable]
+        if metrics.ENABLED:
+            metrics.count("retries", len(retry))
+        for error in retry:
+            result.retried += 1
+            if error.replay is not None:
+                attempt = error.replay(workers or default_workers(), progress)
+            elif error.is_dir:
+                parent, name = os.path.split(error.path)
+                attempt = _remove_dirs(parent, [name], progress)
+            else:
+                attempt = _unlink_one(error.path)
+            for new_error in attempt.errors:
+                if new_error.path == error.path:
+                    new_error.attempts = error.attempts + 1
+            result.merge(attempt)
+
+    blocked = sorted(
+        (error for error in result.errors if error.kind == BLOCKED),
+        key=lambda error: error.path.count(os.sep),
+        reverse=True,
+    )
+    if blocked:
+        result.errors = [error for error in result.errors if error.kind != BLOCKED]
+        causes = [error.path for error in result.errors]
+        for error in blocked:
+            try:
+                os.rmdir(error.path)
+            except OSError as e:
+                # A folder kept by an entry already reported is not a new error
+                prefix = error.path + os.sep
+                if not any(path.startswith(prefix) for path in causes):
+                    result.add_error(error.path, e, is_dir=True)
+            else:
+                result.dirs += 1
+    return result
+
+
+def delete_contents(root, max_workers=None, progress=None, remove_root=False, title="Deleted"):
+    """Delete everything inside ``root`` and return a DeleteResult.
+
+    ``root`` itself is kept unless ``remove_root`` is set. Symlinks are
+    removed, never followed; a symlinked ``root`` that is to be kept is left
+    alone and listed in ``skipped``. Errors do not stop the run.
+    """
+    if os.path.islink(root) and not remove_root:
+        result = DeleteResult(title)
+        result.skipped.append(root)
+        return result
+    if os.path.islink(root) or not os.path.isdir(root):
+        # A single file or link: nothing to walk
+        result = _unlink_one(root)
+        result.title = title
+        return result
+
+    workers = max_workers or default_workers()
+    result = _delete_tree(root, workers, progress, remove_root)
+    result.title = title
+    return retry_errors(result, workers, progress)
+
+
+def delete_folders(paths, max_workers=None, progress=None, title="Deleted"):
+    """Delete several folders (or files) completely, in one parallel pass.
+
+    All folders share one worker pool, so many small folders are removed
+    as fast as one large one. Missing paths are listed in ``missing``.
+    """
+    result = DeleteResult(title)
+    roots = []
+    for path in paths:
+        if os.path.islink(path) or os.path.isfile(path):
+            result.merge(_unlink_one(path))
+        elif os.path.isdir(path):
+            roots.append(path)
+        else:
+            result.missing.append(path)
+    workers = max_workers or default_workers()
+    if roots:
+        result.merge(_delete_trees(roots, workers, progress, True))
+    return retry_errors(result, workers, progress)
+
+
+def file_identity(st):
+    """Return what must not change between planning and deleting a file."""
+    return st.st_dev, st.st_ino, st.st_mtime_ns
+
+
+def _unlink_group(parent, names, identities, inodes, progress):
+    """Unlink ``names`` in ``parent``, keeping those whose identity changed."""
+    group = DeleteResult()
+    fd = None
+    started = time.perf_counter() if metrics.ENABLED else None
+    throttle = progress.throttle if progress is not None else None
+    waited = 0.0
+    try:
+        if USE_DIR_FD:
+            fd = os.open(parent, _DIR_FLAGS)
+        for i, name in enumerate(names):
+            if progress is not None and progress.cancelled:
+                group.cancelled = True
+                break
+            path = os.path.join(parent, name)
+            st = None
+            try:
+                if fd is not None:
+                    st = os.stat(name, dir_fd=fd, follow_symlinks=False)
+                else:
+                    st = os.lstat(path)
+                if identities is not None and file_identity(st) != identities[i]:
+                    group.changed.append(path)
+                    continue
+                if throttle is not None:
+                    unlinking = time.perf_counter()
+                if fd is not None:
+                    os.unlink(name, dir_fd=fd)
+                else:
+                    os.unlink(path)
+            except OSError as e:
+                group.add_error(path, e, size=st.st_size if st else None)
+                continue
+            group.files += 1
+            freed = freed_size(inodes, st)
+            group.bytes_freed += freed
+            if progress is not None:
+                progress.add(1, freed, path)
+            if throttle is not None:
+                waited += throttle.charge(1, st.st_size, time.perf_counter() - unlinking)
+    except OSError as e:
+        for name in names:
+            group.add_error(os.path.join(parent, name), e)
+    finally:
+        if fd is not None:
+            os.close(fd)
+    if started is not None:
+        # stat and unlink of each file, timed as one batch per folder
+        metrics.record(metrics.UNLINK, time.perf_counter() - started - waited, group.files)
+        if waited:
+            metrics.record(metrics.THROTTLE, waited)
+    return group
+
+
+def delete_files(paths, max_workers=None, progress=None, title="Deleted", expected=None):
+    """Delete individual files or symlinks, grouped by parent directory.
+
+    With ``expected`` (path -> file_identity) a file whose identity differs
+    is kept and listed in ``changed`` instead.
+    """
+    by_parent = defaultdict(list)
+    for path in paths:
+        parent, name = os.path.split(path)
+        by_parent[parent].append(name)
+    groups = (
+        (parent, names, None if expected is None else [expected[os.path.join(parent, name)] for name in names])
+        for parent, names in by_parent.items()
+    )
+    return delete_groups(groups, max_workers, progress, title)
+
+
+def delete_groups(groups, max_workers=None, progress=None, title="Deleted"):
+    """Delete files one folder at a time from (folder, names, identities) groups.
+
+    ``identities`` is None, or lists the file_identity each of ``names``
+    must still have; a file whose identity differs is kept and listed in
+    ``changed``. At most PENDING_PER_WORKER folders per worker are queued,
+    so ``groups`` can be a generator that is never held in full.
+    """
+    inodes = InodeSet()
+    result = DeleteResult(title)
+    workers = max_workers or default_workers()
+    limit = workers * PENDING_PER_WORKER
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for parent, names, identities in groups:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result.merge(future.result())
+            pending.add(pool.submit(_unlink_group, parent, names, identities, inodes, progress))
+        for future in pending:
+            result.merge(future.result())
+    return retry_errors(result, workers, progress)
@@ -0,0 +1,205 @@
+"""Dialogs shared by the macOS and Windows windows."""
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import (
+    QAbstractItemView, QComboBox, QDialog, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QListView, QMessageBox,
+    QPushButton, QTableView, QVBoxLayout
+)
+
+from models import NAME_ROLE, PATH_ROLE, SIZE_ROLE, AppFolderModel, OrphanModel, folder_filter, sortable
+from pipeline import iter_app_folders
+from size_engine import folder_size, human_readable_size
+from workers import FolderSizeWorker, StreamWorker
+
+SORT_KEYS = (
+    ("Name", NAME_ROLE, Qt.AscendingOrder),
+    ("Size", SIZE_ROLE, Qt.DescendingOrder),
+)
+
+
+class AppFolderDialog(QDialog):
+    """Lists the folders of an app data directory with their sizes.
+
+    The list streams in while the directory is read and sizes are measured
+    in the background, the rows on screen first. ``folder_selected`` is
+    emitted with the path of a clicked folder. With ``multi_select`` any
+    number of folders can be selected instead; their combined size is shown
+    and ``delete_requested`` carries their paths once the user confirmed.
+    """
+
+    folder_selected = pyqtSignal(str)
+    delete_requested = pyqtSignal(list)
+    empty = pyqtSignal()
+
+    def __init__(self, base_dir, parent=None, index=None, multi_select=False):
+        super().__init__(parent)
+        self.setWindowTitle("Select Folders to Delete" if multi_select else "Select Folder to Delete")
+        self.setMinimumSize(300, 400)
+        self.base_dir = base_dir
+
+        self.model = AppFolderModel(self)
+        self.proxy = folder_filter(self.model, self)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter")
+        self.filter_edit.textChanged.connect(self.proxy.setFilterFixedString)
+
+        self.sort_combo = QComboBox()
+        self.sort_combo.addItems([label for label, role, order in SORT_KEYS])
+        self.sort_combo.currentIndexChanged.connect(self.sort)
+
+        self.view = QListView()
+        self.view.setModel(self.proxy)
+        self.view.setUniformItemSizes(True)
+
+        controls = QHBoxLayout()
+        controls.addWidget(self.filter_edit)
+        controls.addWidget(self.sort_combo)
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.view)
+        if multi_select:
+            self.view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+            self.view.selectionModel().selectionChanged.connect(self.update_selection)
+            # Sizes measured after selecting change the total too
+            self.model.dataChanged.connect(self.update_selection)
+            self.selection_label = QLabel("Select folders with Ctrl/Shift-click")
+            self.delete_button = QPushButton("Delete Selected")
+            self.delete_button.setEnabled(False)
+            self.delete_button.clicked.connect(self.confirm_delete)
+            layout.addWidget(self.selection_label)
+            layout.addWidget(self.delete_button)
+        else:
+            self.view.clicked.connect(
+                lambda index: self.folder_selected.emit(index.data(PATH_ROLE))
+            )
+        self.setLayout(layout)
+        self.sort(0)
+
+        # Coalesce scrolling, filtering and new rows into one size request
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.setInterval(50)
+        self.visible_timer.timeout.connect(self.request_visible)
+        self.view.verticalScrollBar().valueChanged.connect(self.visible_timer.start)
+        self.proxy.rowsInserted.connect(self.visible_timer.start)
+        self.proxy.layoutChanged.connect(self.visible_timer.start)
+        self.proxy.modelReset.connect(self.visible_timer.start)
+
+        self.sizer = FolderSizeWorker(lambda path: folder_size(path, index=index))
+        self.sizer.signals.sized.connect(self.model.set_size)
+
+        self.lister = StreamWorker(iter_app_folders, base_dir)
+        self.lister.signals.items.connect(self.add_folders)
+        self.lister.signals.finished.connect(self.listed)
+        self.lister.start()
+
+    def add_folders(self, entries):
+        self.model.add_folders(entries)
+        self.sizer.request([entry.path for entry in entries])
+
+    def listed(self, count):
+        if not count:
+            self.empty.emit()
+
+    def sort(self, choice):
+        label, role, order = SORT_KEYS[choice]
+        self.proxy.setSortRole(role)
+        self.proxy.sort(0, order)
+
+    def request_visible(self):
+        """Move the folders currently on screen to the front of the size queue."""
+        rows = self.proxy.rowCount()
+        if not rows:
+            return
+        viewport = self.view.viewport().rect()
+        first = self.view.indexAt(viewport.topLeft()).row()
+        last = self.view.indexAt(viewport.bottomLeft()).row()
+        first = max(first, 0)
+        last = rows - 1 if last < 0 else last
+        paths = [self.proxy.index(row, 0).data(PATH_ROLE) for row in range(first, last + 1)]
+        self.sizer.request(paths, urgent=True)
+
+    def selected(self):
+        """Return (path, size or -1) of every selected folder."""
+        return [
+            (index.data(PATH_ROLE), index.data(SIZE_ROLE)) for index in self.view.selectionModel().selectedIndexes()
+        ]
+
+    def combined_size(self, selected):
+        """Return the selection's combined size as text, noting folders not yet measured."""
+        total = human_readable_size(sum(size for path, size in selected if size >= 0))
+        pending = sum(1 for path, size in selected if size < 0)
+        return f"{total} + {pending} still measuring" if pending else total
+
+    def update_selection(self, *_):
+        selected = self.selected()
+        self.delete_button.setEnabled(bool(selected))
+        self.selection_label.setText(
+            f"{len(selected)} folders selected, {self.combined_size(selected)}" if selected else "No folders selected"
+        )
+
+    def confirm_delete(self):
+        selected = self.selected()
+        if not selected:
+            return
+        reply = QMessageBox.question(
+            self, "Confirm Deletion", f"Delete {len(selected)} folders ({self.combined_size(selected)})?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.delete_requested.emit([path for path, size in selected])
+            self.accept()
+
+    def done(self, result):
+        self.lister.cancel()
+        self.sizer.cancel()
+        super().done(result)
+
+    def closeEvent(self, event):
+        self.lister.cancel()
+        self.sizer.cancel()
+        super().closeEvent(event)
+
+
+class OrphanDialog(QDialog):
+    """Ranked leftovers of uninstalled apps; checked rows are deleted together.
+
+    ``delete_requested`` carries the checked paths once the user confirmed.
+    """
+
+    delete_requested = pyqtSignal(list)
+
+    def __init__(self, orphans, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Orphaned App Data")
+        self.setMinimumSize(600, 400)
+
+        self.model = OrphanModel(orphans, self)
+        self.table = QTableView()
+        self.table.setModel(sortable(self.model, self))
+        self.table.setSortingEnabled(True)
+        self.table.verticalHeader().hide()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+        total = sum(orphan.size for orphan in orphans)
+        self.summary_label = QLabel(f"{len(orphans)} likely orphans, {human_readable_size(total)} reclaimable")
+        self.delete_button = QPushButton("Delete Checked")
+        self.delete_button.clicked.connect(self.confirm_delete)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        layout.addWidget(self.delete_button)
+        self.setLayout(layout)
+
+    def confirm_delete(self):
+        checked = self.model.checked()
+        if not checked:
+            return
+        size = human_readable_size(sum(orphan.size for orphan in checked))
+        reply = QMessageBox.question(
+            self, "Confirm Deletion", f"Delete {len(checked)} items ({size})?", QMessageBox.Yes | QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.delete_requested.emit([orphan.path for orphan in checked])
+            self.accept()
@@ -0,0 +1,263 @@
+"""Find identical files across cache targets and reclaim their copies.
+
+Files are narrowed down in three stages so that most are never read:
+
+1. grouped by size, from one walk of the targets;
+2. within a size, by a hash of the first and last block;
+3. within a partial hash, by a hash of the whole file, read through mmap
+   in fixed chunks.
+
+The hashing of stages 2 and 3 runs on a process pool. Hashes are stored in
+the scan index and reused while a file's device, inode, mtime and size are
+unchanged. Copies can then be replaced by hard links to one kept file, or
+deleted.
+"""
+import hashlib
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from deleter import DeleteResult, delete_files, file_identity
+from scan_index import FileHashes
+from target_engine import collect_targets
+
+# Files below this size are not worth the reads
+MIN_SIZE = 64 * 1024
+BLOCK_SIZE = 64 * 1024
+CHUNK_SIZE = 8 * 1024 * 1024
+# Paths per pool task, so small files do not cost one round trip each
+BATCH_SIZE = 32
+
+
+def partial_hash(path, size):
+    """Hash the first and last block of a file."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE:
+            f.seek(max(BLOCK_SIZE, size - BLOCK_SIZE))
+            digest.update(f.read(BLOCK_SIZE))
+    return digest.hexdigest()
+
+
+def full_hash(path):
+    """Hash a whole file through mmap, one chunk at a time."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for start in range(0, len(mapped), CHUNK_SIZE):
+                    digest.update(view[start:start + CHUNK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def _hash_batch(kind, items):
+    """Pool task: return (path, digest or None) for (path, size) items."""
+    hashed = []
+    for path, size in items:
+        try:
+            hashed.append((path, partial_hash(path, size) if kind == "partial" else full_hash(path)))
+        except (OSError, ValueError):
+            hashed.append((path, None))
+    return hashed
+
+
+class DuplicateGroup:
+    """Files with identical contents; ``files`` are Found tuples."""
+
+    __slots__ = ("size", "digest", "files")
+
+    def __init__(self, size, digest, files):
+        self.size = size
+        self.digest = digest
+        self.files = files
+
+    @property
+    def copies(self):
+        """Files beyond the first that use space of their own."""
+        seen = set()
+        copies = []
+        for found in self.files:
+            if (found.dev, found.ino) not in seen:
+                seen.add((found.dev, found.ino))
+                copies.append(found)
+        return copies[1:]
+
+    @property
+    def reclaimable(self):
+        return self.size * len(self.copies)
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "digest": self.digest,
+            "reclaimable": self.reclaimable,
+            "paths": [found.path for found in self.files],
+        }
+
+
+class _Hasher:
+    """Runs one hashing stage on the pool, reusing and refreshing cached hashes."""
+
+    def __init__(self, pool, cached, progress):
+        self.pool = pool
+        self.cached = cached
+        self.fresh = {}
+        self.progress = progress
+
+    def _known(self, found, kind):
+        item = self.fresh.get(found.path) or self.cached.get(found.path)
+        if item is None or (item.dev, item.ino, item.mtime_ns, item.size) != (
+                found.dev, found.ino, found.mtime_ns, found.size):
+            return None
+        return item.partial if kind == "partial" else item.full
+
+    def _remember(self, found, kind, digest):
+        item = self.fresh.get(found.path) or self.cached.get(found.path)
+        if item is None or (item.dev, item.ino, item.mtime_ns, item.size) != (
+                found.dev, found.ino, found.mtime_ns, found.size):
+            item = FileHashes(found.dev, found.ino, found.mtime_ns, found.size, None, None)
+        self.fresh[found.path] = item._replace(**{kind: digest})
+
+    def run(self, kind, files):
+        """Return path -> digest for ``files``; unreadable files are left out."""
+        digests = {}
+        todo = []
+        by_path = {}
+        for found in files:
+            digest = self._known(found, kind)
+            if digest is not None:
+                digests[found.path] = digest
+            else:
+                todo.append((found.path, found.size))
+                by_path[found.path] = found
+        batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+        futures = [self.pool.submit(_hash_batch, kind, batch) for batch in batches]
+        for future in as_completed(futures):
+            if self.progress is not None and self.progress.cancelled:
+                for pending in futures:
+                    pending.cancel()
+                break
+            for path, digest in future.result():
+                if digest is None:
+                    continue
+                digests[path] = digest
+                self._remember(by_path[path], kind, digest)
+                if self.progress is not None:
+                    self.progress.add(1, by_path[path].size, path)
+        return digests
+
+
+def _split(groups, digests):
+    """Regroup each group's files by digest, keeping groups of two or more."""
+    result = []
+    for files in groups:
+        by_digest = {}
+        for found in files:
+            digest = digests.get(found.path)
+            if digest is not None:
+                by_digest.setdefault(digest, []).append(found)
+        result.extend(
+            (digest, same) for digest, same in by_digest.items()
+            if len({(found.dev, found.ino) for found in same}) > 1
+        )
+    return result
+
+
+def find_duplicates(targets, index=None, min_size=MIN_SIZE, max_workers=None, progress=None):
+    """Return the DuplicateGroups among the targets' files, most reclaimable first."""
+    by_size = {}
+    for found in collect_targets(targets, progress=progress):
+        if found.size >= min_size:
+            by_size.setdefault(found.size, []).append(found)
+    candidates = [
+        files for files in by_size.values() if len({(found.dev, found.ino) for found in files}) > 1
+    ]
+    if not candidates or (progress is not None and progress.cancelled):
+        return []
+
+    cached = {}
+    if index is not None:
+        for target in targets:
+            if target.path:
+                cached.update(index.load_hashes(target.path))
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        hasher = _Hasher(pool, cached, progress)
+        partial = hasher.run("partial", [found for files in candidates for found in files])
+        candidates = [files for digest, files in _split(candidates, partial)]
+        full = hasher.run("full", [found for files in candidates for found in files])
+        groups = [DuplicateGroup(files[0].size, digest, files) for digest, files in _split(candidates, full)]
+
+    if index is not None and hasher.fresh:
+        index.store_hashes(hasher.fresh)
+    if progress is not None and progress.cancelled:
+        return []
+    groups.sort(key=lambda group: group.reclaimable, reverse=True)
+    return groups
+
+
+def _replace_with_link(keep, found):
+    """Atomically swap ``found`` for a hard link to ``keep``.
+
+    Returns False, changing nothing, if either file differs from when it
+    was hashed. The link is made under a temporary name and checked before
+    it replaces ``found``, so a ``keep`` swapped in between is never linked.
+    """
+    expected = (keep.dev, keep.ino, keep.mtime_ns)
+    if file_identity(os.lstat(keep.path)) != expected:
+        return False
+    if file_identity(os.lstat(found.path)) != (found.dev, found.ino, found.mtime_ns):
+        return False
+    temp = f"{found.path}.dedup-{os.getpid()}"
+    os.link(keep.path, temp, follow_symlinks=False)
+    try:
+        if file_identity(os.lstat(temp)) != expected:
+            os.unlink(temp)
+            return False
+        os.replace(temp, found.path)
+    except OSError:
+        os.unlink(temp)
+        raise
+    return True
+
+
+def link_duplicates(groups, progress=None):
+    """Replace every copy by a hard link to the first file of its group.
+
+    Copies on another device than the kept file, and files changed since
+    they were hashed, are left alone.
+    """
+    result = DeleteResult("Duplicates linked")
+    for group in groups:
+        keep = group.files[0]
+        for found in group.copies:
+            if progress is not None and progress.cancelled:
+                result.cancelled = True
+                return result
+            if found.dev != keep.dev:
+                continue
+            try:
+                linked = _replace_with_link(keep, found)
+            except OSError as e:
+                result.add_error(found.path, e, size=found.size)
+                continue
+            if not linked:
+                result.changed.append(found.path)
+                continue
+            result.files += 1
+            result.bytes_freed += found.size
+            if progress is not None:
+                progress.add(1, found.size, found.path)
+    return result
+
+
+def delete_duplicates(groups, progress=None):
+    """Delete every copy, keeping the first file of each group."""
+    expected = {
+        found.path: (found.dev, found.ino, found.mtime_ns) for group in groups for found in group.copies
+    }
+    return delete_files(list(expected), progress=progress, title="Duplicates deleted", expected=expected)
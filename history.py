@@ -0,0 +1,167 @@
+"""Time series of cache sizes and cleanup runs, with growth trends.
+
+Every scan of a target and every scheduled cleanup adds one sample per
+target: when it was taken, the size found, the bytes and items removed, the
+errors and how long it took. Samples are small integer rows in an SQLite
+table keyed by (target, time), so years of hourly runs take a few MB;
+samples older than RETENTION_DAYS are dropped as new ones come in.
+
+The growth rate of a target is the bytes it gained between one sample's
+size after cleanup and the next sample's size, summed over the samples of
+the last GROWTH_WINDOW_DAYS and divided by the time covered. Drops between
+samples (a cache emptied by its app) count as no growth. From the rate and
+the last size follows the time the target reaches its policy budget.
+"""
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from app_paths import app_data_dir
+
+HISTORY_FILE = "history.sqlite3"
+
+RETENTION_DAYS = 400
+GROWTH_WINDOW_DAYS = 30
+
+SCHEMA_VERSION = 1
+
+# Seconds to wait for a lock held by another process, e.g. the GUI and a
+# `cachemgr schedule` daemon writing at the same time
+BUSY_TIMEOUT = 10.0
+
+# size is measured before the run; freed is 0 for a plain scan
+Sample = namedtuple("Sample", "time size freed items errors duration")
+
+# rate in bytes per day (None without two samples); full_at is a timestamp,
+# None if the target has no budget or is not growing
+Trend = namedtuple("Trend", "target size rate budget full_at samples")
+
+
+def default_history_path():
+    return os.path.join(app_data_dir(), HISTORY_FILE)
+
+
+class HistoryStore:
+    """SQLite-backed samples of target sizes and cleanup results."""
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        self._target_ids = {}
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("CREATE TABLE IF NOT EXISTS targets (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+            # Seconds and milliseconds as integers keep the rows small
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                " target INTEGER, time INTEGER, size INTEGER, freed INTEGER, items INTEGER,"
+                " errors INTEGER, duration_ms INTEGER, PRIMARY KEY (target, time)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS schedules (name TEXT PRIMARY KEY, last_run INTEGER)")
+
+    @contextmanager
+    def _connect(self):
+        # A fresh connection per call keeps the store usable from any thread;
+        # it is committed (or rolled back) and closed when the block ends
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _target_id(self, conn, name):
+        target_id = self._target_ids.get(name)
+        if target_id is None:
+            conn.execute("INSERT OR IGNORE INTO targets (name) VALUES (?)", (name,))
+            target_id = conn.execute("SELECT id FROM targets WHERE name = ?", (name,)).fetchone()[0]
+            self._target_ids[name] = target_id
+        return target_id
+
+    def record(self, samples, when=None):
+        """Add one sample per target from name -> Sample (its time may be None).
+
+        Samples are stored with ``when`` (default: now) unless they carry
+        their own time.
+        """
+        when = int(when if when is not None else time.time())
+        with self._connect() as conn:
+            rows = [
+                (
+                    self._target_id(conn, name), int(sample.time or when), sample.size, sample.freed,
+                    sample.items, sample.errors, int(sample.duration * 1000),
+                )
+                for name, sample in samples.items()
+            ]
+            conn.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.execute("DELETE FROM samples WHERE time < ?", (when - RETENTION_DAYS * 86400,))
+
+    def record_scan(self, totals, when=None):
+        """Add a size sample for every complete FolderTotal of a scan."""
+        self.record({
+            name: Sample(None, total.size, 0, 0, total.errors, 0.0)
+            for name, total in totals.items() if total.exists and not total.cancelled
+        }, when)
+
+    def series(self, name, since=None):
+        """Return the samples of a target, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT s.time, s.size, s.freed, s.items, s.errors, s.duration_ms FROM samples s"
+                " JOIN targets t ON t.id = s.target WHERE t.name = ? AND s.time >= ? ORDER BY s.time",
+                (name, int(since or 0)),
+            ).fetchall()
+        return [Sample(t, size, freed, items, errors, ms / 1000) for t, size, freed, items, errors, ms in rows]
+
+    def names(self):
+        """Return the names of the targets with samples."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name FROM targets WHERE id IN (SELECT DISTINCT target FROM samples) ORDER BY name"
+            )
+            return [name for (name,) in rows]
+
+    def last_run(self, schedule):
+        """Return the time a schedule last ran, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_run FROM schedules WHERE name = ?", (schedule,)).fetchone()
+        return row[0] if row else None
+
+    def set_last_run(self, schedule, when=None):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO schedules VALUES (?, ?)", (schedule, int(when or time.time()))
+            )
+
+    def trend(self, name, budget=None, now=None):
+        """Return the Trend of a target over the last GROWTH_WINDOW_DAYS."""
+        now = now or time.time()
+        samples = self.series(name, now - GROWTH_WINDOW_DAYS * 86400)
+        return trend_of(name, samples, budget)
+
+
+def growth_rate(samples):
+    """Return bytes gained per day over the samples, or None with fewer than two."""
+    if len(samples) < 2:
+        return None
+    gained = 0
+    elapsed = 0
+    for previous, sample in zip(samples, samples[1:]):
+        gained += max(0, sample.size - (previous.size - previous.freed))
+        elapsed += sample.time - previous.time
+    return gained * 86400 / elapsed if elapsed > 0 else None
+
+
+def trend_of(name, samples, budget=None):
+    """Return the Trend of a target from its samples, oldest first."""
+    if not samples:
+        return Trend(name, None, None, budget, None, 0)
+    last = samples[-1]
+    size = last.size - last.freed
+    rate = growth_rate(samples)
+    full_at = None
+    if budget and rate:
+        full_at = last.time if size >= budget else last.time + (budget - size) * 86400 / rate
+    return Trend(name, size, rate, budget, full_at, len(samples))
@@ -0,0 +1,206 @@
+"""Counters and timers for the scan, plan and delete hot paths.
+
+Off by default. Engines check ``metrics.ENABLED`` once per directory and
+only then time their listing, stat, unlink and rmdir calls, adding the
+totals here once per directory rather than per file, so a disabled run pays
+one attribute lookup per folder.
+
+Every value is kept per phase, per target and per worker thread, and can be
+exported as JSON or in the Prometheus text format. Turned on with the
+command line's --metrics, CACHEMGR_METRICS=1 or the GUI's Diagnostics tab.
+"""
+import json
+import os
+import threading
+import time
+
+ENABLED = bool(os.getenv("CACHEMGR_METRICS"))
+
+# Phases timed by the engines
+LIST = "list"
+STAT = "stat"
+UNLINK = "unlink"
+RMDIR = "rmdir"
+INDEX = "index"
+UI = "ui"
+# Time spent waiting on a background-mode throttle
+THROTTLE = "throttle"
+
+_lock = threading.Lock()
+# (phase, target, worker) -> [calls, seconds, longest call or batch]
+_timers = {}
+# (name, target, worker) -> value
+_counters = {}
+_started = time.time()
+
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+
+def reset():
+    global _started
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+        _started = time.time()
+
+
+def _worker():
+    return threading.current_thread().name
+
+
+def record(phase, seconds, calls=1, target=None):
+    """Add ``calls`` calls taking ``seconds`` in total to a phase."""
+    key = (phase, target or "", _worker())
+    with _lock:
+        timer = _timers.get(key)
+        if timer is None:
+            _timers[key] = [calls, seconds, seconds]
+        else:
+            timer[0] += calls
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+
+def count(name, value=1, target=None):
+    key = (name, target or "", _worker())
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+class _Timer:
+    __slots__ = ("phase", "target", "started")
+
+    def __init__(self, phase, target):
+        self.phase = phase
+        self.target = target
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.phase, time.perf_counter() - self.started, 1, self.target)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(phase, target=None):
+    """Context manager timing one block into ``phase``; free when disabled."""
+    return _Timer(phase, target) if ENABLED else _NULL_TIMER
+
+
+class Tally:
+    """Per-directory accumulator flushed into the shared totals in one go.
+
+    Engines create one only when ENABLED, time calls into it and call
+    ``flush`` at the end of the directory.
+    """
+
+    __slots__ = ("target", "calls", "seconds", "counts")
+
+    def __init__(self, target=None):
+        self.target = target
+        self.calls = {}
+        self.seconds = {}
+        self.counts = {}
+
+    def add(self, phase, seconds, calls=1):
+        self.calls[phase] = self.calls.get(phase, 0) + calls
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+
+    def count(self, name, value=1):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def flush(self, target=None):
+        target = target or self.target
+        for phase, calls in self.calls.items():
+            record(phase, self.seconds[phase], calls, target)
+        for name, value in self.counts.items():
+            count(name, value, target)
+        self.calls = {}
+        self.seconds = {}
+        self.counts = {}
+
+
+def snapshot():
+    """Return every timer and counter as a JSON-ready dict."""
+    with _lock:
+        timers = [
+            {"phase": phase, "target": target, "worker": worker, "calls": calls,
+             "seconds": seconds, "max_seconds": longest}
+            for (phase, target, worker), (calls, seconds, longest) in sorted(_timers.items())
+        ]
+        counters = [
+            {"name": name, "target": target, "worker": worker, "value": value}
+            for (name, target, worker), value in sorted(_counters.items())
+        ]
+    return {"started": _started, "exported": time.time(), "timers": timers, "counters": counters}
+
+
+def summary():
+    """Return phase -> (calls, seconds) summed over targets and workers."""
+    totals = {}
+    with _lock:
+        for (phase, target, worker), (calls, seconds, longest) in _timers.items():
+            total = totals.setdefault(phase, [0, 0.0])
+            total[0] += calls
+            total[1] += seconds
+    return {phase: tuple(total) for phase, total in totals.items()}
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{key}="{escape(value)}"' for key, value in labels.items())
+
+
+def to_prometheus(prefix="cachemgr"):
+    """Return the metrics in the Prometheus text exposition format."""
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_phase_calls_total Calls made per phase.",
+        f"# TYPE {prefix}_phase_calls_total counter",
+    ]
+    for item in data["timers"]:
+        labels = _labels(phase=item["phase"], target=item["target"], worker=item["worker"])
+        lines.append(f"{prefix}_phase_calls_total{{{labels}}} {item['calls']}")
+    lines += [
+        f"# HELP {prefix}_phase_seconds_total Seconds spent per phase.",
+        f"# TYPE {prefix}_phase_seconds_total counter",
+    ]
+    for item in data["timers"]:
+        labels = _labels(phase=item["phase"], target=item["target"], worker=item["worker"])
+        lines.append(f"{prefix}_phase_seconds_total{{{labels}}} {item['seconds']:.6f}")
+    names = sorted({item["name"] for item in data["counters"]})
+    for name in names:
+        lines += [f"# TYPE {prefix}_{name}_total counter"]
+        for item in data["counters"]:
+            if item["name"] == name:
+                labels = _labels(target=item["target"], worker=item["worker"])
+                lines.append(f"{prefix}_{name}_total{{{labels}}} {item['value']}")
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Write the metrics to ``path``: Prometheus text for .prom or .txt, JSON otherwise."""
+    if path.endswith((".prom", ".txt")):
+        text = to_prometheus()
+    else:
+        text = json.dumps(snapshot(), indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
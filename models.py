@@ -0,0 +1,203 @@
+"""Qt item models backing the GUI's tables and lists."""
+from PyQt5.QtCore import QAbstractListModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+from size_engine import human_readable_size
+
+# Role holding the raw value a column sorts by
+SORT_ROLE = Qt.UserRole
+
+# Roles of AppFolderModel rows
+NAME_ROLE = Qt.UserRole + 1
+SIZE_ROLE = Qt.UserRole + 2
+PATH_ROLE = Qt.UserRole + 3
+
+
+class LargestEntriesModel(QAbstractTableModel):
+    """The largest folders and files of each scanned target.
+
+    Rows are (target label, kind, size, path) tuples, replaced wholesale by
+    ``set_largest`` whenever the scan publishes a new top list.
+    """
+
+    HEADERS = ("Size", "Kind", "Target", "Path")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        label, kind, size, path = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return (human_readable_size(size), kind, label, path)[column]
+        if role == SORT_ROLE:
+            return (size, kind, label, path)[column]
+        if role == Qt.ToolTipRole:
+            return path
+        if role == Qt.TextAlignmentRole and column == 0:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def set_largest(self, largest, labels):
+        """Show ``largest`` (name -> (dirs, files) as from scan_targets)."""
+        rows = []
+        for name, (dirs, files) in largest.items():
+            label = labels.get(name, name)
+            rows.extend((label, "Folder", size, path) for size, path in dirs)
+            rows.extend((label, "File", size, path) for size, path in files)
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._rows = []
+        self.endResetModel()
+
+
+def sortable(model, parent=None):
+    """Wrap a model in a proxy that sorts by the raw SORT_ROLE values."""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    return proxy
+
+
+class AppFolderModel(QAbstractListModel):
+    """Per-app folders with sizes that arrive later, one by one.
+
+    Rows are appended as the folder listing streams in; ``set_size`` fills
+    in a size once it has been measured. An unmeasured size is -1 under
+    SIZE_ROLE, so it sorts below every measured folder.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._row_of = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name, path, size = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{name}  ({human_readable_size(size) if size is not None else '...'})"
+        if role == NAME_ROLE:
+            return name
+        if role == SIZE_ROLE:
+            return -1 if size is None else size
+        if role in (PATH_ROLE, Qt.ToolTipRole):
+            return path
+        return None
+
+    def add_folders(self, entries):
+        """Append pipeline entries (anything with ``name`` and ``path``)."""
+        if not entries:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for entry in entries:
+            self._row_of[entry.path] = len(self._rows)
+            self._rows.append([entry.name, entry.path, None])
+        self.endInsertRows()
+
+    def set_size(self, path, size):
+        row = self._row_of.get(path)
+        if row is None:
+            return
+        self._rows[row][2] = size
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, SIZE_ROLE])
+
+    def paths(self):
+        return [path for name, path, size in self._rows]
+
+
+def folder_filter(model, parent=None):
+    """Wrap an AppFolderModel in a proxy filtering and sorting by name or size."""
+    proxy = QSortFilterProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setFilterRole(NAME_ROLE)
+    proxy.setFilterCaseSensitivity(Qt.CaseInsensitive)
+    proxy.setSortCaseSensitivity(Qt.CaseInsensitive)
+    proxy.setSortRole(NAME_ROLE)
+    return proxy
+
+
+class OrphanModel(QAbstractTableModel):
+    """Likely orphaned app data, each row checkable for a batch delete."""
+
+    HEADERS = ("Name", "Kind", "Size", "Orphan", "Reason", "Closest app")
+
+    def __init__(self, orphans, parent=None):
+        super().__init__(parent)
+        self._orphans = list(orphans)
+        self._checked = set()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._orphans)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 0:
+            flags |= Qt.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        orphan = self._orphans[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return (
+                orphan.name, orphan.kind, human_readable_size(orphan.size),
+                f"{orphan.score:.0%}", orphan.reason, orphan.closest or "",
+            )[column]
+        if role == SORT_ROLE:
+            return (
+                orphan.name.lower(), orphan.kind, orphan.size, orphan.score, orphan.reason, orphan.closest or "",
+            )[column]
+        if role == Qt.CheckStateRole and column == 0:
+            return Qt.Checked if orphan.path in self._checked else Qt.Unchecked
+        if role == Qt.ToolTipRole:
+            return orphan.path
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or index.column() != 0:
+            return False
+        path = self._orphans[index.row()].path
+        if value == Qt.Checked:
+            self._checked.add(path)
+        else:
+            self._checked.discard(path)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def checked(self):
+        """Return the checked orphans in display order."""
+        return [orphan for orphan in self._orphans if orphan.path in self._checked]
@@ -0,0 +1,390 @@
+"""Find per-app data folders whose application is no longer installed.
+
+An index of the installed applications (bundle identifiers and names) is
+built from the "app_dirs" folders of cache_targets.json and cached in the
+app data directory; a folder is only read again once its mtime changes.
+Every entry of the "app_data_dirs" folders (Application Support, Caches and
+Preferences on macOS) is then reduced to normalized keys and matched against
+the index, exactly first and fuzzily after.
+
+Matching no installed app is not enough to be reported: many folders belong
+to the OS or the desktop (denied per platform below) or to tools with no
+app entry. An entry is reported only with a sign that its app was removed:
+
+    removed    it matches an app the index listed before and no longer does
+    bundle id  it is named by a reverse-DNS bundle identifier, such as
+               "com.vendor.App", that no installed app declares
+
+Orphans are returned best candidates and biggest first.
+"""
+import difflib
+import json
+import os
+import plistlib
+import re
+import sys
+
+from app_paths import app_data_dir
+from size_engine import scan_sizes
+
+INDEX_FILE = "installed_apps.json"
+INDEX_VERSION = 1
+
+# Similarity from which an entry is taken to belong to an installed app
+MATCH_CUTOFF = 0.8
+# Keys shorter than this match too much by containment
+MIN_CONTAINED = 4
+
+# Reasons an entry is reported
+REMOVED = "removed"
+BUNDLE_ID = "bundle id"
+
+# Folders created by the OS or the desktop rather than by an app
+SYSTEM_PREFIXES = ("com.apple.", "apple", "microsoft", "windows", ".")
+SYSTEM_NAMES = {"temp", "tmp", "cachemanagerapp"}
+# Per sys.platform prefix; names as on disk, lowercased
+PLATFORM_SYSTEM_NAMES = {
+    "darwin": {
+        "addressbook", "callhistorydb", "callhistorytransactions", "clouddocs", "crashreporter",
+        "dock", "icloud", "knowledge", "mobilesync", "syncservices", "homekit", "fileprovider",
+        "accounts", "cloudkit", "familycircle", "geoservices", "identityservices", "keychains",
+    },
+    # freedesktop.org / XDG base directory entries and the desktop's own services
+    "linux": {
+        "applications", "autostart", "desktop-directories", "dconf", "environment.d", "flatpak",
+        "fontconfig", "fonts", "gtk-2.0", "gtk-3.0", "gtk-4.0", "gvfs-metadata", "ibus", "icons",
+        "keyrings", "menus", "mesa_shader_cache", "mime", "mimeapps.list", "pipewire", "pulse",
+        "recently-used.xbel", "session", "sessions", "sounds", "systemd", "themes", "thumbnails",
+        "tracker", "tracker3", "trash", "user-dirs.dirs", "user-dirs.locale", "wireplumber",
+        "xdg-desktop-portal",
+    },
+    "win32": {
+        "application data", "comms", "connecteddevicesplatform", "crashdumps", "d3dscache",
+        "elevateddiagnostics", "history", "packages", "peernetworking", "placeholdertilelogofolder",
+        "programs", "publishers", "virtualstore",
+    },
+}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_STRIP_SUFFIXES = (".plist", ".savedstate", ".desktop", ".app", ".exe")
+# Reverse-DNS identifiers: a short top-level part and at least two more
+_BUNDLE_ID = re.compile(r"[a-z]{2,6}\.[A-Za-z0-9-]+(\.[A-Za-z0-9_-]+)+")
+_ID_NOISE = {
+    "com", "org", "net", "io", "app", "de", "co", "uk", "www", "inc", "ltd",
+    "helper", "client", "desktop", "agent", "launcher", "updater", "macos", "data", "cache",
+}
+
+
+def normalize(text):
+    """Lowercase and drop everything but letters and digits."""
+    return _NON_ALNUM.sub("", text.lower())
+
+
+def _strip_suffix(name):
+    lowered = name.lower()
+    for suffix in _STRIP_SUFFIXES:
+        if lowered.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def is_bundle_id(name):
+    """True for names such as "com.vendor.App" or "org.vendor.App.plist"."""
+    return _BUNDLE_ID.fullmatch(_strip_suffix(name)) is not None
+
+
+def keys_for(name):
+    """Return the normalized keys a folder or app name can be matched by.
+
+    "com.adobe.Photoshop.plist" gives the full id, "photoshop" and
+    "adobe"; "Google Chrome" gives "googlechrome", "google" and "chrome".
+    """
+    name = _strip_suffix(name)
+    keys = {normalize(name)}
+    for part in re.split(r"[.\s_-]+", name):
+        key = normalize(part)
+        if len(key) >= MIN_CONTAINED and key not in _ID_NOISE and not key.isdigit():
+            keys.add(key)
+    keys.discard("")
+    return keys
+
+
+class InstalledApp:
+    """One installed application and the names it may leave data under."""
+
+    __slots__ = ("name", "bundle_id", "path")
+
+    def __init__(self, name, bundle_id=None, path=None):
+        self.name = name
+        self.bundle_id = bundle_id
+        self.path = path
+
+    def keys(self):
+        keys = keys_for(self.name)
+        if self.bundle_id:
+            keys |= keys_for(self.bundle_id)
+        return keys
+
+    def to_dict(self):
+        return {"name": self.name, "bundle_id": self.bundle_id, "path": self.path}
+
+    def ident(self):
+        return self.name, self.bundle_id
+
+
+def _read_bundle(path):
+    """Return the InstalledApp of a macOS .app bundle."""
+    info = {}
+    try:
+        with open(os.path.join(path, "Contents", "Info.plist"), "rb") as f:
+            info = plistlib.load(f)
+    except (OSError, ValueError, plistlib.InvalidFileException):
+        pass
+    name = info.get("CFBundleDisplayName") or info.get("CFBundleName") or os.path.basename(path)[:-4]
+    return InstalledApp(str(name), info.get("CFBundleIdentifier"), path)
+
+
+def _read_desktop_file(path):
+    """Return the InstalledApp of a freedesktop .desktop entry."""
+    name = None
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("Name="):
+                    name = line[5:].strip()
+                    break
+    except OSError:
+        pass
+    stem = os.path.basename(path)[:-len(".desktop")]
+    return InstalledApp(name or stem, stem, path)
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        # A missing folder is remembered too, so its creation is noticed
+        return None
+
+
+def _list_apps(app_dir, containers):
+    """Find the apps in one folder, noting every folder read in ``containers``."""
+    apps = []
+    stack = [(app_dir, 0)]
+    while stack:
+        path, depth = stack.pop()
+        containers[path] = _mtime_ns(path)
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            continue
+        for entry in entries:
+            name = entry.name
+            if name.startswith("."):
+                continue
+            if name.endswith(".app") and entry.is_dir():
+                apps.append(_read_bundle(entry.path))
+            elif name.endswith(".desktop"):
+                apps.append(_read_desktop_file(entry.path))
+            elif entry.is_dir(follow_symlinks=False):
+                if os.name == "nt":
+                    # Program Files holds vendor and product folders, not bundles
+                    apps.append(InstalledApp(name, None, entry.path))
+                # One level down: /Applications/Utilities, vendor folders
+                if depth < 1:
+                    stack.append((entry.path, depth + 1))
+    return apps
+
+
+class AppIndex:
+    """Installed applications, cached per folder and refreshed on mtime change.
+
+    Apps that were listed once and are gone when their folder is read again
+    are kept in ``removed`` until they are installed again.
+    """
+
+    def __init__(self, app_dirs, path=None):
+        self.app_dirs = list(app_dirs)
+        self.path = path or os.path.join(app_data_dir(), INDEX_FILE)
+        self.apps = []
+        self.removed = []
+        # Folders read again this time, for reporting
+        self.refreshed = []
+
+    def _load_cache(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if data.get("version") == INDEX_VERSION else {}
+
+    def _fresh(self, cached):
+        return all(_mtime_ns(path) == mtime_ns for path, mtime_ns in cached["containers"].items())
+
+    def load(self):
+        """Fill ``apps`` from the cache, rereading folders that changed."""
+        cache = self._load_cache()
+        removed = [InstalledApp(**app) for app in cache.get("removed", [])]
+        dirs = {}
+        self.apps = []
+        self.refreshed = []
+        for app_dir in self.app_dirs:
+            cached = cache.get("dirs", {}).get(app_dir)
+            if cached is None or not self._fresh(cached):
+                containers = {}
+                apps = _list_apps(app_dir, containers)
+                if cached is not None:
+                    listed = {app.ident() for app in apps}
+                    gone = (InstalledApp(**app) for app in cached["apps"])
+                    removed.extend(app for app in gone if app.ident() not in listed)
+                cached = {"containers": containers, "apps": [app.to_dict() for app in apps]}
+                self.refreshed.append(app_dir)
+            dirs[app_dir] = cached
+            self.apps.extend(InstalledApp(**app) for app in cached["apps"])
+        installed = {app.ident() for app in self.apps}
+        self.removed = list({app.ident(): app for app in removed if app.ident() not in installed}.values())
+        if self.refreshed:
+            try:
+                with open(self.path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        "version": INDEX_VERSION,
+                        "dirs": dirs,
+                        "removed": [app.to_dict() for app in self.removed],
+                    }, f)
+            except OSError:
+                pass
+        return self
+
+    def keys(self):
+        """Return normalized key -> app name."""
+        keys = {}
+        for app in self.apps:
+            for key in app.keys():
+                keys.setdefault(key, app.name)
+        return keys
+
+    def removed_keys(self):
+        """Return normalized key -> name of the removed apps, without the
+        keys an installed app shares (such as a vendor name)."""
+        installed = self.keys()
+        keys = {}
+        for app in self.removed:
+            for key in app.keys():
+                if key not in installed:
+                    keys.setdefault(key, app.name)
+        return keys
+
+
+class Orphan:
+    """A data folder or file left behind by a removed app."""
+
+    __slots__ = ("path", "name", "kind", "size", "score", "closest", "reason")
+
+    def __init__(self, path, name, kind, size, score, closest, reason=BUNDLE_ID):
+        self.path = path
+        self.name = name
+        self.kind = kind
+        self.size = size
+        # REMOVED: similarity to the removed app; BUNDLE_ID: 1.0 when no
+        # installed app resembles the entry, lower the closer one came
+        self.score = score
+        self.closest = closest
+        self.reason = reason
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "name": self.name,
+            "kind": self.kind,
+            "size": self.size,
+            "score": round(self.score, 3),
+            "closest": self.closest,
+            "reason": self.reason,
+        }
+
+    def __repr__(self):
+        return f"Orphan({self.path!r}, size={self.size}, score={self.score:.2f})"
+
+
+def system_names(platform=None):
+    """Return SYSTEM_NAMES plus the names denied on ``platform`` (default: this one)."""
+    platform = platform or sys.platform
+    names = set(SYSTEM_NAMES)
+    for prefix, extra in PLATFORM_SYSTEM_NAMES.items():
+        if platform.startswith(prefix):
+            names |= extra
+    return names
+
+
+def is_system_entry(name, names=None):
+    names = system_names() if names is None else names
+    lowered = name.lower()
+    return lowered.startswith(SYSTEM_PREFIXES) or normalize(name) in names or lowered in names
+
+
+def _holds_app_dir(path, app_dirs):
+    """True if ``path`` is one of the app folders or contains one."""
+    path = os.path.normcase(os.path.normpath(path))
+    return any(app_dir == path or app_dir.startswith(path + os.sep) for app_dir in app_dirs)
+
+
+def match(name, app_keys, key_list):
+    """Return (similarity, closest app name) of an entry name against the index."""
+    best = (0.0, None)
+    for key in keys_for(name):
+        if key in app_keys:
+            return 1.0, app_keys[key]
+        for app_key in key_list:
+            if len(app_key) >= MIN_CONTAINED and len(key) >= MIN_CONTAINED and (app_key in key or key in app_key):
+                best = max(best, (0.9, app_keys[app_key]), key=lambda item: item[0])
+        for close in difflib.get_close_matches(key, key_list, n=1, cutoff=0.6):
+            ratio = difflib.SequenceMatcher(None, key, close).ratio()
+            best = max(best, (ratio, app_keys[close]), key=lambda item: item[0])
+    return best
+
+
+def find_orphans(app_dirs, data_dirs, index_path=None, max_workers=None, progress=None):
+    """Return likely orphans under ``data_dirs``, most likely and largest first."""
+    index = AppIndex(app_dirs, index_path).load()
+    app_keys = index.keys()
+    key_list = list(app_keys)
+    removed_keys = index.removed_keys()
+    removed_list = list(removed_keys)
+    names = system_names()
+    app_dirs = [os.path.normcase(os.path.normpath(app_dir)) for app_dir in app_dirs]
+
+    candidates = []
+    for data_dir in data_dirs:
+        kind = os.path.basename(data_dir.rstrip(os.sep))
+        try:
+            entries = list(os.scandir(data_dir))
+        except OSError:
+            continue
+        for entry in entries:
+            if progress is not None and progress.cancelled:
+                return []
+            if is_system_entry(entry.name, names) or _holds_app_dir(entry.path, app_dirs):
+                continue
+            similarity, closest = match(entry.name, app_keys, key_list)
+            if similarity >= MATCH_CUTOFF:
+                continue
+            gone, removed_app = match(entry.name, removed_keys, removed_list) if removed_list else (0.0, None)
+            if gone >= MATCH_CUTOFF:
+                candidates.append(Orphan(entry.path, entry.name, kind, 0, gone, removed_app, REMOVED))
+            elif is_bundle_id(entry.name):
+                candidates.append(Orphan(entry.path, entry.name, kind, 0, 1.0 - similarity, closest, BUNDLE_ID))
+
+    folders = [orphan.path for orphan in candidates if os.path.isdir(orphan.path) and not os.path.islink(orphan.path)]
+    totals = scan_sizes(folders, max_workers=max_workers, progress=progress) if folders else {}
+    for orphan in candidates:
+        total = totals.get(orphan.path)
+        if total is not None:
+            orphan.size = total.size
+        else:
+            try:
+                orphan.size = os.lstat(orphan.path).st_size
+            except OSError:
+                pass
+    candidates.sort(key=lambda orphan: (round(orphan.score, 1), orphan.size), reverse=True)
+    return candidates
@@ -0,0 +1,176 @@
+"""Streaming discover -> filter pipeline for listings shown while they load.
+
+Each stage is a generator function taking an iterable of entries and
+yielding entries. ``run_pipeline`` runs every stage but the last in its own
+thread with a bounded queue in front of the next one, so memory stays flat
+however big the tree is and the first results come out while discovery is
+still walking.
+
+Scans and deletes do not go through here: target_engine runs them as one
+pool task per directory, which keeps every core busy and batches the
+metrics and progress per directory rather than per entry.
+"""
+import os
+import queue
+import threading
+import time
+
+# Batches buffered between two stages; entries travel in batches to keep
+# queue overhead off the per-entry cost
+QUEUE_SIZE = 16
+BATCH_SIZE = 256
+# A partial batch is passed on once it is this old, so results keep flowing
+BATCH_LATENCY = 0.05
+
+_DONE = object()
+
+
+class Entry:
+    """One file or directory flowing through a pipeline."""
+
+    __slots__ = ("path", "name", "is_dir", "depth", "size", "mtime", "outcome", "_dirent")
+
+    def __init__(self, dirent, depth):
+        self.path = dirent.path
+        self.name = dirent.name
+        self.is_dir = dirent.is_dir(follow_symlinks=False)
+        self.depth = depth
+        self.size = None
+        self.mtime = None
+        self.outcome = None
+        self._dirent = dirent
+
+    def stat(self):
+        """Return the cached lstat of the entry."""
+        return self._dirent.stat(follow_symlinks=False)
+
+    def __repr__(self):
+        return f"Entry({self.path!r}, is_dir={self.is_dir}, size={self.size})"
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+def discover(roots, recursive=True, progress=None):
+    """Yield an Entry for everything below the roots, depth first.
+
+    Only one open directory iterator per level is held, so memory depends on
+    tree depth, not size. Symlinks are yielded but never followed.
+    """
+    for root in roots:
+        if not os.path.isdir(root):
+            continue
+        stack = []
+        try:
+            stack.append(os.scandir(root))
+        except OSError:
+            continue
+        try:
+            while stack:
+                if progress is not None and progress.cancelled:
+                    return
+                try:
+                    dirent = next(stack[-1])
+                except StopIteration:
+                    stack.pop().close()
+                    continue
+                except OSError:
+                    stack.pop().close()
+                    continue
+                try:
+                    entry = Entry(dirent, len(stack))
+                except OSError:
+                    continue
+                yield entry
+                if recursive and entry.is_dir:
+                    try:
+                        stack.append(os.scandir(entry.path))
+                    except OSError:
+                        pass
+        finally:
+            for it in stack:
+                it.close()
+
+
+def filter_stage(predicate):
+    """Stage keeping only the entries ``predicate`` accepts."""
+    def stage(entries):
+        for entry in entries:
+            if predicate(entry):
+                yield entry
+    return stage
+
+
+def _pump(iterable, out, stop):
+    """Feed an iterable into a bounded queue until it is exhausted or stopped."""
+    def put(item):
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    batch = []
+    deadline = time.monotonic() + BATCH_LATENCY
+    try:
+        for item in iterable:
+            batch.append(item)
+            if len(batch) >= BATCH_SIZE or time.monotonic() >= deadline:
+                if not put(batch):
+                    return
+                batch = []
+                deadline = time.monotonic() + BATCH_LATENCY
+        if batch and not put(batch):
+            return
+    except BaseException as e:
+        if batch:
+            put(batch)
+        put(_Failure(e))
+    finally:
+        put(_DONE)
+
+
+def _buffered(iterable, stop, maxsize):
+    """Run ``iterable`` in a thread and yield its items through a bounded queue of batches."""
+    out = queue.Queue(maxsize)
+    thread = threading.Thread(target=_pump, args=(iterable, out, stop), daemon=True)
+    thread.start()
+    while True:
+        try:
+            item = out.get(timeout=0.1)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        if isinstance(item, _Failure):
+            raise item.error
+        yield from item
+
+
+def run_pipeline(source, *stages, maxsize=QUEUE_SIZE):
+    """Chain ``source`` through ``stages`` and yield what the last stage yields.
+
+    Closing the returned generator stops every stage thread.
+    """
+    stop = threading.Event()
+    iterable = source
+    for stage in stages:
+        iterable = stage(_buffered(iterable, stop, maxsize))
+    try:
+        yield from iterable
+    finally:
+        stop.set()
+
+
+def iter_app_folders(base_dir, progress=None):
+    """Stream the top-level folders of an application data directory."""
+    return run_pipeline(
+        discover([base_dir], recursive=False, progress=progress),
+        filter_stage(lambda entry: entry.is_dir),
+    )
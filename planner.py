@@ -0,0 +1,242 @@
+"""Deletion plans: decide once what a clear would remove, apply it later.
+
+``make_plan`` walks the selected targets once and records every file that
+would go, with its size, the reason and the identity (device, inode,
+modification time) it had when seen. ``execute_plan`` deletes exactly those
+files without walking the trees again; a file whose identity no longer
+matches is kept and reported as changed. Plans are immutable and can be
+saved as JSON, reviewed and applied later.
+
+The planned files of each target are held in a ScanTree, so a plan for
+millions of files stays small; PlanEntry tuples are built as they are read.
+"""
+import json
+import os
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+from deleter import DeleteResult, delete_groups, remove_empty_dirs
+from policies import Planner, describe
+from scan_tree import ScanTree
+from size_engine import human_readable_size
+from target_engine import clear_targets, collect_targets
+
+PLAN_VERSION = 1
+
+CLEARED = "target cleared"
+
+PlanEntry = namedtuple("PlanEntry", "target path size reason dev ino mtime_ns")
+
+# policy is the target's EvictionPolicy as a dict, or None when it is cleared completely
+PlanTarget = namedtuple("PlanTarget", "name label path policy")
+
+
+def _tree_entries(name, tree):
+    """Yield the PlanEntry tuples of one target's tree, in path order."""
+    labels = tree.labels
+    for row, path in tree.files():
+        yield PlanEntry(
+            name, path, tree.size[row], labels[tree.label[row]], tree.dev[row], tree.ino[row], tree.mtime_ns[row]
+        )
+
+
+def _tree_groups(tree):
+    """Yield (folder, names, identities) for delete_groups, one folder of the tree at a time."""
+    names, dev, ino, mtime_ns = tree.name, tree.dev, tree.ino, tree.mtime_ns
+    for folder, rows in tree.folders():
+        yield folder, [names[row] for row in rows], [(dev[row], ino[row], mtime_ns[row]) for row in rows]
+
+
+class PlanEntries:
+    """Read-only view of the PlanEntry tuples of a plan, built on the fly."""
+
+    __slots__ = ("_plan",)
+
+    def __init__(self, plan):
+        self._plan = plan
+
+    def __len__(self):
+        return sum(len(tree) for tree in self._plan.trees.values())
+
+    def __iter__(self):
+        for target in self._plan.targets:
+            yield from _tree_entries(target.name, self._plan.trees[target.name])
+
+
+class DeletionPlan:
+    """The files a clear would delete, fixed at planning time.
+
+    ``entries`` are PlanEntry tuples, or target name -> ScanTree with the
+    reason as each file's label, as built by make_plan.
+    """
+
+    __slots__ = ("targets", "trees", "dirs", "created", "cancelled")
+
+    def __init__(self, targets, entries, dirs=(), created=None, cancelled=False):
+        set_ = super().__setattr__
+        set_("targets", tuple(targets))
+        if not isinstance(entries, dict):
+            trees = {target.name: ScanTree() for target in self.targets}
+            for entry in entries:
+                trees[entry.target].add(
+                    entry.path, entry.size, 0.0, entry.mtime_ns, entry.dev, entry.ino, entry.reason
+                )
+            entries = trees
+        set_("trees", entries)
+        # (target name, folder) pairs removed afterwards if they were emptied
+        set_("dirs", tuple(dirs))
+        set_("created", created or time.time())
+        set_("cancelled", cancelled)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DeletionPlan is immutable")
+
+    @property
+    def entries(self):
+        return PlanEntries(self)
+
+    @property
+    def total_bytes(self):
+        return sum(tree.total_bytes for tree in self.trees.values())
+
+    def by_target(self):
+        """Return target name -> list of PlanEntry."""
+        return {target.name: list(_tree_entries(target.name, self.trees[target.name])) for target in self.targets}
+
+    def summary(self, max_entries=0):
+        """Return a short human-readable report of what would be deleted."""
+        title = "Planning cancelled" if self.cancelled else "Plan"
+        lines = [f"{title}: {len(self)} files, {human_readable_size(self.total_bytes)} to free"]
+        for target in self.targets:
+            tree = self.trees[target.name]
+            lines.append(f"{target.label}: {len(tree)} files, {human_readable_size(tree.total_bytes)}")
+            for index, count in Counter(tree.label).most_common():
+                lines.append(f"  {count} {tree.labels[index]}")
+            for entry in islice(_tree_entries(target.name, tree), max_entries):
+                lines.append(f"  {human_readable_size(entry.size):>10}  {entry.path}")
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "version": PLAN_VERSION,
+            "created": self.created,
+            "cancelled": self.cancelled,
+            "total_bytes": self.total_bytes,
+            "targets": [target._asdict() for target in self.targets],
+            "entries": [list(entry) for entry in self.entries],
+            "dirs": [list(item) for item in self.dirs],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("version") != PLAN_VERSION:
+            raise ValueError(f"Unsupported plan version {data.get('version')!r}")
+        return cls(
+            [PlanTarget(**target) for target in data["targets"]],
+            (PlanEntry(*entry) for entry in data["entries"]),
+            [tuple(item) for item in data["dirs"]],
+            data["created"],
+            data["cancelled"],
+        )
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __str__(self):
+        return self.summary()
+
+
+def _add(tree, found, reason):
+    tree.add(found.path, found.size, found.atime, found.mtime_ns, found.dev, found.ino, reason)
+
+
+def _emptied_dirs(target, tree, roots):
+    """Folders below the target root that deleting the files of ``tree`` may empty."""
+    prefix = target.path.rstrip(os.sep) + os.sep
+    dirs = [path for path in map(tree.dir_path, tree.walk()) if path.startswith(prefix)]
+    # Never remove a folder holding another target's root
+    return [path for path in dirs if not any(r == path or r.startswith(path + os.sep) for r in roots)]
+
+
+def make_plan(targets, policies=None, max_workers=None, progress=None):
+    """Scan the targets once and return the DeletionPlan for clearing them.
+
+    ``policies`` maps target names to an EvictionPolicy; targets without one
+    are planned to be cleared completely.
+    """
+    policies = policies or {}
+    now = time.time()
+    planners = {
+        target.name: Planner(policies[target.name], now)
+        for target in targets if policies.get(target.name) is not None
+    }
+    trees = {target.name: ScanTree() for target in targets}
+    for found in collect_targets(targets, max_workers, progress):
+        planner = planners.get(found.target)
+        if planner is None:
+            _add(trees[found.target], found, CLEARED)
+        else:
+            planner.add(found)
+    for name, planner in planners.items():
+        for found, rule in planner.finish():
+            _add(trees[name], found, describe(rule, planner.policy))
+
+    roots = [target.path for target in targets if target.path]
+    dirs = []
+    plan_targets = []
+    for target in targets:
+        policy = policies.get(target.name)
+        plan_targets.append(
+            PlanTarget(target.name, target.label, target.path, policy.to_dict() if policy else None)
+        )
+        # Only a plain clear empties folders; a policy keeps the layout
+        if policy is None and target.include == ["*"] and target.path:
+            dirs.extend((target.name, path) for path in _emptied_dirs(target, trees[target.name], roots))
+    cancelled = progress is not None and progress.cancelled
+    return DeletionPlan(plan_targets, trees, dirs, now, cancelled)
+
+
+def execute_plan(plan, max_workers=None, progress=None):
+    """Delete the planned files and return target name -> DeleteResult.
+
+    Nothing is walked again: files are removed folder by folder after
+    checking they are still the ones planned.
+    """
+    results = {}
+    for target in plan.targets:
+        title = f"{target.label} trimmed" if target.policy else f"{target.label} cleared"
+        result = DeleteResult(title)
+        if progress is not None and progress.cancelled:
+            result.cancelled = True
+        else:
+            result.merge(delete_groups(_tree_groups(plan.trees[target.name]), max_workers, progress))
+            remove_empty_dirs([path for name, path in plan.dirs if name == target.name], result)
+        results[target.name] = result
+    return results
+
+
+def evict_targets(targets, policies, max_workers=None, progress=None):
+    """Apply the policies and return name -> DeleteResult.
+
+    Targets without a policy are cleared completely, as before.
+    """
+    plain = [target for target in targets if policies.get(target.name) is None]
+    results = clear_targets(plain, max_workers, progress) if plain else {}
+    trimmed = [target for target in targets if policies.get(target.name) is not None]
+    if trimmed:
+        plan = make_plan(trimmed, policies, max_workers, progress)
+        results.update(execute_plan(plan, max_workers, progress))
+    return results
@@ -0,0 +1,169 @@
+"""Eviction policies: remove the least useful cache files instead of everything.
+
+A policy combines up to three rules, applied in this order:
+
+    max_age_days         files not used for this many days are removed
+    keep_newest_per_app  per top-level folder (one per app), only the most
+                         recently used files up to this many bytes are kept
+    budget               the target as a whole is trimmed to this many bytes
+
+"Used" is the access time when ``order`` is "atime" (LRU) and the
+modification time when it is "mtime". Volumes mounted noatime never move
+the access time forward, so the later of the two is taken for "atime".
+
+The keep-newest rules never sort the scanned files. Each keeps a min-heap of
+the newest files seen so far whose sizes sum to at most the limit; a new
+file is pushed and the oldest ones are popped off as evictions until the
+heap fits again, so memory follows the kept set and every file costs
+O(log k).
+"""
+import heapq
+import re
+import time
+
+from size_engine import human_readable_size
+
+AGE = "age"
+APP = "app"
+BUDGET = "budget"
+
+REASONS = {
+    AGE: "not used for {days} days",
+    APP: "over the {limit} per-app limit",
+    BUDGET: "over the {limit} target budget",
+}
+
+_SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+def parse_size(value):
+    """Return bytes for an int or a string such as "500MB" or "1.5 GB"."""
+    if value is None or isinstance(value, int):
+        return value
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([KMGT]?B?)\s*", str(value).upper())
+    if not match:
+        raise ValueError(f"Invalid size: {value!r}")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+class EvictionPolicy:
+    """Which files of a target to remove, by age, per-app limit and budget."""
+
+    def __init__(self, max_age_days=None, keep_newest_per_app=None, budget=None, order="atime"):
+        if order not in ("atime", "mtime"):
+            raise ValueError(f"Unknown eviction order {order!r}")
+        self.max_age_days = max_age_days
+        self.keep_newest_per_app = parse_size(keep_newest_per_app)
+        self.budget = parse_size(budget)
+        self.order = order
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            "max_age_days": self.max_age_days,
+            "keep_newest_per_app": self.keep_newest_per_app,
+            "budget": self.budget,
+            "order": self.order,
+        }
+
+    def used_time(self, atime, mtime):
+        """Return the time the policy orders files by."""
+        return max(atime, mtime) if self.order == "atime" else mtime
+
+    def __repr__(self):
+        rules = ", ".join(f"{key}={value!r}" for key, value in self.to_dict().items() if value is not None)
+        return f"EvictionPolicy({rules})"
+
+
+class KeepNewest:
+    """Keeps the most recently used files up to a byte limit.
+
+    Files are Found tuples; ``push`` returns the ones that fell out,
+    oldest first.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.total = 0
+        self._heap = []
+
+    def push(self, used, found):
+        heapq.heappush(self._heap, (used, found.path, found))
+        self.total += found.size
+        evicted = []
+        while self.total > self.limit:
+            used, _, old = heapq.heappop(self._heap)
+            self.total -= old.size
+            evicted.append((used, old))
+        return evicted
+
+    def kept(self):
+        """The files still held, in no particular order."""
+        return [(used, found) for used, _, found in self._heap]
+
+
+class Planner:
+    """Applies one policy to the files of one target as they are scanned.
+
+    ``evictions`` collects (Found, rule) pairs; the per-app and budget
+    rules only settle in ``finish``.
+    """
+
+    def __init__(self, policy, now=None):
+        self.policy = policy
+        now = now or time.time()
+        self.cutoff = now - policy.max_age_days * 86400 if policy.max_age_days else None
+        self.apps = {}
+        self.budget = KeepNewest(policy.budget) if policy.budget is not None else None
+        self.evictions = []
+
+    def _evict(self, items, rule):
+        self.evictions.extend((found, rule) for _, found in items)
+
+    def _to_budget(self, used, found):
+        if self.budget is not None:
+            self._evict(self.budget.push(used, found), BUDGET)
+
+    def add(self, found):
+        used = self.policy.used_time(found.atime, found.mtime)
+        if self.cutoff is not None and used < self.cutoff:
+            self.evictions.append((found, AGE))
+            return
+        if self.policy.keep_newest_per_app is None:
+            self._to_budget(used, found)
+            return
+        app = self.apps.get(found.child)
+        if app is None:
+            app = self.apps[found.child] = KeepNewest(self.policy.keep_newest_per_app)
+        self._evict(app.push(used, found), APP)
+
+    def finish(self):
+        # What each app keeps still has to fit in the target budget
+        if self.budget is not None:
+            for app in self.apps.values():
+                for used, found in app.kept():
+                    self._to_budget(used, found)
+        self.apps = {}
+        return self.evictions
+
+
+def describe(rule, policy):
+    """Return a readable reason for an eviction by ``rule``."""
+    limit = policy.keep_newest_per_app if rule == APP else policy.budget
+    return REASONS[rule].format(
+        days=policy.max_age_days,
+        limit=human_readable_size(limit) if limit is not None else "",
+    )
+
+
+def configured_policies(targets):
+    """Return name -> the policy set on each target in cache_targets.json."""
+    return {target.name: target.policy for target in targets}
+
+
+def uniform_policies(targets, policy):
+    """Return name -> ``policy`` for every target."""
+    return {target.name: policy for target in targets}
@@ -0,0 +1,126 @@
+"""Opt-in CPU and memory profiling of whole jobs.
+
+With the mode set to "cpu" a job runs under cProfile, including the worker
+threads it starts; with "memory" under tracemalloc. Either way a report is
+written to the reports folder of the app data directory when the job ends.
+Set with the command line's --profile, CACHEMGR_PROFILE=cpu|memory or the
+GUI's Diagnostics tab.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+from app_paths import app_data_dir
+
+CPU = "cpu"
+MEMORY = "memory"
+MODES = (CPU, MEMORY)
+
+# Rows written to the text reports
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 30
+
+MODE = os.getenv("CACHEMGR_PROFILE") if os.getenv("CACHEMGR_PROFILE") in MODES else None
+last_report = None
+
+# One profiled job at a time: the thread hook and tracemalloc are process-wide
+_busy = threading.Lock()
+
+
+def set_mode(mode):
+    global MODE
+    if mode not in (None, *MODES):
+        raise ValueError(f"Unknown profile mode {mode!r}")
+    MODE = mode
+
+
+def reports_dir():
+    path = os.path.join(app_data_dir(), "reports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _report_path(name, extension):
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "job"
+    return os.path.join(reports_dir(), f"{slug}-{time.strftime('%Y%m%d-%H%M%S')}{extension}")
+
+
+def _run_cpu(name, fn, args, kwargs):
+    profiles = []
+    profiles_lock = threading.Lock()
+
+    def bootstrap(*_):
+        # First event in a new thread: swap this hook for a real profiler
+        profile = cProfile.Profile()
+        with profiles_lock:
+            profiles.append(profile)
+        profile.enable()
+
+    main = cProfile.Profile()
+    threading.setprofile(bootstrap)
+    main.enable()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(main)
+        with profiles_lock:
+            for profile in profiles:
+                stats.add(profile)
+        path = _report_path(name, ".prof")
+        stats.dump_stats(path)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        with open(path[:-len(".prof")] + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"{name}: {len(profiles) + 1} threads profiled\n")
+            f.write(text.getvalue())
+        _done(path)
+
+
+def _run_memory(name, fn, args, kwargs):
+    tracemalloc.start(10)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        path = _report_path(name, ".txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{name}: peak {peak:,} bytes traced, {current:,} still allocated at the end\n\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                f.write(f"{stat}\n")
+        _done(path)
+
+
+def _done(path):
+    global last_report
+    last_report = path
+
+
+def profiled(name, fn, *args, **kwargs):
+    """Call ``fn(*args, **kwargs)``, profiled by the current mode if one is set.
+
+    The report path is left in ``last_report``. While another job is being
+    profiled the call runs unprofiled.
+    """
+    mode = MODE
+    if mode is None or not _busy.acquire(blocking=False):
+        return fn(*args, **kwargs)
+    try:
+        if mode == CPU:
+            return _run_cpu(name, fn, args, kwargs)
+        return _run_memory(name, fn, args, kwargs)
+    finally:
+        _busy.release()
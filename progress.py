@@ -0,0 +1,115 @@
+"""Thread-safe progress reporting and cancellation for long operations.
+
+Engines call ``Progress.add`` as often as they like; the callback only fires
+at a fixed rate so a flood of updates cannot swamp the receiver.
+"""
+import threading
+import time
+from collections import namedtuple
+
+# Callback rate used by the GUI and the command line
+UPDATE_INTERVAL = 0.1
+
+
+class ProgressSnapshot(
+    namedtuple("ProgressSnapshot", "items bytes path elapsed total_bytes detail", defaults=(None,))
+):
+    """Point-in-time view of a running operation.
+
+    ``detail`` is whatever the engine last published with
+    ``Progress.set_detail``, such as the largest entries found so far.
+    """
+
+    __slots__ = ()
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def items_per_second(self):
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def percent(self):
+        """Percentage done by bytes, or None when the total is unknown."""
+        if not self.total_bytes:
+            return None
+        return min(100, int(self.bytes * 100 / self.total_bytes))
+
+
+class Cancelled(Exception):
+    """Raised by engines that cannot return a partial result when cancelled."""
+
+
+class Progress:
+    """Counters shared by the workers of one operation.
+
+    A ``throttle`` (see throttle.py) is charged by the delete engines for
+    every file and folder removed, running the operation in background mode.
+    """
+
+    def __init__(self, callback=None, interval=UPDATE_INTERVAL, total_bytes=None, throttle=None):
+        self.callback = callback
+        self.interval = interval
+        self.total_bytes = total_bytes
+        self.throttle = throttle
+        self.items = 0
+        self.bytes = 0
+        self.path = ""
+        self.detail = None
+        self._started = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def add(self, items=0, nbytes=0, path=None):
+        """Count finished work and notify the callback if it is due."""
+        with self._lock:
+            self.items += items
+            self.bytes += nbytes
+            if path is not None:
+                self.path = path
+            if self.callback is None:
+                return
+            now = time.monotonic()
+            if now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+            snapshot = self._snapshot(now)
+        self.callback(snapshot)
+
+    def set_detail(self, detail):
+        """Publish an engine-specific, immutable value with the next snapshots."""
+        with self._lock:
+            self.detail = detail
+
+    def flush(self):
+        """Send the final counters regardless of the update rate."""
+        if self.callback is not None:
+            with self._lock:
+                snapshot = self._snapshot(time.monotonic())
+            self.callback(snapshot)
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot(time.monotonic())
+
+    def _snapshot(self, now):
+        return ProgressSnapshot(
+            self.items, self.bytes, self.path, now - self._started, self.total_bytes, self.detail
+        )
+
+    def cancel(self):
+        self._cancel.set()
+        if self.throttle is not None:
+            self.throttle.release()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+
+def null_progress():
+    """Return a Progress that reports nowhere, for callers that pass none."""
+    return Progress()
@@ -0,0 +1,155 @@
+"""On-disk index of directory sizes used for incremental rescans.
+
+Every directory below a scanned root is stored with its mtime, inode and the
+size of the files it directly contains, plus its largest files. A directory whose mtime and inode are
+unchanged on the next scan has the same direct entries, so its listing can be
+skipped and only its known subdirectories need a stat to be checked.
+
+File hashes from duplicate detection are kept alongside, valid for as long
+as the file's device, inode, mtime and size stay the same.
+"""
+import os
+import sqlite3
+import time
+from collections import namedtuple
+
+from app_paths import app_data_dir
+
+INDEX_FILE = "scan_index.sqlite3"
+
+# Directories modified this close to the scan are stored as dirty, since a
+# change within the same mtime tick would otherwise go unnoticed next time.
+RACY_WINDOW_NS = 2 * 1000 ** 3
+
+# Bumped whenever the table layout changes; an older index is rebuilt
+SCHEMA_VERSION = 3
+
+FileHashes = namedtuple("FileHashes", "dev ino mtime_ns size partial full")
+
+# top_files holds (size, name) pairs of the largest files directly inside
+DirRecord = namedtuple("DirRecord", "dev ino mtime_ns own_size own_files subdirs top_files")
+
+
+def default_index_path():
+    """Return the path of the shared scan index."""
+    return os.path.join(app_data_dir(), INDEX_FILE)
+
+
+def _join_top(top_files):
+    return "\0".join(f"{size}\0{name}" for size, name in top_files)
+
+
+def _split_top(text):
+    if not text:
+        return ()
+    parts = text.split("\0")
+    return tuple((int(parts[i]), parts[i + 1]) for i in range(0, len(parts), 2))
+
+
+def _prefix_bounds(root):
+    """Return the key range covering every path strictly below root."""
+    prefix = root.rstrip(os.sep) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+# Matches root itself and every path below it, with the arguments of _tree_args
+_IN_TREE = "(path = ? OR (path >= ? AND path < ?))"
+
+
+def _tree_args(root):
+    return (root,) + _prefix_bounds(root)
+
+
+class ScanIndex:
+    """SQLite-backed store of per-directory scan results."""
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        with self._connect() as conn:
+            # The index is only a cache, so an outdated layout is simply dropped
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS dirs")
+                conn.execute("DROP TABLE IF EXISTS hashes")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dirs ("
+                " path TEXT PRIMARY KEY, dev INTEGER, ino INTEGER, mtime_ns INTEGER,"
+                " own_size INTEGER, own_files INTEGER, subdirs TEXT, top_files TEXT)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                " path TEXT PRIMARY KEY, dev INTEGER, ino INTEGER, mtime_ns INTEGER, size INTEGER,"
+                " partial TEXT, full TEXT)"
+            )
+
+    def _connect(self):
+        # A fresh connection per call keeps the index usable from any thread
+        return sqlite3.connect(self.path)
+
+    def load(self, root):
+        """Return a dict of path -> DirRecord for root and every directory below it."""
+        records = {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, dev, ino, mtime_ns, own_size, own_files, subdirs, top_files"
+                f" FROM dirs WHERE {_IN_TREE}",
+                _tree_args(root),
+            )
+            for path, dev, ino, mtime_ns, own_size, own_files, subdirs, top_files in rows:
+                names = tuple(subdirs.split("\0")) if subdirs else ()
+                records[path] = DirRecord(
+                    dev, ino, mtime_ns, own_size, own_files, names, _split_top(top_files)
+                )
+        return records
+
+    def store(self, root, records, visited, started_ns=None):
+        """Save the directories rescanned in root's tree and drop vanished ones.
+
+        ``records`` maps paths to fresh DirRecords, ``visited`` holds every
+        directory seen during the scan whether rescanned or reused.
+        """
+        racy_after = (started_ns or time.time_ns()) - RACY_WINDOW_NS
+        rows = []
+        for path, record in records.items():
+            mtime_ns = record.mtime_ns if record.mtime_ns < racy_after else -1
+            rows.append((
+                path, record.dev, record.ino, mtime_ns,
+                record.own_size, record.own_files, "\0".join(record.subdirs),
+                _join_top(record.top_files),
+            ))
+        with self._connect() as conn:
+            stale = [
+                (path,) for (path,) in conn.execute(
+                    f"SELECT path FROM dirs WHERE {_IN_TREE}", _tree_args(root)
+                )
+                if path not in visited
+            ]
+            conn.executemany("DELETE FROM dirs WHERE path = ?", stale)
+            conn.executemany("INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def clear(self, root=None):
+        """Forget root and everything below it, or the whole index."""
+        with self._connect() as conn:
+            for table in ("dirs", "hashes"):
+                if root is None:
+                    conn.execute(f"DELETE FROM {table}")
+                else:
+                    conn.execute(f"DELETE FROM {table} WHERE {_IN_TREE}", _tree_args(root))
+
+    def load_hashes(self, root):
+        """Return path -> FileHashes for every file hashed below root."""
+        low, high = _prefix_bounds(root)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, dev, ino, mtime_ns, size, partial, full FROM hashes WHERE path >= ? AND path < ?",
+                (low, high),
+            )
+            return {row[0]: FileHashes(*row[1:]) for row in rows}
+
+    def store_hashes(self, hashes):
+        """Save path -> FileHashes, replacing what was known about those paths."""
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(path,) + tuple(item) for path, item in hashes.items()],
+            )
@@ -0,0 +1,188 @@
+"""Compact in-memory tree of scanned files.
+
+Keeping millions of scan results as tuples with full path strings costs a
+few hundred bytes per file. A ScanTree stores each folder once, as a node
+holding only its own name, and each file as one row of parallel ``array``
+columns (folder, size, access time, modification time, device, inode,
+label) plus its name. Names are interned, so the "index" or "data_0" found
+in thousands of cache folders is stored once. Full paths are rebuilt only
+when asked for, and subtree totals come from per-folder sums without
+touching the file rows.
+"""
+import os
+from array import array
+
+
+class DirNode:
+    """One folder: its name, parent, subfolders and the rows of its files."""
+
+    __slots__ = ("name", "parent", "index", "children", "files", "size")
+
+    def __init__(self, name, parent, index):
+        self.name = name
+        self.parent = parent
+        self.index = index
+        # name -> DirNode, created with the first subfolder
+        self.children = None
+        self.files = array("I")
+        # Bytes of the files directly in this folder
+        self.size = 0
+
+    def child(self, name, index):
+        if self.children is None:
+            self.children = {}
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = DirNode(name, self, index)
+        return node
+
+    def __repr__(self):
+        return f"DirNode({self.name!r}, {len(self.files)} files)"
+
+
+class ScanTree:
+    """Files found by a scan, stored column-wise below their folders.
+
+    ``add`` returns the row of the new file; the columns (``size``,
+    ``atime``, ``mtime_ns``, ``dev``, ``ino``) are indexed by row. A label
+    such as a target name or a deletion reason is interned into ``labels``
+    and stored as its index.
+    """
+
+    __slots__ = (
+        "root", "nodes", "labels", "dir", "name", "size", "atime", "mtime_ns", "dev", "ino", "label",
+        "_dirs", "_names", "_label_index",
+    )
+
+    def __init__(self):
+        # Parent of the top-level folders ("" for "/" on POSIX, "C:" on Windows)
+        self.root = DirNode(None, None, -1)
+        self.nodes = []
+        self.labels = []
+        self.dir = array("I")
+        self.name = []
+        self.size = array("q")
+        self.atime = array("d")
+        self.mtime_ns = array("q")
+        self.dev = array("Q")
+        self.ino = array("Q")
+        self.label = array("H")
+        # Folder path -> DirNode; folders are few next to files
+        self._dirs = {}
+        self._names = {}
+        self._label_index = {}
+
+    def _intern(self, name):
+        return self._names.setdefault(name, name)
+
+    def _node(self, folder):
+        node = self._dirs.get(folder)
+        if node is not None:
+            return node
+        missing = []
+        while node is None:
+            parent, sep, name = folder.rpartition(os.sep)
+            missing.append((folder, name))
+            if not sep:
+                node = self.root
+                break
+            folder = parent
+            node = self._dirs.get(folder)
+        for folder, name in reversed(missing):
+            node = node.child(self._intern(name), len(self.nodes))
+            if node.index == len(self.nodes):
+                self.nodes.append(node)
+            self._dirs[folder] = node
+        return node
+
+    def add(self, path, size, atime=0.0, mtime_ns=0, dev=0, ino=0, label=None):
+        """Add a file and return its row."""
+        folder, _, name = path.rpartition(os.sep)
+        node = self._node(folder)
+        index = self._label_index.get(label)
+        if index is None:
+            index = self._label_index[label] = len(self.labels)
+            self.labels.append(label)
+        row = len(self.name)
+        node.files.append(row)
+        node.size += size
+        self.dir.append(node.index)
+        self.name.append(self._intern(name))
+        self.size.append(size)
+        self.atime.append(atime)
+        self.mtime_ns.append(mtime_ns)
+        self.dev.append(dev)
+        self.ino.append(ino)
+        self.label.append(index)
+        return row
+
+    def __len__(self):
+        return len(self.name)
+
+    @property
+    def total_bytes(self):
+        return sum(self.size)
+
+    def dir_path(self, node):
+        """Rebuild the full path of a folder node."""
+        names = []
+        while node is not self.root:
+            names.append(node.name)
+            node = node.parent
+        return os.sep.join(reversed(names))
+
+    def path(self, row):
+        """Rebuild the full path of a file row."""
+        return self.dir_path(self.nodes[self.dir[row]]) + os.sep + self.name[row]
+
+    def label_of(self, row):
+        return self.labels[self.label[row]]
+
+    def find(self, folder):
+        """Return the node of ``folder``, or None if no file was added below it."""
+        return self._dirs.get(folder.rstrip(os.sep) if folder != os.sep else "")
+
+    def walk(self, node=None):
+        """Yield ``node`` (default: every top-level folder) and its subfolders,
+        depth first, in name order."""
+        stack = [node] if node is not None else self._sorted_children(self.root)[::-1]
+        while stack:
+            node = stack.pop()
+            yield node
+            if node.children:
+                stack.extend(self._sorted_children(node)[::-1])
+
+    @staticmethod
+    def _sorted_children(node):
+        if not node.children:
+            return []
+        return [node.children[name] for name in sorted(node.children)]
+
+    def totals(self, node=None):
+        """Return (bytes, files) below ``node``, or of the whole tree."""
+        if node is None:
+            return self.total_bytes, len(self)
+        size = files = 0
+        for folder in self.walk(node):
+            size += folder.size
+            files += len(folder.files)
+        return size, files
+
+    def folders(self, node=None):
+        """Yield (folder path, rows) for every folder below ``node`` holding
+        files, in path order, with the rows sorted by file name."""
+        names = self.name
+        for folder in self.walk(node):
+            if folder.files:
+                yield self.dir_path(folder), sorted(folder.files, key=names.__getitem__)
+
+    def files(self, node=None):
+        """Yield (row, path) for every file below ``node``, in path order.
+
+        Each folder's path is rebuilt once for all of its files.
+        """
+        names = self.name
+        for folder, rows in self.folders(node):
+            prefix = folder + os.sep
+            for row in rows:
+                yield row, prefix + names[row]
@@ -0,0 +1,216 @@
+"""Cleanups run on a timer, with every run recorded in the history store.
+
+Schedules are listed under "schedules" in cache_targets.json:
+
+    name        unique identifier
+    targets     target or group names, as on the command line
+    every       interval such as "30m", "6h" or "1d" (or seconds)
+    evict       trim by the targets' policies instead of clearing (default true)
+    background  low priority, rate-limited deletes (default true)
+
+A per-user cache_targets.json replaces schedules by name and removes them
+with ``"enabled": false``, as for targets.
+
+Each run measures the targets, clears them and adds one Sample per target
+to the HistoryStore. The time of the last run is stored there as well, so
+a schedule that fell due while nothing was running starts right away.
+
+A run that fails (a locked history, a target gone from the registry, a
+disk error) is reported and tried again after RETRY_AFTER seconds; the
+other schedules keep running.
+"""
+import re
+import threading
+import time
+
+from history import HistoryStore, Sample
+from planner import evict_targets
+from policies import configured_policies
+from progress import Progress
+from scan_index import ScanIndex
+from target_engine import clear_targets, scan_targets
+from throttle import Throttle
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+# Shortest interval accepted, so a typo cannot spin the disk
+MIN_INTERVAL = 60
+# Seconds before a failed run is tried again
+RETRY_AFTER = 300
+
+
+def parse_interval(value):
+    """Return seconds for an int or a string such as "45m", "6h" or "1d"."""
+    if isinstance(value, (int, float)):
+        seconds = value
+    else:
+        match = re.fullmatch(r"\s*([0-9.]+)\s*([smhdw]?)\s*", str(value).lower())
+        if not match:
+            raise ValueError(f"Invalid interval: {value!r}")
+        seconds = float(match.group(1)) * _UNITS[match.group(2) or "s"]
+    if seconds < MIN_INTERVAL:
+        raise ValueError(f"Interval {value!r} is shorter than {MIN_INTERVAL} seconds")
+    return int(seconds)
+
+
+class Schedule:
+    """Which targets to clean and how often."""
+
+    def __init__(self, name, targets, every, evict=True, background=True):
+        self.name = name
+        self.targets = list(targets)
+        self.every = parse_interval(every)
+        self.evict = evict
+        self.background = background
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["name"], data["targets"], data["every"],
+            evict=data.get("evict", True), background=data.get("background", True),
+        )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "targets": self.targets,
+            "every": self.every,
+            "evict": self.evict,
+            "background": self.background,
+        }
+
+    def __repr__(self):
+        return f"Schedule({self.name!r}, {self.targets!r}, every={self.every})"
+
+
+def run_schedule(schedule, registry, history=None, index=None, progress=None):
+    """Measure and clear the schedule's targets once; returns name -> DeleteResult.
+
+    The measured sizes and the results are added to ``history``.
+    """
+    targets = registry.select(schedule.targets)
+    if progress is None:
+        progress = Progress(throttle=Throttle() if schedule.background else None)
+    started = time.time()
+    totals = scan_targets(targets, index=index)
+    if schedule.evict:
+        results = evict_targets(targets, configured_policies(targets), progress=progress)
+    else:
+        results = clear_targets(targets, progress=progress)
+    duration = time.time() - started
+    if history is not None:
+        history.record({
+            name: Sample(
+                None, totals[name].size, result.bytes_freed, result.files + result.dirs, len(result.errors),
+                duration,
+            )
+            for name, result in results.items() if totals[name].exists
+        }, started)
+        history.set_last_run(schedule.name, started)
+    return results
+
+
+class Scheduler:
+    """Runs schedules in a background thread whenever they fall due.
+
+    ``on_run(schedule, results)`` is called on that thread after every run
+    and ``on_error(schedule, error)`` after a run that raised (schedule is
+    None when the history store itself failed); ``run_now`` starts every
+    schedule at once.
+    """
+
+    def __init__(self, schedules, registry, history=None, on_run=None, on_error=None):
+        self.schedules = list(schedules)
+        self.registry = registry
+        self.history = history or HistoryStore()
+        self.on_run = on_run
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._force = False
+        self._thread = None
+        self._progress = None
+        # Schedule name -> time of its last failed run, until one succeeds
+        self._failed = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cache-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        progress = self._progress
+        if progress is not None:
+            progress.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, timeout=None):
+        """Block until the scheduler has stopped, or ``timeout`` passed; True if stopped."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def run_now(self):
+        self._force = True
+        self._wake.set()
+
+    def run_all(self):
+        """Run every schedule once on the calling thread, due or not."""
+        index = ScanIndex()
+        for schedule in self.schedules:
+            if self._stop.is_set():
+                break
+            self._run_one(schedule, index)
+
+    def next_due(self, schedule):
+        """Return when a schedule runs next, as a timestamp; 0 if it never ran."""
+        failed = self._failed.get(schedule.name)
+        if failed is not None:
+            return failed + RETRY_AFTER
+        last = self.history.last_run(schedule.name)
+        return 0 if last is None else last + schedule.every
+
+    def _run(self):
+        index = ScanIndex()
+        while not self._stop.is_set():
+            try:
+                delay = self._run_due(index)
+            except Exception as e:
+                # The history store could not be read: report it and try again later
+                self._report(None, e)
+                delay = RETRY_AFTER
+            self._wake.wait(None if delay is None else max(1.0, delay))
+            self._wake.clear()
+
+    def _run_due(self, index):
+        """Run the schedules that are due; returns the seconds until the next one, or None."""
+        now = time.time()
+        force, self._force = self._force, False
+        for schedule in self.schedules:
+            if self._stop.is_set():
+                return None
+            if force or self.next_due(schedule) <= now:
+                self._run_one(schedule, index)
+        if not self.schedules:
+            return None
+        return min(self.next_due(schedule) for schedule in self.schedules) - time.time()
+
+    def _report(self, schedule, error):
+        if self.on_error is not None:
+            self.on_error(schedule, error)
+
+    def _run_one(self, schedule, index):
+        self._progress = Progress(throttle=Throttle() if schedule.background else None)
+        try:
+            results = run_schedule(schedule, self.registry, self.history, index, self._progress)
+        except Exception as e:
+            self._failed[schedule.name] = time.time()
+            self._report(schedule, e)
+            return
+        finally:
+            self._progress = None
+        self._failed.pop(schedule.name, None)
+        if self.on_run is not None:
+            self.on_run(schedule, results)
@@ -0,0 +1,363 @@
+"""Parallel folder size engine built on os.scandir.
+
+Kept free of any PyQt5 import so it can be used from the GUI, from scripts
+and from the command line alike.
+"""
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import metrics
+from scan_index import DirRecord
+
+# Largest files kept per directory in the scan index, and the most a scan reports
+TOP_FILES = 20
+
+
+def human_readable_size(size):
+    """Convert size in bytes to human-readable format."""
+    for unit in ["B", "KB", "MB", "GB", "TB"]:
+        if size < 1024.0:
+            return f"{size:.2f} {unit}"
+        size /= 1024.0
+    return f"{size:.2f} PB"
+
+
+def default_workers():
+    """Return the default number of scan threads."""
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+class InodeSet:
+    """Thread-safe set of (device, inode) pairs used to count hard links once."""
+
+    def __init__(self):
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def add(self, st):
+        """Record a stat result, returning False if its inode was already counted."""
+        if st.st_nlink <= 1:
+            return True
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def add_unlinked(self, st):
+        """Record a file stat'ed just before being unlinked; False if its inode was already counted.
+
+        The link count drops as earlier links go, so the last link of a
+        file counted before shows st_nlink 1 and must still be looked up.
+        Only files with several links are kept, so the set stays small.
+        """
+        key = (st.st_dev, st.st_ino)
+        with self._lock:
+            if key in self._seen:
+                return False
+            if st.st_nlink > 1:
+                self._seen.add(key)
+            return True
+
+
+class TopN:
+    """The ``count`` largest items pushed so far, in a bounded min-heap."""
+
+    def __init__(self, count=TOP_FILES):
+        self.count = count
+        self._heap = []
+
+    def push(self, size, item):
+        """Offer an item; returns True if it is among the largest so far."""
+        if len(self._heap) < self.count:
+            heapq.heappush(self._heap, (size, item))
+            return True
+        if self.count and size > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (size, item))
+            return True
+        return False
+
+    def items(self):
+        """Return (size, item) pairs, largest first."""
+        return sorted(self._heap, reverse=True)
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class FolderTotal:
+    """Aggregated size information for one scanned root."""
+
+    def __init__(self, path):
+        self.path = path
+        self.exists = True
+        self.size = 0
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+        # Directories whose totals were taken from the scan index
+        self.reused = 0
+        self.cancelled = False
+        # Size of every top-level entry of the root, keyed by name
+        self.children = {}
+        # (size, path) of the largest folders and files anywhere below, largest first
+        self.largest_dirs = []
+        self.largest_files = []
+        self.inodes = InodeSet()
+
+    def largest_children(self, count=None):
+        """Return (name, size) pairs of the top-level entries, largest first."""
+        items = sorted(self.children.items(), key=lambda item: item[1], reverse=True)
+        return items if count is None else items[:count]
+
+    def __repr__(self):
+        return f"FolderTotal({self.path!r}, size={self.size}, files={self.files})"
+
+
+class WalkResult:
+    """Totals produced by one worker task."""
+
+    def __init__(self):
+        self.size = 0
+        self.files = 0
+        self.dirs = 0
+        self.errors = 0
+        # Subdirectories handed back to the scheduler instead of walked here
+        self.deferred = []
+        # Index bookkeeping, only filled when scanning against a ScanIndex
+        self.reused = 0
+        self.records = {}
+        self.visited = []
+
+
+def walk_subtree(path, split, inodes, cache=None, progress=None):
+    """Walk a directory tree without following symlinks.
+
+    Up to ``split`` subdirectories are returned in ``deferred`` so the caller
+    can spread them over idle workers; everything else is walked in place.
+    When ``cache`` holds index records, directories whose mtime and inode are
+    unchanged reuse their recorded totals instead of being listed again.
+    The walk stops early once ``progress`` is cancelled.
+    """
+    result = WalkResult()
+    stack = [path]
+    tally = metrics.Tally() if metrics.ENABLED else None
+
+    def push(subdir):
+        result.dirs += 1
+        if len(result.deferred) < split:
+            result.deferred.append(subdir)
+        else:
+            stack.append(subdir)
+
+    while stack:
+        if progress is not None and progress.cancelled:
+            break
+        current = stack.pop()
+        if cache is not None:
+            result.visited.append(current)
+            started = time.perf_counter() if tally is not None else 0.0
+            try:
+                st = os.stat(current, follow_symlinks=False)
+            except OSError:
+                result.errors += 1
+                continue
+            record = cache.get(current)
+            if tally is not None:
+                tally.add(metrics.INDEX, time.perf_counter() - started)
+            if (record is not None and record.mtime_ns == st.st_mtime_ns
+                    and record.ino == st.st_ino and record.dev == st.st_dev):
+                result.reused += 1
+                if tally is not None:
+                    tally.count("dirs_reused")
+                result.size += record.own_size
+                result.files += record.own_files
+                if progress is not None:
+                    progress.add(record.own_files, record.own_size, current)
+                for name in record.subdirs:
+                    push(os.path.join(current, name))
+                continue
+
+        own_size = 0
+        own_files = 0
+        subdirs = []
+        top_files = TopN()
+        if tally is not None:
+            listed = time.perf_counter()
+            stat_seconds = 0.0
+            stats = 0
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            push(entry.path)
+                            continue
+                        if tally is not None:
+                            started = time.perf_counter()
+                            entry_st = entry.stat(follow_symlinks=False)
+                            stat_seconds += time.perf_counter() - started
+                            stats += 1
+                        else:
+                            entry_st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        result.errors += 1
+                        continue
+                    if inodes.add(entry_st):
+                        own_size += entry_st.st_size
+                        own_files += 1
+                        top_files.push(entry_st.st_size, entry.name)
+        except OSError:
+            result.errors += 1
+            continue
+        if tally is not None:
+            tally.add(metrics.LIST, time.perf_counter() - listed - stat_seconds)
+            tally.add(metrics.STAT, stat_seconds, stats)
+            tally.count("dirs_listed")
+        result.size += own_size
+        result.files += own_files
+        if progress is not None:
+            progress.add(own_files, own_size, current)
+        if cache is not None:
+            result.records[current] = DirRecord(
+                st.st_dev, st.st_ino, st.st_mtime_ns, own_size, own_files, tuple(subdirs),
+                tuple(top_files.items()),
+            )
+    if tally is not None:
+        tally.count("errors", result.errors)
+        tally.flush()
+    return result
+
+
+def scan_sizes(roots, max_workers=None, index=None, progress=None):
+    """Measure several folders in parallel.
+
+    Returns a dict mapping every root to a FolderTotal with the overall size
+    and the size of each of its top-level entries. With a ScanIndex the
+    previous results are reused for unchanged directories and the index is
+    updated afterwards, the roots included; the ``children`` of a reused root
+    list only its TOP_FILES largest files next to its subfolders.
+    Cancelling ``progress`` returns partial totals marked as cancelled.
+    """
+    workers = max_workers or default_workers()
+    started_ns = time.time_ns()
+    totals = {}
+    caches = {}
+    records = {}
+    visited = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def submit(total, child, path):
+            # Let tasks split their subtree only while workers would sit idle
+            split = max(0, workers * 2 - len(pending))
+            future = pool.submit(
+                walk_subtree, path, split, total.inodes, caches.get(total.path), progress
+            )
+            pending[future] = (total, child)
+
+        for root in roots:
+            if root in totals:
+                continue
+            total = FolderTotal(root)
+            totals[root] = total
+            if not os.path.isdir(root):
+                total.exists = False
+                continue
+            if index is not None:
+                caches[root] = index.load(root)
+                records[root] = {}
+                visited[root] = {root}
+                # The root itself is reused or recorded like any folder below it
+                try:
+                    st = os.stat(root, follow_symlinks=False)
+                except OSError:
+                    total.errors += 1
+                    continue
+                record = caches[root].get(root)
+                if (record is not None and record.mtime_ns == st.st_mtime_ns
+                        and record.ino == st.st_ino and record.dev == st.st_dev):
+                    total.reused += 1
+                    total.size += record.own_size
+                    total.files += record.own_files
+                    total.children.update((name, size) for size, name in record.top_files)
+                    if progress is not None:
+                        progress.add(record.own_files, record.own_size, root)
+                    for name in record.subdirs:
+                        total.dirs += 1
+                        total.children[name] = 0
+                        submit(total, name, os.path.join(root, name))
+                    continue
+            subdirs = []
+            top_files = TopN()
+            try:
+                with os.scandir(root) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_symlink():
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                total.dirs += 1
+                                total.children[entry.name] = 0
+                                subdirs.append(entry.name)
+                                submit(total, entry.name, entry.path)
+                                continue
+                            entry_st = entry.stat(follow_symlinks=False)
+                        except OSError:
+                            total.errors += 1
+                            continue
+                        if total.inodes.add(entry_st):
+                            total.size += entry_st.st_size
+                            total.files += 1
+                            total.children[entry.name] = entry_st.st_size
+                            top_files.push(entry_st.st_size, entry.name)
+                            if progress is not None:
+                                progress.add(1, entry_st.st_size, entry.path)
+            except OSError:
+                total.errors += 1
+                continue
+            if index is not None:
+                # Only the root's own files are counted until the subfolders finish
+                records[root][root] = DirRecord(
+                    st.st_dev, st.st_ino, st.st_mtime_ns, total.size, total.files, tuple(subdirs),
+                    tuple(top_files.items()),
+                )
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                total, child = pending.pop(future)
+                result = future.result()
+                total.size += result.size
+                total.files += result.files
+                total.dirs += result.dirs
+                total.errors += result.errors
+                total.children[child] += result.size
+                total.reused += result.reused
+                if index is not None:
+                    records[total.path].update(result.records)
+                    visited[total.path].update(result.visited)
+                if progress is not None and progress.cancelled:
+                    total.cancelled = True
+                    continue
+                for path in result.deferred:
+                    submit(total, child, path)
+
+    for root in records:
+        # A partial walk cannot tell vanished directories from unvisited ones
+        if not totals[root].cancelled:
+            index.store(root, records[root], visited[root], started_ns)
+    return totals
+
+
+def folder_size(path, max_workers=None, index=None):
+    """Return the total size in bytes of a single folder."""
+    return scan_sizes([path], max_workers=max_workers, index=index)[path].size
@@ -0,0 +1,34 @@
+"""Startup timing instrumentation for the GUI.
+
+Enabled with ``--startup-timing`` or ``CACHEMGR_STARTUP_TIMING=1``; each
+phase is written to stderr as one JSON line so runs can be compared.
+"""
+import json
+import os
+import sys
+import time
+
+
+class StartupTimer:
+    """Records milliseconds since the timer was created for named startup phases.
+
+    temp2 creates it first thing, before importing Qt, so the interpreter's
+    own start-up is not included.
+    """
+
+    def __init__(self, enabled=None, stream=None):
+        if enabled is None:
+            enabled = "--startup-timing" in sys.argv or bool(os.getenv("CACHEMGR_STARTUP_TIMING"))
+        self.enabled = enabled
+        self.stream = stream or sys.stderr
+        self.start = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    def mark(self, phase, **extra):
+        """Report that a phase was reached."""
+        if self.enabled:
+            record = dict(extra, phase=phase, since_start_ms=round(self.elapsed_ms(), 2))
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
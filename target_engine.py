@@ -0,0 +1,531 @@
+"""Combined scan and clear engine over registry targets.
+
+All selected targets are walked in one parallel pass, one pool task per
+directory. A target whose root lies inside another selected target's root
+is not walked separately: its subtree is visited once as part of the outer
+walk and every entry is credited to the deepest target containing it.
+"""
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+
+import metrics
+from deleter import DeleteResult, freed_size, open_dir, remove_empty_dirs, retry_errors
+from scan_index import DirRecord
+from size_engine import TOP_FILES, FolderTotal, InodeSet, TopN, default_workers
+
+SCAN = "scan"
+CLEAR = "clear"
+
+# Folders queued on the pool per worker; the rest of the walk waits on a stack
+PENDING_PER_WORKER = 4
+
+# One file found while collecting; size is 0 for symlinks and repeated hard links
+Found = namedtuple("Found", "target child path size atime mtime dev ino mtime_ns")
+
+
+def _inside(path, root):
+    return path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class _Routes:
+    """Maps target roots to their targets and finds the roots to walk."""
+
+    def __init__(self, targets):
+        self.by_root = {}
+        for target in targets:
+            self.by_root.setdefault(target.path, []).append(target)
+        roots = sorted(self.by_root)
+        self.walk_roots = [
+            root for root in roots if not any(_inside(root, other) for other in roots if other != root)
+        ]
+
+    def holds_root(self, path):
+        """True if some target root lies strictly below ``path``."""
+        prefix = path.rstrip(os.sep) + os.sep
+        return any(root.startswith(prefix) for root in self.by_root)
+
+
+class _Context:
+    """State shared by every task of one run."""
+
+    def __init__(self, routes, mode, cache, progress, collect=False):
+        self.routes = routes
+        self.mode = mode
+        self.cache = cache
+        self.progress = progress
+        self.collect = collect
+        self.now = time.time()
+        self.inodes = {
+            target.name: InodeSet() for targets in routes.by_root.values() for target in targets
+        }
+
+
+class _Visit:
+    """What one task found in, or removed from, one directory."""
+
+    def __init__(self, owner_name, path):
+        self.owner_name = owner_name
+        self.path = path
+        # (target name, top-level child) -> [bytes, files]
+        self.found = {}
+        # target name -> TopN of (size, path) of the largest files in scan mode
+        self.top_files = {}
+        # Found tuples when collecting
+        self.entries = []
+        self.deleted = {}
+        self.subdirs = []
+        self.dirs = {}
+        self.errors = {}
+        self.record = None
+        self.reused = False
+        self.cancelled = False
+
+
+def _relative(path, owner):
+    if path == owner:
+        return ""
+    return path[len(owner.rstrip(os.sep)) + 1:].replace(os.sep, "/")
+
+
+def _visit(path, owner, ctx):
+    """List one directory, crediting or deleting its entries."""
+    targets = ctx.routes.by_root[owner]
+    visit = _Visit(targets[0].name, path)
+    simple = targets[0].unfiltered
+    dir_rel = _relative(path, owner)
+    child_key = dir_rel.split("/", 1)[0] if dir_rel else None
+
+    def credit(target, child, size):
+        key = (target.name, child)
+        found = visit.found.get(key)
+        if found is None:
+            visit.found[key] = [size, 1]
+        else:
+            found[0] += size
+            found[1] += 1
+
+    def add_subdir(sub_path, name):
+        sub_owner = sub_path if sub_path in ctx.routes.by_root else owner
+        if sub_owner == owner:
+            rel = f"{dir_rel}/{name}" if dir_rel else name
+            if (all(target.excludes(rel, name) for target in targets)
+                    and not ctx.routes.holds_root(sub_path)):
+                return
+        visit.subdirs.append((sub_path, sub_owner))
+        if sub_owner == owner:
+            visit.dirs[visit.owner_name] = visit.dirs.get(visit.owner_name, 0) + 1
+
+    tally = metrics.Tally(visit.owner_name) if metrics.ENABLED else None
+
+    # Unchanged directories of unfiltered targets reuse the scan index
+    st = None
+    if ctx.mode == SCAN and ctx.cache is not None and simple:
+        started = time.perf_counter() if tally is not None else 0.0
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            visit.errors[visit.owner_name] = 1
+            return visit
+        record = ctx.cache.get(path)
+        if tally is not None:
+            tally.add(metrics.INDEX, time.perf_counter() - started)
+        if (record is not None and record.mtime_ns == st.st_mtime_ns
+                and record.ino == st.st_ino and record.dev == st.st_dev):
+            visit.reused = True
+            if tally is not None:
+                tally.count("dirs_reused")
+                tally.flush()
+            if record.own_files:
+                visit.found[(visit.owner_name, child_key)] = [record.own_size, record.own_files]
+                top = visit.top_files[visit.owner_name] = TopN()
+                for size, name in record.top_files:
+                    top.push(size, os.path.join(path, name))
+            for name in record.subdirs:
+                add_subdir(os.path.join(path, name), name)
+            if ctx.progress is not None:
+                ctx.progress.add(record.own_files, record.own_size, path)
+            return visit
+
+    fd = None
+    try:
+        if ctx.mode == CLEAR:
+            fd = open_dir(path, follow=path == owner)
+        listing = os.scandir(fd if fd is not None else path)
+    except OSError as e:
+        if fd is not None:
+            os.close(fd)
+        if ctx.mode == CLEAR:
+            result = visit.deleted.setdefault(visit.owner_name, DeleteResult())
+            result.add_error(path, e, is_dir=True, replay=partial(_relist, path, owner, ctx))
+        else:
+            visit.errors[visit.owner_name] = 1
+        return visit
+
+    own_size = 0
+    own_files = 0
+    subdir_names = []
+    files = 0
+    freed = 0
+    throttle = ctx.progress.throttle if ctx.mode == CLEAR and ctx.progress is not None else None
+    waited = 0.0
+    if tally is not None:
+        listed = time.perf_counter()
+        stat_seconds = unlink_seconds = 0.0
+        stats = unlinks = 0
+    try:
+        with listing as it:
+            for entry in it:
+                if ctx.progress is not None and ctx.progress.cancelled:
+                    visit.cancelled = True
+                    break
+                name = entry.name
+                entry_path = os.path.join(path, name)
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdir_names.append(name)
+                        add_subdir(entry_path, name)
+                        continue
+                    if tally is not None:
+                        started = time.perf_counter()
+                        entry_st = entry.stat(follow_symlinks=False)
+                        stat_seconds += time.perf_counter() - started
+                        stats += 1
+                    else:
+                        entry_st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    visit.errors[visit.owner_name] = visit.errors.get(visit.owner_name, 0) + 1
+                    continue
+
+                rel = f"{dir_rel}/{name}" if dir_rel else name
+                if simple:
+                    target = targets[0]
+                else:
+                    target = next((t for t in targets if t.matches(rel, name, entry_st, ctx.now)), None)
+                    if target is None:
+                        continue
+
+                if ctx.mode == SCAN:
+                    counted = ctx.inodes[target.name].add(entry_st) and not entry.is_symlink()
+                    if ctx.collect:
+                        visit.entries.append(Found(
+                            target.name, child_key or name, entry_path,
+                            entry_st.st_size if counted else 0, entry_st.st_atime, entry_st.st_mtime,
+                            entry_st.st_dev, entry_st.st_ino, entry_st.st_mtime_ns,
+                        ))
+                    if counted:
+                        credit(target, child_key or name, entry_st.st_size)
+                        top = visit.top_files.get(target.name)
+                        if top is None:
+                            top = visit.top_files[target.name] = TopN()
+                        top.push(entry_st.st_size, entry_path)
+                        own_size += entry_st.st_size
+                        own_files += 1
+                        files += 1
+                        freed += entry_st.st_size
+                    continue
+
+                result = visit.deleted.setdefault(target.name, DeleteResult())
+                if tally is not None or throttle is not None:
+                    started = time.perf_counter()
+                if tally is not None:
+                    unlinks += 1
+                try:
+                    if fd is not None:
+                        os.unlink(name, dir_fd=fd)
+                    else:
+                        os.unlink(entry_path)
+                except OSError as e:
+                    result.add_error(entry_path, e, size=entry_st.st_size)
+                    continue
+                finally:
+                    if tally is not None:
+                        unlink_seconds += time.perf_counter() - started
+                result.files += 1
+                files += 1
+                size = freed_size(ctx.inodes[target.name], entry_st)
+                result.bytes_freed += size
+                freed += size
+                if throttle is not None:
+                    waited += throttle.charge(1, entry_st.st_size, time.perf_counter() - started)
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+    if tally is not None:
+        tally.add(metrics.LIST, time.perf_counter() - listed - stat_seconds - unlink_seconds - waited)
+        if waited:
+            tally.add(metrics.THROTTLE, waited)
+        if stats:
+            tally.add(metrics.STAT, stat_seconds, stats)
+        if unlinks:
+            tally.add(metrics.UNLINK, unlink_seconds, unlinks)
+        tally.count("dirs_listed")
+        tally.count("errors", sum(visit.errors.values()))
+        tally.flush()
+
+    if ctx.mode == SCAN and simple and st is not None and not visit.cancelled:
+        top = visit.top_files.get(visit.owner_name)
+        visit.record = DirRecord(
+            st.st_dev, st.st_ino, st.st_mtime_ns, own_size, own_files, tuple(subdir_names),
+            tuple((size, os.path.basename(file_path)) for size, file_path in top.items()) if top else (),
+        )
+    if ctx.progress is not None:
+        ctx.progress.add(files, freed, path)
+    return visit
+
+
+def _run(targets, mode, index=None, max_workers=None, progress=None, collect=False):
+    """Walk the targets once, yielding (owner root, visit) for every directory.
+
+    In clear mode the folders emptied below a target root are removed
+    bottom-up as soon as their subtrees are done, each batch yielded as
+    (owner root, DeleteResult). With ``collect`` every counted file is listed
+    in ``visit.entries``, so the scan index cannot be used.
+    """
+    routes = _Routes([target for target in targets if target.path])
+    workers = max_workers or default_workers()
+    started_ns = time.time_ns()
+
+    cache = None
+    if mode == SCAN and index is not None and not collect:
+        cache = {}
+        for root in routes.walk_roots:
+            cache.update(index.load(root))
+    ctx = _Context(routes, mode, cache, progress, collect)
+
+    # Only what the index or the bottom-up removal needs is kept
+    records = {}
+    visited = set()
+    subtrees = _Subtrees() if mode == CLEAR else None
+    cancelled = False
+
+    starts = [(root, root) for root in routes.walk_roots if os.path.isdir(root)]
+    for path, owner, visit in _walk(starts, ctx, workers):
+        yield owner, visit
+        if cache is not None:
+            visited.add(path)
+            if visit.record is not None:
+                records[path] = visit.record
+        if visit.cancelled or (progress is not None and progress.cancelled):
+            cancelled = True
+            continue
+        if mode == CLEAR:
+            removed = _remove_emptied(subtrees, owner, visit, routes)
+            if removed is not None:
+                yield owner, removed
+
+    if cancelled:
+        return
+    if cache is not None:
+        for root in routes.walk_roots:
+            index.store(
+                root,
+                {path: record for path, record in records.items() if path == root or _inside(path, root)},
+                visited,
+                started_ns,
+            )
+
+
+def _walk(starts, ctx, workers):
+    """Visit the (path, owner) folders and everything below them in parallel,
+    yielding (path, owner, visit) as each finishes. Cancelled visits are not
+    descended into.
+
+    At most PENDING_PER_WORKER folders per worker are queued on the pool; the
+    rest wait on a stack, deepest first, so memory follows the depth of the
+    walk rather than its width.
+    """
+    limit = workers * PENDING_PER_WORKER
+    deferred = list(reversed(starts))
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while deferred or pending:
+            while deferred and len(pending) < limit:
+                path, owner = deferred.pop()
+                pending[pool.submit(_visit, path, owner, ctx)] = (path, owner)
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, owner = pending.pop(future)
+                visit = future.result()
+                yield path, owner, visit
+                if visit.cancelled or (ctx.progress is not None and ctx.progress.cancelled):
+                    deferred.clear()
+                    continue
+                deferred.extend(reversed(visit.subdirs))
+
+
+def _removable(dirs, routes):
+    """Return the (path, owner) folders a clear removes once emptied: those
+    below the root of an unfiltered target that hold no other target root."""
+    return [
+        (path, owner) for path, owner in dirs
+        if path != owner and routes.by_root[owner][0].include == ["*"] and not routes.holds_root(path)
+    ]
+
+
+def _remove_emptied(subtrees, owner, visit, routes, result=None):
+    """Remove the folders whose subtrees ``visit`` finished clearing, deepest
+    first; returns the DeleteResult, or None if there was nothing to remove."""
+    paths = [path for path, _ in _removable([(path, owner) for path, _ in subtrees.visited(owner, visit)], routes)]
+    if not paths:
+        return None
+    return remove_empty_dirs(paths, result)
+
+
+def _relist(path, owner, ctx, workers, progress):
+    """Retry a clear of a folder that could not be listed: the same filtered
+    walk from that folder, removing the folders it empties as it goes."""
+    result = DeleteResult()
+    subtrees = _Subtrees()
+    for _, _, visit in _walk([(path, owner)], ctx, workers):
+        for deleted in visit.deleted.values():
+            result.merge(deleted)
+        result.cancelled = result.cancelled or visit.cancelled
+        if not result.cancelled:
+            _remove_emptied(subtrees, owner, visit, ctx.routes, result)
+    return result
+
+
+class _Subtrees:
+    """Sums folder sizes bottom-up as the parallel walk finishes them.
+
+    Only folders with unfinished subfolders are held, so memory follows the
+    walk frontier rather than the size of the tree.
+    """
+
+    def __init__(self):
+        # path -> [bytes so far, unfinished subfolders, parent]
+        self._open = {}
+
+    def visited(self, owner, visit):
+        """Account for one visit; returns the (path, size) folders it completed."""
+        own = sum(size for size, files in visit.found.values())
+        children = 0 if visit.cancelled else sum(1 for sub, sub_owner in visit.subdirs if sub_owner == owner)
+        # A walk started below the owner root (a relisted folder) stops at its start
+        parent = os.path.dirname(visit.path) if visit.path != owner else None
+        if parent not in self._open:
+            parent = None
+        self._open[visit.path] = [own, children, parent]
+        completed = []
+        path = visit.path
+        while path is not None:
+            node = self._open[path]
+            if node[1]:
+                break
+            del self._open[path]
+            completed.append((path, node[0]))
+            path = node[2]
+            if path is not None:
+                self._open[path][0] += node[0]
+                self._open[path][1] -= 1
+        return completed
+
+
+def _largest(tops):
+    """Return name -> (largest dirs, largest files) as (size, path) lists."""
+    return {name: (dirs.items(), files.items()) for name, (dirs, files) in tops.items()}
+
+
+def scan_targets(targets, index=None, max_workers=None, progress=None, top_n=TOP_FILES):
+    """Measure the targets in one pass; returns name -> FolderTotal.
+
+    Each total carries the matching bytes and files of its target, the size
+    of every top-level entry below its root in ``children``, the ``top_n``
+    largest folders and files below the root and the target itself in
+    ``target``. While the scan runs the largest entries found so far are
+    published as the progress detail (see ``_largest``).
+    """
+    totals = {}
+    tops = {}
+    for target in targets:
+        total = FolderTotal(target.path)
+        total.target = target
+        total.exists = bool(target.path) and os.path.isdir(target.path)
+        totals[target.name] = total
+        tops[target.name] = (TopN(top_n), TopN(top_n))
+
+    subtrees = _Subtrees()
+    published = time.monotonic()
+    for owner, visit in _run(targets, SCAN, index, max_workers, progress):
+        if visit.reused:
+            totals[visit.owner_name].reused += 1
+        for (name, child), (size, files) in visit.found.items():
+            total = totals[name]
+            total.size += size
+            total.files += files
+            if child is not None:
+                total.children[child] = total.children.get(child, 0) + size
+        for name, count in visit.dirs.items():
+            totals[name].dirs += count
+        for name, count in visit.errors.items():
+            totals[name].errors += count
+        for name, top in visit.top_files.items():
+            for size, path in top.items():
+                if not tops[name][1].push(size, path):
+                    break
+        for path, size in subtrees.visited(owner, visit):
+            if path != owner:
+                tops[visit.owner_name][0].push(size, path)
+        if visit.cancelled:
+            for total in totals.values():
+                total.cancelled = True
+        if progress is not None and time.monotonic() - published >= progress.interval:
+            published = time.monotonic()
+            progress.set_detail(_largest(tops))
+
+    for name, (dirs, files) in _largest(tops).items():
+        totals[name].largest_dirs = dirs
+        totals[name].largest_files = files
+    if progress is not None:
+        progress.set_detail(_largest(tops))
+    return totals
+
+
+def collect_targets(targets, max_workers=None, progress=None):
+    """Walk the targets once, yielding a Found for every matching file.
+
+    Files are yielded in the calling thread, a directory at a time.
+    """
+    for owner, visit in _run(targets, SCAN, max_workers=max_workers, progress=progress, collect=True):
+        yield from visit.entries
+
+
+def clear_targets(targets, max_workers=None, progress=None):
+    """Delete the matching entries of the targets in one pass.
+
+    Returns name -> DeleteResult. Transient errors are retried at the end.
+    """
+    results = {}
+    for target in targets:
+        results[target.name] = DeleteResult(f"{target.label} cleared")
+        if not target.path or not os.path.isdir(target.path):
+            results[target.name].missing.append(target.path or target.root)
+
+    routes_owner = {}
+    for target in targets:
+        routes_owner.setdefault(target.path, target.name)
+
+    for owner, outcome in _run(targets, CLEAR, max_workers=max_workers, progress=progress):
+        if isinstance(outcome, DeleteResult):
+            results[routes_owner[owner]].merge(outcome)
+            continue
+        for name, result in outcome.deleted.items():
+            results[name].merge(result)
+        if outcome.cancelled:
+            for result in results.values():
+                result.cancelled = True
+
+    for result in results.values():
+        retry_errors(result, max_workers, progress)
+    return results
+
+
+def combine(results, title):
+    """Merge per-target results into one DeleteResult."""
+    combined = DeleteResult(title)
+    for result in results.values():
+        combined.merge(result)
+    return combined
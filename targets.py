@@ -0,0 +1,236 @@
+"""Registry of cache targets loaded from cache_targets.json.
+
+Each target names a root directory plus the rules that decide which entries
+below it may be removed:
+
+    name          unique identifier, used on the command line
+    label         display name
+    group         targets cleared together by one button (e.g. "adobe")
+    platforms     sys.platform values the target applies to (all if omitted)
+    root          directory; "~", ${VAR} and ${VAR:-default} are expanded
+    include       fnmatch patterns an entry must match (default: everything)
+    exclude       fnmatch patterns pruning entries and whole subtrees
+    min_age_days  only entries not modified for this many days
+    safety        "safe", "review" or "unsafe"
+    policy        optional eviction policy used instead of clearing everything
+                  when eviction is asked for (see policies.py), e.g.
+                  {"max_age_days": 30, "keep_newest_per_app": "500MB"}
+
+Patterns are matched against the path relative to the root with "/"
+separators; a pattern without "/" is also matched against the entry name.
+
+Targets are grouped per OS by "platforms": the macOS Library caches, the
+Windows temp, update and prefetch folders, and on Linux the XDG
+cache directory (${XDG_CACHE_HOME:-~/.cache}). Each platform's system cache
+shares the "system" group, so the same buttons and commands work everywhere.
+Browser caches are not listed here: browsers.py finds them per profile.
+
+Besides "targets" the file lists, per sys.platform, the folders holding
+installed applications ("app_dirs") and the per-user folders apps leave
+data in ("app_data_dirs"); orphans.py matches the one against the other,
+and the cleanups to run on a timer ("schedules", see scheduler.py).
+
+The shipped file can be extended by a cache_targets.json in the app data
+directory: targets and schedules with the same name replace the shipped
+ones, ``"enabled": false`` removes them, and a platform's folder list
+replaces the shipped list for that platform.
+"""
+import fnmatch
+import json
+import os
+import re
+import sys
+import time
+
+from app_paths import app_data_dir
+from policies import EvictionPolicy
+
+TARGETS_FILE = "cache_targets.json"
+
+SAFETY_LEVELS = ("safe", "review", "unsafe")
+
+# ${VAR:-default}: the default is used when VAR is unset or empty
+_DEFAULTED_VAR = re.compile(r"\$\{([^}:]+):-([^}]*)\}")
+
+
+def default_targets_path():
+    """Return the targets file shipped next to this module."""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), TARGETS_FILE)
+
+
+def user_targets_path():
+    """Return the optional per-user targets file."""
+    return os.path.join(app_data_dir(), TARGETS_FILE)
+
+
+def expand_root(root):
+    """Expand ~, ${VAR} and ${VAR:-default} in a root, returning None if a
+    variable without a default is unset."""
+    root = _DEFAULTED_VAR.sub(lambda m: os.getenv(m.group(1)) or m.group(2), root)
+    expanded = os.path.expandvars(os.path.expanduser(root))
+    if "${" in expanded:
+        return None
+    return os.path.normpath(expanded)
+
+
+class CacheTarget:
+    """One cache directory and the rules for what may be removed from it."""
+
+    def __init__(self, name, root, label=None, group=None, platforms=None,
+                 include=None, exclude=None, min_age_days=0, safety="safe", policy=None):
+        if safety not in SAFETY_LEVELS:
+            raise ValueError(f"Target {name}: unknown safety class {safety!r}")
+        self.name = name
+        self.root = root
+        self.label = label or name
+        self.group = group or name
+        self.platforms = platforms
+        self.include = list(include or ["*"])
+        self.exclude = list(exclude or [])
+        self.min_age_days = min_age_days
+        self.safety = safety
+        self.policy = EvictionPolicy.from_dict(policy) if isinstance(policy, dict) else policy
+        self.path = expand_root(root)
+
+    @classmethod
+    def from_dict(cls, data):
+        fields = dict(data)
+        fields.pop("enabled", None)
+        return cls(**fields)
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "label": self.label,
+            "group": self.group,
+            "platforms": self.platforms,
+            "root": self.root,
+            "include": self.include,
+            "exclude": self.exclude,
+            "min_age_days": self.min_age_days,
+            "safety": self.safety,
+            "policy": self.policy.to_dict() if self.policy else None,
+        }
+
+    @property
+    def applies(self):
+        """True if the target is meant for this OS and its root could be expanded."""
+        if self.path is None:
+            return False
+        return not self.platforms or any(sys.platform.startswith(p) for p in self.platforms)
+
+    @property
+    def unfiltered(self):
+        """True if every entry below the root belongs to the target."""
+        return self.include == ["*"] and not self.exclude and not self.min_age_days
+
+    def _match(self, patterns, rel_path, name):
+        for pattern in patterns:
+            if fnmatch.fnmatchcase(rel_path, pattern):
+                return True
+            if "/" not in pattern and fnmatch.fnmatchcase(name, pattern):
+                return True
+        return False
+
+    def excludes(self, rel_path, name):
+        return bool(self.exclude) and self._match(self.exclude, rel_path, name)
+
+    def matches(self, rel_path, name, st, now=None):
+        """Return True if an entry with this relative path and lstat may be removed."""
+        if self.excludes(rel_path, name):
+            return False
+        if self.include != ["*"] and not self._match(self.include, rel_path, name):
+            return False
+        if self.min_age_days:
+            cutoff = (now or time.time()) - self.min_age_days * 86400
+            if st.st_mtime > cutoff:
+                return False
+        return True
+
+    def __repr__(self):
+        return f"CacheTarget({self.name!r}, {self.path!r})"
+
+
+class TargetRegistry:
+    """Ordered collection of targets, selectable by name or group."""
+
+    def __init__(self, targets=()):
+        self.targets = {}
+        for target in targets:
+            self.targets[target.name] = target
+        # "app_dirs" / "app_data_dirs" -> platform -> list of roots
+        self.folders = {"app_dirs": {}, "app_data_dirs": {}}
+        # Schedule name -> its entry in the file, turned into a Schedule by scheduler.py
+        self.schedules = {}
+
+    @classmethod
+    def load(cls, paths=None):
+        """Load the shipped targets and any per-user overrides."""
+        if paths is None:
+            paths = [default_targets_path(), user_targets_path()]
+        registry = cls()
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("targets", []):
+                if item.get("enabled", True):
+                    registry.targets[item["name"]] = CacheTarget.from_dict(item)
+                else:
+                    registry.targets.pop(item["name"], None)
+            for key, lists in registry.folders.items():
+                lists.update(data.get(key, {}))
+            for item in data.get("schedules", []):
+                if item.get("enabled", True):
+                    registry.schedules[item["name"]] = item
+                else:
+                    registry.schedules.pop(item["name"], None)
+        return registry
+
+    def platform_folders(self, key):
+        """Return the expanded ``key`` folders listed for this platform."""
+        for platform, roots in self.folders[key].items():
+            if sys.platform.startswith(platform):
+                return [path for path in map(expand_root, roots) if path]
+        return []
+
+    def available(self):
+        """Targets that apply to this machine."""
+        return [target for target in self.targets.values() if target.applies]
+
+    def groups(self):
+        """Return group name -> list of applicable targets, in file order."""
+        groups = {}
+        for target in self.available():
+            groups.setdefault(target.group, []).append(target)
+        return groups
+
+    def select(self, names=None, max_safety="review"):
+        """Return the applicable targets matching target or group names.
+
+        Targets above ``max_safety`` are left out unless named explicitly.
+        """
+        limit = SAFETY_LEVELS.index(max_safety)
+        selected = []
+        for target in self.available():
+            if names is None:
+                wanted = SAFETY_LEVELS.index(target.safety) <= limit
+            elif target.name in names:
+                wanted = True
+            else:
+                wanted = target.group in names and SAFETY_LEVELS.index(target.safety) <= limit
+            if wanted:
+                selected.append(target)
+        return selected
+
+    def __iter__(self):
+        return iter(self.targets.values())
+
+    def __len__(self):
+        return len(self.targets)
+
+
+def load_registry():
+    """Return the registry from the default locations."""
+    return TargetRegistry.load()
@@ -1,67 +1,20 @@
+from startup_timing import StartupTimer
+
+# Started before the Qt import so the timing covers it
+STARTUP = StartupTimer()
+
 import os
-import shutil
 from PyQt5.QtWidgets import (
-    QApplication, QMainWindow, QVBoxLayout, QPushButton, QLabel, QTabWidget, QWidget, QProgressBar, QMessageBox, QListWidget
+    QApplication, QMainWindow, QVBoxLayout, QPushButton, QLabel, QTabWidget, QWidget, QProgressBar, QMessageBox,
+    QCheckBox, QTableView, QHeaderView, QFileDialog, QComboBox, QSystemTrayIcon, QMenu, QAction
 )
-from PyQt5.QtCore import Qt, QSettings
+from PyQt5.QtCore import Qt, QSettings, QTimer
 import sys
 
-def greet_user():
-    """Return the username for greeting."""
-    return os.path.expanduser("~").split("/")[-1]
+# The scan, delete and worker modules are imported on first use to keep
+# them off the path to the first window.
 
-def clear_cache():
-    """Clear cache files in ~/Library/Caches."""
-    cache_dir = os.path.expanduser("~/Library/Caches")
-    total_deleted = 0
-
-    if not os.path.exists(cache_dir):
-        return "Cache directory does not exist."
-
-    for item in os.listdir(cache_dir):
-        item_path = os.path.join(cache_dir, item)
-        try:
-            if os.path.isdir(item_path):
-                shutil.rmtree(item_path)
-            else:
-                os.remove(item_path)
-            total_deleted += 1
-        except Exception as e:
-            return f"Failed to delete {item_path}: {e}"
-
-    return f"Cache cleared. Total items deleted: {total_deleted}"
-
-def delete_app_folder(selected_folder):
-    """Delete a selected app folder."""
-    try:
-        shutil.rmtree(selected_folder)
-        return f"Deleted: {selected_folder}"
-    except Exception as e:
-        return f"Failed to delete {selected_folder}: {e}"
-
-def clear_adobe_media_cache():
-    """Clear Adobe media cache in specific folders."""
-    adobe_dirs = [
-        os.path.expanduser("~/Library/Application Support/Adobe/Media Cache"),
-        os.path.expanduser("~/Library/Application Support/Adobe/Media Cache Files"),
-        os.path.expanduser("~/Library/Application Support/Adobe/Peak Files")
-    ]
-
-    total_deleted = 0
-    for adobe_dir in adobe_dirs:
-        if os.path.exists(adobe_dir):
-            for item in os.listdir(adobe_dir):
-                item_path = os.path.join(adobe_dir, item)
-                try:
-                    if os.path.isdir(item_path):
-                        shutil.rmtree(item_path)
-                    else:
-                        os.remove(item_path)
-                    total_deleted += 1
-                except Exception as e:
-                    return f"Failed to clear {adobe_dir}: {e}"
-
-    return f"Adobe Media Cache cleared. Total items deleted: {total_deleted}"
+STARTUP.mark("imports")
 
 class CacheManagerApp(QMainWindow):
     def __init__(self):
@@ -72,38 +25,64 @@ class CacheManagerApp(QMainWindow):
         # Persistent settings
         self.settings = QSettings("CacheManagerApp", "Settings")
 
-        # Load theme
-        self.current_theme = self.settings.value("theme", "light")
-        self.apply_theme(self.current_theme)
-
-        # Tabs Setup
+        # Directory index for incremental scans, opened on the first scan
+        self.scan_index = None
+
+        # Running background workers by operation name, and the last scan results
+        self.workers = {}
+        self.system_cache_size = None
+        self.adobe_cache_size = None
+        # Folder watcher keeping the dashboard sizes live, when enabled there
+        self.watcher = None
+        # Scheduled cleanups and the tray icon shown while they are on
+        self.scheduler = None
+        self.tray = None
+        self.quitting = False
+
+        # Tabs Setup: each tab is an empty page filled in on first activation
         self.tabs = QTabWidget()
         self.setCentralWidget(self.tabs)
+        self.tab_builders = {}
+
+        self.add_lazy_tab("dashboard_tab", self.setup_dashboard_tab, "Dashboard")
+        self.add_lazy_tab("cache_tab", self.setup_cache_tab, "Manage Cache")
+        self.add_lazy_tab("adobe_tab", self.setup_adobe_tab, "Adobe Cache")
+        self.add_lazy_tab("delete_app_tab", self.setup_delete_app_tab, "Delete App Folder")
+        self.add_lazy_tab("diagnostics_tab", self.setup_diagnostics_tab, "Diagnostics")
+        self.add_lazy_tab("theme_tab", self.setup_theme_tab, "Theme")
+
+        self.tabs.currentChanged.connect(self.build_tab)
+        self.build_tab(self.tabs.currentIndex())
+
+        # Metrics and profiling stay off unless turned on in the Diagnostics tab
+        if self.settings.value("metrics", False, type=bool):
+            import metrics
+            metrics.enable()
+        if self.settings.value("profile", ""):
+            import profiling
+            profiling.set_mode(self.settings.value("profile"))
+        if self.settings.value("scheduler", False, type=bool):
+            self.start_scheduler()
+
+        # Load theme once the first widgets exist, so it is applied in one pass
+        self.current_theme = self.settings.value("theme", "light")
+        self.apply_theme(self.current_theme)
 
-        # Dashboard Tab
-        self.dashboard_tab = QWidget()
-        self.setup_dashboard_tab()
-        self.tabs.addTab(self.dashboard_tab, "Dashboard")
-
-        # Cache Management Tab
-        self.cache_tab = QWidget()
-        self.setup_cache_tab()
-        self.tabs.addTab(self.cache_tab, "Manage Cache")
-
-        # Adobe Cache Tab
-        self.adobe_tab = QWidget()
-        self.setup_adobe_tab()
-        self.tabs.addTab(self.adobe_tab, "Adobe Cache")
-
-        # Delete App Folder Tab
-        self.delete_app_tab = QWidget()
-        self.setup_delete_app_tab()
-        self.tabs.addTab(self.delete_app_tab, "Delete App Folder")
-
-        # Theme Tab
-        self.theme_tab = QWidget()
-        self.setup_theme_tab()
-        self.tabs.addTab(self.theme_tab, "Theme")
+    def add_lazy_tab(self, attribute, setup, title):
+        """Add an empty tab page whose contents are built by ``setup`` when first shown."""
+        page = QWidget()
+        setattr(self, attribute, page)
+        index = self.tabs.addTab(page, title)
+        self.tab_builders[index] = (title, setup)
+
+    def build_tab(self, index):
+        """Build a tab's widgets the first time it becomes current."""
+        builder = self.tab_builders.pop(index, None)
+        if builder is not None:
+            title, setup = builder
+            started = STARTUP.elapsed_ms()
+            setup()
+            STARTUP.mark("tab", tab=title, duration_ms=round(STARTUP.elapsed_ms() - started, 2))
 
     def setup_dashboard_tab(self):
         """Setup dashboard tab with basic information and cache scanning."""
@@ -111,22 +90,116 @@ class CacheManagerApp(QMainWindow):
         self.scan_button.clicked.connect(self.scan_cache)
         self.summary_label = QLabel("Cache sizes will appear here.")
         
+        # Largest folders and files table, created by the first scan
+        self.largest_model = None
+
+        # Live sizes from a folder watcher instead of repeated scans
+        self.watch_checkbox = QCheckBox("Keep sizes up to date")
+        self.watch_cleanup_checkbox = QCheckBox("Trim caches that outgrow their budget")
+        self.watch_cleanup_checkbox.setChecked(self.settings.value("watch_cleanup", False, type=bool))
+        self.watch_cleanup_checkbox.toggled.connect(self.toggle_watch_cleanup)
+        self.watch_checkbox.toggled.connect(self.toggle_watch)
+        self.watch_checkbox.setChecked(self.settings.value("watch_sizes", False, type=bool))
+
+        # Schedules from cache_targets.json, run from the tray while the window is closed
+        self.schedule_checkbox = QCheckBox("Run scheduled cleanups")
+        self.schedule_checkbox.setChecked(self.scheduler is not None)
+        self.schedule_checkbox.toggled.connect(self.toggle_scheduler)
+
+        # Growth per target from the scan and cleanup history
+        from charts import GrowthChart
+
+        self.growth_chart = GrowthChart()
+
         layout = QVBoxLayout()
         layout.addWidget(self.scan_button)
+        layout.addWidget(self.watch_checkbox)
+        layout.addWidget(self.watch_cleanup_checkbox)
+        layout.addWidget(self.schedule_checkbox)
         layout.addWidget(self.summary_label)
+        layout.addWidget(QLabel("Growth per day:"))
+        layout.addWidget(self.growth_chart)
         self.dashboard_tab.setLayout(layout)
 
+        # The history is read once the window is up, so it does not hold back the first paint
+        self.trends_stale = False
+        QTimer.singleShot(0, self.refresh_trends)
+
+    def refresh_trends(self):
+        """Redraw the growth chart from the history store, reading it in the background."""
+        # A refresh asked for while one runs is done again once it finishes
+        if "trends" in self.workers:
+            self.trends_stale = True
+            return
+
+        from cache_ops import dashboard_trends
+        from workers import TaskWorker
+
+        def on_finished(result):
+            if result is not None:
+                self.growth_chart.set_trends(*result)
+            if self.trends_stale:
+                self.trends_stale = False
+                self.refresh_trends()
+
+        worker = TaskWorker(dashboard_trends, ["system", "adobe"])
+        self.start_worker("trends", worker, lambda snapshot: None, on_finished)
+
+    def setup_largest_table(self):
+        """Add the sortable table of the largest folders and files to the dashboard."""
+        from models import LargestEntriesModel, sortable
+
+        self.largest_model = LargestEntriesModel(self)
+        self.largest_table = QTableView()
+        self.largest_table.setModel(sortable(self.largest_model, self))
+        self.largest_table.setSortingEnabled(True)
+        self.largest_table.sortByColumn(0, Qt.DescendingOrder)
+        self.largest_table.verticalHeader().hide()
+        self.largest_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.dashboard_tab.layout().addWidget(self.largest_table)
+
     def setup_cache_tab(self):
         """Setup cache management controls."""
         self.cache_progress = QProgressBar()
         self.cache_progress.setRange(0, 100)
 
+        self.cache_status_label = QLabel("")
+
+        # Trim by the targets' eviction policies instead of clearing everything
+        self.cache_evict_checkbox = QCheckBox("Keep recently used files")
+        self.cache_evict_checkbox.setChecked(self.settings.value("evict_cache", False, type=bool))
+        self.cache_evict_checkbox.toggled.connect(lambda checked: self.settings.setValue("evict_cache", checked))
+
+        # Low priority, rate-limited deletes that give way to other disk work
+        self.cache_background_checkbox = QCheckBox("Clean in the background (slower, keeps the computer responsive)")
+        self.cache_background_checkbox.setChecked(self.settings.value("background_cache", False, type=bool))
+        self.cache_background_checkbox.toggled.connect(
+            lambda checked: self.settings.setValue("background_cache", checked)
+        )
+
         self.clear_cache_button = QPushButton("Clear System Cache")
         self.clear_cache_button.clicked.connect(self.clear_system_cache)
 
+        self.preview_cache_button = QPushButton("Preview")
+        self.preview_cache_button.clicked.connect(self.preview_clear_system_cache)
+
+        # Cache folders of every browser profile; running browsers are skipped
+        self.clear_browser_button = QPushButton("Clear Browser Caches")
+        self.clear_browser_button.clicked.connect(self.clear_browser_caches)
+
+        self.cancel_cache_button = QPushButton("Cancel")
+        self.cancel_cache_button.setEnabled(False)
+        self.cancel_cache_button.clicked.connect(lambda: self.cancel_worker("cache"))
+
         layout = QVBoxLayout()
         layout.addWidget(self.cache_progress)
+        layout.addWidget(self.cache_status_label)
+        layout.addWidget(self.cache_evict_checkbox)
+        layout.addWidget(self.cache_background_checkbox)
+        layout.addWidget(self.preview_cache_button)
         layout.addWidget(self.clear_cache_button)
+        layout.addWidget(self.clear_browser_button)
+        layout.addWidget(self.cancel_cache_button)
         self.cache_tab.setLayout(layout)
 
     def setup_adobe_tab(self):
@@ -134,23 +207,115 @@ class CacheManagerApp(QMainWindow):
         self.adobe_progress = QProgressBar()
         self.adobe_progress.setRange(0, 100)
 
+        self.adobe_status_label = QLabel("")
+
+        # Trim by the targets' eviction policies instead of clearing everything
+        self.adobe_evict_checkbox = QCheckBox("Keep recently used files")
+        self.adobe_evict_checkbox.setChecked(self.settings.value("evict_adobe", False, type=bool))
+        self.adobe_evict_checkbox.toggled.connect(lambda checked: self.settings.setValue("evict_adobe", checked))
+
+        self.adobe_background_checkbox = QCheckBox("Clean in the background (slower, keeps the computer responsive)")
+        self.adobe_background_checkbox.setChecked(self.settings.value("background_adobe", False, type=bool))
+        self.adobe_background_checkbox.toggled.connect(
+            lambda checked: self.settings.setValue("background_adobe", checked)
+        )
+
         self.clear_adobe_button = QPushButton("Clear Adobe Cache")
         self.clear_adobe_button.clicked.connect(self.clear_adobe_cache)
 
+        self.preview_adobe_button = QPushButton("Preview")
+        self.preview_adobe_button.clicked.connect(self.preview_clear_adobe_cache)
+
+        # Identical files across the Adobe caches, found by staged hashing
+        self.adobe_duplicates_button = QPushButton("Find Duplicates")
+        self.adobe_duplicates_button.clicked.connect(self.find_adobe_duplicates)
+
+        # Compress the cache away instead of deleting it, so it need not be rebuilt
+        self.archive_adobe_button = QPushButton("Archive Adobe Cache")
+        self.archive_adobe_button.clicked.connect(self.archive_adobe_cache)
+        self.restore_adobe_button = QPushButton("Restore from Archive...")
+        self.restore_adobe_button.clicked.connect(self.restore_adobe_cache)
+
+        self.cancel_adobe_button = QPushButton("Cancel")
+        self.cancel_adobe_button.setEnabled(False)
+        self.cancel_adobe_button.clicked.connect(lambda: self.cancel_worker("adobe"))
+
         layout = QVBoxLayout()
         layout.addWidget(self.adobe_progress)
+        layout.addWidget(self.adobe_status_label)
+        layout.addWidget(self.adobe_evict_checkbox)
+        layout.addWidget(self.adobe_background_checkbox)
+        layout.addWidget(self.preview_adobe_button)
         layout.addWidget(self.clear_adobe_button)
+        layout.addWidget(self.archive_adobe_button)
+        layout.addWidget(self.restore_adobe_button)
+        layout.addWidget(self.adobe_duplicates_button)
+        layout.addWidget(self.cancel_adobe_button)
         self.adobe_tab.setLayout(layout)
 
     def setup_delete_app_tab(self):
         """Setup delete app folder controls."""
-        self.delete_folder_button = QPushButton("Scan & Select App Folder to Delete")
+        self.delete_folder_button = QPushButton("Scan & Select App Folders to Delete")
         self.delete_folder_button.clicked.connect(self.scan_and_show_app_folders)
 
+        # Progress of deleting the folders chosen in the dialog, as one job
+        self.delete_app_progress = QProgressBar()
+        self.delete_app_progress.setRange(0, 100)
+        self.delete_app_status_label = QLabel("")
+        self.cancel_delete_app_button = QPushButton("Cancel")
+        self.cancel_delete_app_button.setEnabled(False)
+        self.cancel_delete_app_button.clicked.connect(lambda: self.cancel_worker("delete_app"))
+
+        self.find_orphans_button = QPushButton("Find Leftovers of Removed Apps")
+        self.find_orphans_button.clicked.connect(self.find_orphaned_folders)
+
+        self.orphans_status_label = QLabel("")
+
         layout = QVBoxLayout()
+        layout.addWidget(self.delete_app_progress)
+        layout.addWidget(self.delete_app_status_label)
         layout.addWidget(self.delete_folder_button)
+        layout.addWidget(self.cancel_delete_app_button)
+        layout.addWidget(self.find_orphans_button)
+        layout.addWidget(self.orphans_status_label)
         self.delete_app_tab.setLayout(layout)
 
+    def setup_diagnostics_tab(self):
+        """Setup performance metrics and profiling controls."""
+        import metrics
+        import profiling
+
+        self.metrics_checkbox = QCheckBox("Record performance metrics")
+        self.metrics_checkbox.setChecked(metrics.ENABLED)
+        self.metrics_checkbox.toggled.connect(self.toggle_metrics)
+
+        self.profile_combo = QComboBox()
+        self.profile_combo.addItem("Profiling off", "")
+        self.profile_combo.addItem("Profile CPU time", profiling.CPU)
+        self.profile_combo.addItem("Profile memory", profiling.MEMORY)
+        self.profile_combo.setCurrentIndex(max(0, self.profile_combo.findData(profiling.MODE or "")))
+        self.profile_combo.currentIndexChanged.connect(self.change_profile_mode)
+
+        self.refresh_metrics_button = QPushButton("Refresh")
+        self.refresh_metrics_button.clicked.connect(self.show_metrics)
+        self.export_metrics_button = QPushButton("Export Metrics...")
+        self.export_metrics_button.clicked.connect(self.export_metrics)
+        self.reset_metrics_button = QPushButton("Reset Metrics")
+        self.reset_metrics_button.clicked.connect(self.reset_metrics)
+
+        self.metrics_label = QLabel("")
+        self.metrics_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.metrics_checkbox)
+        layout.addWidget(self.profile_combo)
+        layout.addWidget(self.refresh_metrics_button)
+        layout.addWidget(self.export_metrics_button)
+        layout.addWidget(self.reset_metrics_button)
+        layout.addWidget(self.metrics_label)
+        self.diagnostics_tab.setLayout(layout)
+        self.show_metrics()
+
     def setup_theme_tab(self):
         """Setup theme tab with options to toggle between themes."""
         self.light_theme_button = QPushButton("Light Theme")
@@ -201,87 +366,651 @@ class CacheManagerApp(QMainWindow):
         self.apply_theme("dark")
         self.settings.setValue("theme", "dark")
 
+    def toggle_metrics(self, checked):
+        """Turn metrics recording on or off and remember the choice."""
+        import metrics
+
+        self.settings.setValue("metrics", checked)
+        metrics.enable(checked)
+        self.show_metrics()
+
+    def change_profile_mode(self, index):
+        """Profile the following jobs by the selected mode."""
+        import profiling
+
+        mode = self.profile_combo.itemData(index) or None
+        self.settings.setValue("profile", mode or "")
+        profiling.set_mode(mode)
+        self.show_metrics()
+
+    def show_metrics(self):
+        """Show the time spent per phase so far and the last profile report."""
+        import metrics
+        import profiling
+
+        lines = [
+            f"{phase}: {calls:,} calls, {seconds:.3f} s"
+            for phase, (calls, seconds) in sorted(metrics.summary().items())
+        ]
+        if not lines:
+            lines.append("No metrics recorded." if metrics.ENABLED else "Metrics are off.")
+        if profiling.MODE:
+            lines.append(f"Profile reports go to {profiling.reports_dir()}")
+        if profiling.last_report:
+            lines.append(f"Last report: {profiling.last_report}")
+        self.metrics_label.setText("\n".join(lines))
+
+    def export_metrics(self):
+        """Write the metrics to a JSON or Prometheus text file."""
+        import metrics
+
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", "cachemgr-metrics.json", "JSON (*.json);;Prometheus text (*.prom)"
+        )
+        if not path:
+            return
+        try:
+            metrics.write(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Could not write {path}: {e}")
+            return
+        self.statusBar().showMessage(f"Metrics written to {path}", 5000)
+
+    def reset_metrics(self):
+        """Clear the metrics recorded so far."""
+        import metrics
+
+        metrics.reset()
+        self.show_metrics()
+
+    def start_worker(self, name, worker, on_progress, on_finished):
+        """Run a worker in the background and forget it once it is done."""
+        def finished(result):
+            self.workers.pop(name, None)
+            on_finished(result)
+
+        def failed(error):
+            self.workers.pop(name, None)
+            on_finished(None)
+            QMessageBox.warning(self, "Error", error)
+
+        self.workers[name] = worker
+        worker.signals.progress.connect(on_progress)
+        worker.signals.finished.connect(finished)
+        worker.signals.failed.connect(failed)
+        worker.start()
+
+    def cancel_worker(self, name):
+        """Ask a running worker to stop."""
+        worker = self.workers.get(name)
+        if worker is not None:
+            worker.cancel()
+
+    def show_progress(self, progress_bar, status_label, snapshot):
+        """Show items, bytes, throughput and the current path of a running worker."""
+        import metrics
+
+        with metrics.timer(metrics.UI):
+            if snapshot.percent is not None:
+                progress_bar.setValue(snapshot.percent)
+            rate = self.human_readable_size(snapshot.bytes_per_second)
+            progress_bar.setFormat(f"%p%  {rate}/s")
+            path = status_label.fontMetrics().elidedText(snapshot.path, Qt.ElideMiddle, status_label.width())
+            status_label.setText(
+                f"{snapshot.items} items, {self.human_readable_size(snapshot.bytes)} at {rate}/s\n{path}"
+            )
+
+    def background_throttle(self, checkbox):
+        """Return a Throttle for background mode if ``checkbox`` is ticked, else None."""
+        if not checkbox.isChecked():
+            return None
+        from throttle import Throttle
+
+        return Throttle()
+
+    def run_clear(self, name, fn, size_attr, progress_bar, status_label, buttons, cancel_button, title,
+                  evict=False, plan=None, throttle=None):
+        """Run a clear function, or apply a plan, in the background, driving its progress widgets."""
+        if plan is not None:
+            total_bytes = plan.total_bytes
+        else:
+            # Eviction frees an unknown share of the scanned size, so it gets a busy bar too
+            total_bytes = None if evict else getattr(self, size_attr)
+        # Without a previous scan the total is unknown, so show a busy bar
+        if total_bytes:
+            progress_bar.setRange(0, 100)
+        else:
+            progress_bar.setRange(0, 0)
+        progress_bar.setValue(0)
+        for button in buttons:
+            button.setEnabled(False)
+        cancel_button.setEnabled(True)
+
+        def on_progress(snapshot):
+            self.show_progress(progress_bar, status_label, snapshot)
+
+        def on_finished(result):
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(100)
+            for button in buttons:
+                button.setEnabled(True)
+            cancel_button.setEnabled(False)
+            # The scanned size is stale once anything was deleted
+            setattr(self, size_attr, None)
+            if result is not None:
+                QMessageBox.information(self, title, str(result))
+
+        from workers import TaskWorker
+
+        if plan is not None:
+            from cache_ops import apply_plan
+
+            worker = TaskWorker(apply_plan, plan, title, total_bytes=total_bytes, throttle=throttle)
+        else:
+            worker = TaskWorker(fn, total_bytes=total_bytes, throttle=throttle, evict=evict)
+        self.start_worker(name, worker, on_progress, on_finished)
+
+    def run_preview(self, name, plan_fn, size_attr, progress_bar, status_label, buttons, cancel_button, title,
+                    evict=False, background_checkbox=None):
+        """Plan a clear in the background and apply the plan once confirmed."""
+        progress_bar.setRange(0, 0)
+        for button in buttons:
+            button.setEnabled(False)
+        cancel_button.setEnabled(True)
+
+        def on_progress(snapshot):
+            self.show_progress(progress_bar, status_label, snapshot)
+
+        def on_finished(plan):
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            for button in buttons:
+                button.setEnabled(True)
+            cancel_button.setEnabled(False)
+            if plan is None or plan.cancelled:
+                status_label.setText("Preview cancelled.")
+                return
+            status_label.setText(plan.summary().splitlines()[0])
+            answer = QMessageBox.question(
+                self, title, f"{plan.summary()}\n\nDelete these files now?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if answer == QMessageBox.Yes:
+                self.run_clear(
+                    name, None, size_attr, progress_bar, status_label, buttons, cancel_button, title, plan=plan,
+                    throttle=self.background_throttle(background_checkbox) if background_checkbox else None,
+                )
+
+        from workers import TaskWorker
+
+        worker = TaskWorker(plan_fn, evict=evict)
+        self.start_worker(name, worker, on_progress, on_finished)
+
     def clear_system_cache(self):
-        result = clear_cache()
-        QMessageBox.information(self, "Clear Cache", result)
+        from cache_ops import clear_cache
+
+        self.run_clear(
+            "cache", clear_cache, "system_cache_size", self.cache_progress, self.cache_status_label,
+            self.cache_buttons(), self.cancel_cache_button, "Clear Cache",
+            evict=self.cache_evict_checkbox.isChecked(),
+            throttle=self.background_throttle(self.cache_background_checkbox),
+        )
+
+    def cache_buttons(self):
+        """Buttons of the Manage Cache tab that start a job."""
+        return (self.clear_cache_button, self.preview_cache_button, self.clear_browser_button)
+
+    def clear_browser_caches(self):
+        """Clear the caches of all browser profiles whose browser is not running."""
+        from cache_ops import clear_browser_cache
+
+        def on_cleared(result):
+            if result is not None:
+                QMessageBox.information(self, "Clear Browser Caches", str(result))
+
+        self.run_task(
+            "cache", clear_browser_cache, self.cache_buttons(), self.cache_progress, self.cache_status_label,
+            self.cancel_cache_button, on_cleared, throttle=self.background_throttle(self.cache_background_checkbox)
+        )
+
+    def preview_clear_system_cache(self):
+        from cache_ops import plan_cache
+
+        self.run_preview(
+            "cache", plan_cache, "system_cache_size", self.cache_progress, self.cache_status_label,
+            self.cache_buttons(), self.cancel_cache_button, "Clear Cache",
+            evict=self.cache_evict_checkbox.isChecked(), background_checkbox=self.cache_background_checkbox,
+        )
+
+    def adobe_buttons(self):
+        """Buttons of the Adobe tab, disabled while any of their jobs runs."""
+        return (
+            self.clear_adobe_button, self.preview_adobe_button, self.archive_adobe_button,
+            self.restore_adobe_button, self.adobe_duplicates_button,
+        )
 
     def clear_adobe_cache(self):
-        result = clear_adobe_media_cache()
-        QMessageBox.information(self, "Clear Adobe Media Cache", result)
+        from cache_ops import clear_adobe_media_cache
 
-    def scan_cache(self):
-        """Scan cache sizes and update the summary label."""
-        system_cache_dir = os.path.expanduser("~/Library/Caches")
-        adobe_dirs = [
-            os.path.expanduser("~/Library/Application Support/Adobe/Media Cache"),
-            os.path.expanduser("~/Library/Application Support/Adobe/Media Cache Files"),
-            os.path.expanduser("~/Library/Application Support/Adobe/Peak Files")
-        ]
+        self.run_clear(
+            "adobe", clear_adobe_media_cache, "adobe_cache_size", self.adobe_progress, self.adobe_status_label,
+            self.adobe_buttons(), self.cancel_adobe_button,
+            "Clear Adobe Media Cache", evict=self.adobe_evict_checkbox.isChecked(),
+            throttle=self.background_throttle(self.adobe_background_checkbox),
+        )
+
+    def preview_clear_adobe_cache(self):
+        from cache_ops import plan_adobe_media_cache
+
+        self.run_preview(
+            "adobe", plan_adobe_media_cache, "adobe_cache_size", self.adobe_progress, self.adobe_status_label,
+            self.adobe_buttons(), self.cancel_adobe_button,
+            "Clear Adobe Media Cache", evict=self.adobe_evict_checkbox.isChecked(),
+            background_checkbox=self.adobe_background_checkbox,
+        )
+
+    def archive_adobe_cache(self):
+        """Archive the Adobe caches in the background, then delete the archived files."""
+        from cache_ops import archive_adobe_media_cache
+
+        def on_archived(result):
+            # The scanned size is stale once anything was deleted
+            self.adobe_cache_size = None
+            if result is not None:
+                archive, deleted = result
+                QMessageBox.information(self, "Archive Adobe Media Cache", f"{deleted}\n\n{archive}")
+
+        self.run_task(
+            "adobe", archive_adobe_media_cache, self.adobe_buttons(), self.adobe_progress, self.adobe_status_label,
+            self.cancel_adobe_button, on_archived, evict=self.adobe_evict_checkbox.isChecked(),
+            throttle=self.background_throttle(self.adobe_background_checkbox),
+        )
+
+    def restore_adobe_cache(self):
+        """Put the files of a chosen archive back where they were."""
+        from archiver import archives_dir
+        from cache_ops import restore_from_archive
 
-        system_cache_size = 0
-        adobe_cache_size = 0
+        path = QFileDialog.getExistingDirectory(self, "Choose Archive", archives_dir())
+        if not path:
+            return
 
-        # Calculate system cache size
-        if os.path.exists(system_cache_dir):
-            system_cache_size = self.get_folder_size(system_cache_dir)
+        def on_restored(result):
+            self.adobe_cache_size = None
+            if result is not None:
+                QMessageBox.information(self, "Restore Adobe Media Cache", str(result))
 
-        # Calculate Adobe cache size
-        for adobe_dir in adobe_dirs:
-            if os.path.exists(adobe_dir):
-                adobe_cache_size += self.get_folder_size(adobe_dir)
+        self.run_task(
+            "adobe", restore_from_archive, self.adobe_buttons(), self.adobe_progress, self.adobe_status_label,
+            self.cancel_adobe_button, on_restored, path
+        )
 
-        # Update summary
-        self.summary_label.setText(
-            f"\nSystem Cache: {self.human_readable_size(system_cache_size)}\n"
-            f"Adobe Cache: {self.human_readable_size(adobe_cache_size)}\n"
+    def find_adobe_duplicates(self):
+        """Find identical files in the Adobe caches and offer to hard-link the copies."""
+        from cache_ops import find_duplicate_files
+        from duplicates import link_duplicates
+        from scan_index import ScanIndex
+
+        buttons = self.adobe_buttons()
+
+        def on_found(groups):
+            if not groups:
+                if groups is not None:
+                    QMessageBox.information(self, "Find Duplicates", "No duplicate files found.")
+                return
+            copies = sum(len(group.copies) for group in groups)
+            size = self.human_readable_size(sum(group.reclaimable for group in groups))
+            answer = QMessageBox.question(
+                self, "Find Duplicates",
+                f"{copies} copies in {len(groups)} groups use {size}.\n\n"
+                "Replace the copies with hard links to one file?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if answer == QMessageBox.Yes:
+                self.run_task(
+                    "adobe", link_duplicates, buttons, self.adobe_progress, self.adobe_status_label,
+                    self.cancel_adobe_button, lambda result: QMessageBox.information(
+                        self, "Find Duplicates", str(result)
+                    ) if result is not None else None, groups
+                )
+
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        self.run_task(
+            "adobe", find_duplicate_files, buttons, self.adobe_progress, self.adobe_status_label,
+            self.cancel_adobe_button, on_found, ["adobe"], index=self.scan_index
         )
 
+    def run_task(self, name, fn, buttons, progress_bar, status_label, cancel_button, on_done, *args, **kwargs):
+        """Run ``fn`` in the background with a busy bar, then hand its result to ``on_done``."""
+        from workers import TaskWorker
+
+        progress_bar.setRange(0, 0)
+        for button in buttons:
+            button.setEnabled(False)
+        cancel_button.setEnabled(True)
+
+        def on_progress(snapshot):
+            self.show_progress(progress_bar, status_label, snapshot)
+
+        def on_finished(result):
+            progress_bar.setRange(0, 100)
+            progress_bar.setValue(0)
+            for button in buttons:
+                button.setEnabled(True)
+            cancel_button.setEnabled(False)
+            on_done(result)
+
+        self.start_worker(name, TaskWorker(fn, *args, **kwargs), on_progress, on_finished)
+
+    def scan_cache(self):
+        """Scan cache sizes in the background and update the summary label."""
+        # A second click while scanning cancels the running scan
+        if "scan" in self.workers:
+            self.cancel_worker("scan")
+            return
+
+        from cache_ops import registry, scan_groups
+        from scan_index import ScanIndex
+        from workers import TaskWorker
+
+        def group_size(totals, group):
+            return sum(total.size for total in totals.values() if total.target.group == group)
+
+        if self.largest_model is None:
+            self.setup_largest_table()
+        labels = {target.name: target.label for target in registry().select(["system", "adobe"])}
+
+        def on_progress(snapshot):
+            self.summary_label.setText(
+                f"Scanning... {snapshot.items} files, {self.human_readable_size(snapshot.bytes)}"
+            )
+            if snapshot.detail is not None:
+                self.largest_model.set_largest(snapshot.detail, labels)
+
+        def on_finished(totals):
+            self.scan_button.setText("Scan Cache")
+            if totals is None:
+                return
+            self.largest_model.set_largest(
+                {name: (total.largest_dirs, total.largest_files) for name, total in totals.items()}, labels
+            )
+            system_cache_size = group_size(totals, "system")
+            adobe_cache_size = group_size(totals, "adobe")
+            cancelled = any(total.cancelled for total in totals.values())
+            if not cancelled:
+                self.system_cache_size = system_cache_size
+                self.adobe_cache_size = adobe_cache_size
+                self.refresh_trends()
+
+            # Update summary
+            self.summary_label.setText(
+                ("\nScan cancelled, partial sizes:" if cancelled else "") +
+                f"\nSystem Cache: {self.human_readable_size(system_cache_size)}\n"
+                f"Adobe Cache: {self.human_readable_size(adobe_cache_size)}\n"
+            )
+
+        # Measure every target in one parallel pass, reusing unchanged directories
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        worker = TaskWorker(scan_groups, ["system", "adobe"], index=self.scan_index, record=True)
+        self.scan_button.setText("Cancel Scan")
+        self.start_worker("scan", worker, on_progress, on_finished)
+
+    def toggle_watch(self, checked):
+        """Start or stop the watcher that keeps the dashboard sizes current."""
+        self.settings.setValue("watch_sizes", checked)
+        if self.watcher is not None:
+            # Not joined: a first walk still running must not block the GUI
+            self.watch_signals.changed.disconnect()
+            self.watch_signals.cleaned.disconnect()
+            self.watcher.stop(timeout=0)
+            self.watcher = None
+        if not checked:
+            return
+
+        from cache_ops import registry, watch_groups
+        from throttle import Throttle
+        from workers import WatchSignals
+
+        groups = {target.name: target.group for target in registry().select(["system", "adobe"])}
+
+        def on_change(totals):
+            def group_size(group):
+                return sum(size for name, (size, files) in totals.items() if groups.get(name) == group)
+
+            self.system_cache_size = group_size("system")
+            self.adobe_cache_size = group_size("adobe")
+            self.summary_label.setText(
+                f"\nSystem Cache: {self.human_readable_size(self.system_cache_size)}\n"
+                f"Adobe Cache: {self.human_readable_size(self.adobe_cache_size)}\n"
+            )
+
+        def on_cleaned(name, result):
+            self.statusBar().showMessage(result.summary().splitlines()[0], 10000)
+
+        self.watch_signals = WatchSignals()
+        self.watch_signals.changed.connect(on_change)
+        self.watch_signals.cleaned.connect(on_cleaned)
+        self.summary_label.setText("Measuring...")
+        self.watcher = watch_groups(
+            ["system", "adobe"], on_change=self.watch_signals.changed.emit,
+            cleanup=self.watch_cleanup_checkbox.isChecked(), on_cleanup=self.watch_signals.cleaned.emit,
+            throttle=Throttle(),
+        )
+
+    def toggle_watch_cleanup(self, checked):
+        self.settings.setValue("watch_cleanup", checked)
+        if self.watcher is not None:
+            self.watcher.cleanup = checked
+
+    def toggle_scheduler(self, checked):
+        self.settings.setValue("scheduler", checked)
+        if checked and self.scheduler is None:
+            self.start_scheduler()
+        elif not checked and self.scheduler is not None:
+            self.stop_scheduler()
+
+    def start_scheduler(self):
+        """Run the configured schedules in the background, with a tray icon where there is a tray."""
+        from cache_ops import start_scheduler
+        from workers import ScheduleSignals
+
+        self.schedule_signals = ScheduleSignals()
+        self.schedule_signals.ran.connect(self.on_scheduled_run)
+        self.schedule_signals.failed.connect(self.on_scheduled_error)
+        self.scheduler = start_scheduler(self.schedule_signals.ran.emit, on_error=self.schedule_signals.failed.emit)
+        if self.tray is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.setup_tray()
+        if self.tray is not None:
+            self.tray.show()
+
+    def stop_scheduler(self):
+        self.schedule_signals.ran.disconnect()
+        self.schedule_signals.failed.disconnect()
+        # Not joined: a cleanup still running must not block the GUI
+        self.scheduler.stop(timeout=0)
+        self.scheduler = None
+        if self.tray is not None:
+            self.tray.hide()
+
+    def setup_tray(self):
+        """Create the tray icon and its menu."""
+        from PyQt5.QtGui import QIcon
+
+        icon = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Images", "Icon", "icon.png")
+        self.tray = QSystemTrayIcon(QIcon(icon), self)
+        self.tray.setToolTip("Cache Manager")
+        menu = QMenu(self)
+        show_action = QAction("Show Cache Manager", menu)
+        show_action.triggered.connect(self.showNormal)
+        run_action = QAction("Run Scheduled Cleanups Now", menu)
+        run_action.triggered.connect(lambda: self.scheduler is not None and self.scheduler.run_now())
+        quit_action = QAction("Quit", menu)
+        quit_action.triggered.connect(self.quit_from_tray)
+        for action in (show_action, run_action, quit_action):
+            menu.addAction(action)
+        self.tray.setContextMenu(menu)
+        self.tray.activated.connect(lambda reason: reason == QSystemTrayIcon.Trigger and self.showNormal())
+
+    def quit_from_tray(self):
+        self.quitting = True
+        self.close()
+
+    def on_scheduled_run(self, schedule, results):
+        """Report a finished scheduled run and refresh what it made stale."""
+        freed = sum(result.bytes_freed for result in results.values())
+        errors = sum(len(result.errors) for result in results.values())
+        message = f"Scheduled cleanup \"{schedule.name}\" freed {self.human_readable_size(freed)}"
+        if errors:
+            message += f", {errors} items could not be deleted"
+        self.statusBar().showMessage(message, 10000)
+        if self.tray is not None and self.isHidden():
+            self.tray.showMessage("Cache Manager", message, QSystemTrayIcon.Information, 5000)
+        # The scanned sizes are stale once anything was deleted
+        self.system_cache_size = None
+        self.adobe_cache_size = None
+        if hasattr(self, "growth_chart"):
+            self.refresh_trends()
+
+    def on_scheduled_error(self, schedule, error):
+        """Report a scheduled run that failed; the scheduler tries it again later."""
+        name = f"\"{schedule.name}\"" if schedule is not None else "run"
+        message = f"Scheduled cleanup {name} failed: {error}"
+        self.statusBar().showMessage(message, 10000)
+        if self.tray is not None and self.isHidden():
+            self.tray.showMessage("Cache Manager", message, QSystemTrayIcon.Warning, 5000)
+
+    def closeEvent(self, event):
+        # With schedules on, closing the window leaves the app running in the tray
+        if self.scheduler is not None and self.tray is not None and self.tray.isVisible() and not self.quitting:
+            event.ignore()
+            self.hide()
+            return
+        if self.scheduler is not None:
+            self.scheduler.stop(timeout=1.0)
+        if self.watcher is not None:
+            self.watcher.stop(timeout=1.0)
+        super().closeEvent(event)
+
     def scan_and_show_app_folders(self):
-        """Scan and list the app folders in ~/Library/Application Support for deletion."""
-        base_dir = os.path.expanduser("~/Library/Application Support")
-        if not os.path.exists(base_dir):
+        """Scan and list the per-app data folders (~/Library/Application Support) for deletion."""
+        from cache_ops import app_support_dir
+        from dialogs import AppFolderDialog
+        from scan_index import ScanIndex
+
+        base_dir = app_support_dir()
+        if not base_dir or not os.path.exists(base_dir):
             QMessageBox.warning(self, "Error", "Base directory does not exist.")
             return
 
-        folders = [f for f in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, f))]
-        if not folders:
+        # The dialog opens at once; folders and their sizes stream in behind it
+        if self.scan_index is None:
+            self.scan_index = ScanIndex()
+        dialog = AppFolderDialog(base_dir, self, index=self.scan_index, multi_select=True)
+
+        def on_empty():
+            dialog.close()
             QMessageBox.information(self, "Delete Folder", "No app folders found to delete.")
-            return
 
-        # Create a dialog to list folders for deletion
-        dialog = QListWidget(self)
-        dialog.addItems(folders)
-        dialog.setWindowTitle("Select Folder to Delete")
-        dialog.setMinimumSize(300, 400)
+        def on_delete_requested(paths):
+            sizes = [size for path, size in dialog.selected()]
+            # A folder still being measured leaves the total unknown
+            total_bytes = sum(sizes) if all(size >= 0 for size in sizes) else None
+            self.delete_selected_app_folders(paths, total_bytes)
+
+        dialog.empty.connect(on_empty)
+        dialog.delete_requested.connect(on_delete_requested)
         dialog.show()
 
-        def on_item_selected(item):
-            folder_name = item.text()
-            folder_path = os.path.join(base_dir, folder_name)
-            result = delete_app_folder(folder_path)
-            QMessageBox.information(self, "Delete App Folder", result)
-            dialog.close()
+    def delete_selected_app_folders(self, paths, total_bytes=None):
+        """Delete app folders in one background job and report a single summary."""
+        from cache_ops import delete_app_folders
+        from workers import TaskWorker
+
+        buttons = (self.delete_folder_button, self.find_orphans_button)
+        self.delete_app_progress.setRange(0, 100 if total_bytes else 0)
+        self.delete_app_progress.setValue(0)
+        for button in buttons:
+            button.setEnabled(False)
+        self.cancel_delete_app_button.setEnabled(True)
+
+        def on_progress(snapshot):
+            self.show_progress(self.delete_app_progress, self.delete_app_status_label, snapshot)
+
+        def on_finished(result):
+            self.delete_app_progress.setRange(0, 100)
+            self.delete_app_progress.setValue(100 if result is not None and not result.cancelled else 0)
+            for button in buttons:
+                button.setEnabled(True)
+            self.cancel_delete_app_button.setEnabled(False)
+            if result is not None:
+                self.delete_app_status_label.setText(result.summary().splitlines()[0])
+                QMessageBox.information(self, "Delete App Folders", str(result))
+
+        worker = TaskWorker(delete_app_folders, paths, total_bytes=total_bytes)
+        self.start_worker("delete_app", worker, on_progress, on_finished)
+
+    def find_orphaned_folders(self):
+        """Rank app data left by uninstalled apps in the background, then offer to delete it."""
+        # A second click while searching cancels the search
+        if "orphans" in self.workers:
+            self.cancel_worker("orphans")
+            return
 
-        dialog.itemClicked.connect(on_item_selected)
+        from cache_ops import delete_app_folders, find_orphaned_folders
+        from dialogs import OrphanDialog
+        from workers import TaskWorker
+
+        def on_progress(snapshot):
+            self.orphans_status_label.setText(
+                f"Measuring... {snapshot.items} files, {self.human_readable_size(snapshot.bytes)}"
+            )
+
+        def on_deleted(result):
+            self.find_orphans_button.setEnabled(True)
+            self.orphans_status_label.setText("")
+            if result is not None:
+                QMessageBox.information(self, "Delete App Folders", str(result))
+
+        def on_delete_requested(paths):
+            self.find_orphans_button.setEnabled(False)
+            worker = TaskWorker(delete_app_folders, paths)
+            self.start_worker("orphans", worker, on_progress, on_deleted)
+
+        def on_found(orphans):
+            self.find_orphans_button.setText("Find Leftovers of Removed Apps")
+            self.orphans_status_label.setText("")
+            if orphans is None:
+                return
+            if not orphans:
+                QMessageBox.information(self, "Orphaned App Data", "No leftovers of removed apps found.")
+                return
+            dialog = OrphanDialog(orphans, self)
+            dialog.delete_requested.connect(on_delete_requested)
+            dialog.show()
+
+        worker = TaskWorker(find_orphaned_folders)
+        self.find_orphans_button.setText("Cancel Search")
+        self.start_worker("orphans", worker, on_progress, on_found)
 
     def get_folder_size(self, folder_path):
         """Recursively calculate folder size."""
-        total_size = 0
-        for dirpath, dirnames, filenames in os.walk(folder_path):
-            for filename in filenames:
-                file_path = os.path.join(dirpath, filename)
-                total_size += os.path.getsize(file_path)
-        return total_size
+        from size_engine import folder_size
+
+        return folder_size(folder_path)
 
     def human_readable_size(self, size):
         """Convert size in bytes to human-readable format."""
-        for unit in ["B", "KB", "MB", "GB", "TB"]:
-            if size < 1024.0:
-                return f"{size:.2f} {unit}"
-            size /= 1024.0
+        from size_engine import human_readable_size
+
+        return human_readable_size(size)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
     main_window = CacheManagerApp()
+    STARTUP.mark("window_constructed")
     main_window.show()
+    # Runs once the event loop has processed the first show and paint
+    QTimer.singleShot(0, lambda: STARTUP.mark("first_window"))
     sys.exit(app.exec_())
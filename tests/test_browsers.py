@@ -0,0 +1,78 @@
+"""Browser profile discovery and cache clearing on a fake home folder."""
+import json
+import os
+import sys
+
+import pytest
+
+from browsers import clear_browser_caches, find_profiles, profile_targets
+from target_engine import scan_targets
+
+
+def write(path, size=0, text=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text if text is not None else "x" * size)
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / ".config"))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / ".cache"))
+
+    chrome = tmp_path / ".config" / "google-chrome"
+    write(str(chrome / "Local State"), text=json.dumps({"profile": {"info_cache": {"Default": {"name": "Me"}}}}))
+    write(str(chrome / "Default" / "Preferences"), text="{}")
+    write(str(chrome / "Default" / "Cache" / "index"), 100)
+    write(str(chrome / "Default" / "Code Cache" / "js"), 20)
+    write(str(tmp_path / ".cache" / "google-chrome" / "Default" / "Cache" / "data"), 300)
+
+    firefox = tmp_path / ".mozilla" / "firefox"
+    write(str(firefox / "profiles.ini"), text="[Profile0]\nName=default\nIsRelative=1\nPath=abc.default\n")
+    write(str(firefox / "abc.default" / "prefs.js"), text="")
+    write(str(firefox / "abc.default" / "cache2" / "entries"), 50)
+    write(str(tmp_path / ".cache" / "mozilla" / "firefox" / "abc.default" / "cache2" / "entries"), 70)
+    return tmp_path
+
+
+def test_cache_and_profile_folders_get_their_own_targets(home):
+    targets = profile_targets(find_profiles(platform="linux"))
+    names = sorted(target.name for target in targets)
+
+    assert names == [
+        "chrome-default-cache-cache", "chrome-default-profile-cache", "chrome-default-profile-code-cache",
+        "firefox-abc.default-cache-cache2", "firefox-abc.default-profile-cache2",
+    ]
+    totals = scan_targets(targets)
+    assert {name: total.size for name, total in totals.items()} == {
+        "chrome-default-cache-cache": 300, "chrome-default-profile-cache": 100,
+        "chrome-default-profile-code-cache": 20,
+        "firefox-abc.default-cache-cache2": 70, "firefox-abc.default-profile-cache2": 50,
+    }
+
+
+def test_a_folder_reached_twice_is_listed_once(home):
+    cache = home / ".cache" / "mozilla" / "firefox" / "abc.default" / "cache2"
+    for name in os.listdir(cache):
+        os.remove(cache / name)
+    os.rmdir(cache)
+    os.symlink(home / ".mozilla" / "firefox" / "abc.default" / "cache2", cache)
+
+    targets = profile_targets(find_profiles(["firefox"], platform="linux"))
+
+    assert len(targets) == 1
+    assert sum(total.size for total in scan_targets(targets).values()) == 50
+
+
+def test_clear_removes_cache_contents_only(home):
+    result = clear_browser_caches()
+
+    assert result.ok
+    assert result.bytes_freed == 540
+    chrome = home / ".config" / "google-chrome" / "Default"
+    assert sorted(os.listdir(chrome)) == ["Cache", "Code Cache", "Preferences"]
+    assert os.listdir(chrome / "Cache") == []
+    assert os.listdir(home / ".cache" / "google-chrome" / "Default" / "Cache") == []
+    assert sorted(os.listdir(home / ".mozilla" / "firefox" / "abc.default")) == ["cache2", "prefs.js"]
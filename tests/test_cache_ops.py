@@ -0,0 +1,32 @@
+"""Front-end helpers of cache_ops against a small registry."""
+import pytest
+
+import cache_ops
+from history import HistoryStore, Sample
+from targets import CacheTarget, TargetRegistry
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_ops, "_registry", TargetRegistry([
+        CacheTarget("one", str(tmp_path / "one"), group="system"),
+        CacheTarget("two", str(tmp_path / "two"), group="adobe"),
+    ]))
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    for when, size in ((1000, 10), (90000, 20)):
+        store.record({name: Sample(None, size, 0, 0, 0, 0.0) for name in ("one", "two", "gone")}, when)
+    return store
+
+
+def names(trends):
+    return sorted(trend.target for trend in trends)
+
+
+def test_trends_of_all_targets(history):
+    assert names(cache_ops.target_trends(None, history)) == ["gone", "one", "two"]
+    assert names(cache_ops.target_trends(["all"], history)) == ["gone", "one", "two"]
+
+
+def test_trends_of_a_group(history):
+    assert names(cache_ops.target_trends(["system"], history)) == ["one"]
+    assert names(cache_ops.target_trends(["two"], history)) == ["two"]
@@ -0,0 +1,116 @@
+"""Deletion engine checks on real temporary trees."""
+import errno
+import os
+
+from deleter import delete_contents, delete_files
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def remaining(root):
+    return sorted(
+        os.path.relpath(os.path.join(folder, name), root)
+        for folder, dirs, files in os.walk(root) for name in dirs + files
+    )
+
+
+def test_delete_contents_counts_hard_links_once(tmp_path):
+    root = tmp_path / "cache"
+    write(str(root / "a" / "data"), 100000)
+    os.link(root / "a" / "data", root / "a" / "link")
+    os.link(root / "a" / "data", root / "b")
+    write(str(root / "c" / "other"), 5000)
+
+    result = delete_contents(str(root))
+
+    assert result.ok
+    assert result.files == 4
+    assert result.bytes_freed == 105000
+    assert remaining(root) == []
+    assert root.is_dir()
+
+
+def test_delete_files_counts_hard_links_once(tmp_path):
+    write(str(tmp_path / "one"), 100000)
+    os.link(tmp_path / "one", tmp_path / "two")
+    (tmp_path / "sub").mkdir()
+    os.link(tmp_path / "one", tmp_path / "sub" / "three")
+    write(str(tmp_path / "keep"), 10)
+
+    paths = [str(tmp_path / name) for name in ("one", "two", os.path.join("sub", "three"))]
+    result = delete_files(paths)
+
+    assert result.files == 3
+    assert result.bytes_freed == 100000
+    assert remaining(tmp_path) == ["keep", "sub"]
+
+
+def fail_once(monkeypatch, path):
+    """Make opening or listing ``path`` fail once with EBUSY."""
+    failed = []
+
+    def wrap(call):
+        def wrapper(target, *args, **kwargs):
+            if target == path and not failed:
+                failed.append(target)
+                raise OSError(errno.EBUSY, "Device or resource busy", target)
+            return call(target, *args, **kwargs)
+        return wrapper
+
+    monkeypatch.setattr(os, "open", wrap(os.open))
+    monkeypatch.setattr(os, "scandir", wrap(os.scandir))
+    return failed
+
+
+def test_retry_relists_a_busy_root_and_keeps_it(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    write(str(root / "a"), 100)
+    write(str(root / "sub" / "b"), 200)
+    failed = fail_once(monkeypatch, str(root))
+
+    result = delete_contents(str(root))
+
+    assert failed
+    assert result.ok
+    assert result.retried == 1
+    assert result.bytes_freed == 300
+    assert root.is_dir()
+    assert remaining(root) == []
+
+
+def test_retry_relists_a_busy_subfolder(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    write(str(root / "a"), 100)
+    write(str(root / "sub" / "deep" / "b"), 200)
+    failed = fail_once(monkeypatch, str(root / "sub"))
+
+    result = delete_contents(str(root))
+
+    assert failed
+    assert result.ok
+    assert result.bytes_freed == 300
+    assert remaining(root) == []
+
+
+def test_delete_contents_skips_a_symlinked_root(tmp_path):
+    real = tmp_path / "real"
+    write(str(real / "data"), 100)
+    link = tmp_path / "cache"
+    os.symlink(real, link)
+
+    result = delete_contents(str(link))
+
+    assert result.skipped == [str(link)]
+    assert result.bytes_freed == 0
+    assert link.is_symlink()
+    assert remaining(real) == ["data"]
+
+    result = delete_contents(str(link), remove_root=True)
+
+    assert result.files == 1
+    assert not os.path.lexists(link)
+    assert remaining(real) == ["data"]
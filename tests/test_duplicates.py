@@ -0,0 +1,63 @@
+"""Duplicate linking and deletion on real temporary trees."""
+import os
+
+from duplicates import delete_duplicates, find_duplicates, link_duplicates
+from targets import CacheTarget
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def make_copies(root):
+    data = os.urandom(50000)
+    for name in ("a", os.path.join("sub", "b"), os.path.join("sub", "c")):
+        write(os.path.join(root, name), data)
+    write(os.path.join(root, "other"), os.urandom(50000))
+    return [CacheTarget("test", root)]
+
+
+def test_link_duplicates_replaces_copies_with_links(tmp_path):
+    root = str(tmp_path / "cache")
+    groups = find_duplicates(make_copies(root), min_size=1)
+    assert len(groups) == 1
+
+    result = link_duplicates(groups)
+
+    assert result.ok
+    assert result.files == 2
+    assert result.bytes_freed == 100000
+    inodes = {os.stat(os.path.join(root, name)).st_ino for name in ("a", "sub/b", "sub/c")}
+    assert len(inodes) == 1
+    assert sorted(os.listdir(os.path.join(root, "sub"))) == ["b", "c"]
+
+
+def test_link_duplicates_leaves_files_changed_after_hashing(tmp_path):
+    root = str(tmp_path / "cache")
+    groups = find_duplicates(make_copies(root), min_size=1)
+    keep = groups[0].files[0].path
+    with open(keep, "ab") as f:
+        f.write(b"changed")
+
+    result = link_duplicates(groups)
+
+    assert result.files == 0
+    assert result.bytes_freed == 0
+    assert len(result.changed) == 2
+    assert len({os.stat(found.path).st_ino for found in groups[0].files}) == 3
+    assert not [name for name in os.listdir(os.path.join(root, "sub")) if ".dedup-" in name]
+
+
+def test_delete_duplicates_keeps_one_copy(tmp_path):
+    root = str(tmp_path / "cache")
+    groups = find_duplicates(make_copies(root), min_size=1)
+    keep = groups[0].files[0].path
+
+    result = delete_duplicates(groups)
+
+    assert result.files == 2
+    assert result.bytes_freed == 100000
+    assert os.path.exists(keep)
+    assert sum(os.path.exists(found.path) for found in groups[0].files) == 1
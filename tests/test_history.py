@@ -0,0 +1,43 @@
+"""History store and growth trends on a temporary SQLite file."""
+import sqlite3
+
+import pytest
+
+import history
+from history import HistoryStore, Sample
+
+DAY = 86400
+
+
+def test_growth_and_budget_from_samples(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.record({"cache": Sample(None, 1000, 1000, 5, 0, 1.0)}, 10 * DAY)
+    store.record({"cache": Sample(None, 300, 0, 0, 0, 0.0)}, 11 * DAY)
+    store.record({"cache": Sample(None, 500, 0, 0, 0, 0.0)}, 12 * DAY)
+
+    assert [sample.size for sample in store.series("cache")] == [1000, 300, 500]
+    trend = store.trend("cache", budget=1500, now=12 * DAY)
+    assert trend.rate == 250
+    assert trend.full_at == 16 * DAY
+
+
+def test_every_connection_is_closed(tmp_path, monkeypatch):
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        opened.append(conn)
+        return conn
+
+    monkeypatch.setattr(history.sqlite3, "connect", tracking)
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.record({"cache": Sample(None, 1, 0, 0, 0, 0.0)})
+    store.set_last_run("daily", 100)
+    assert store.last_run("daily") == 100
+    assert store.names() == ["cache"]
+
+    assert len(opened) == 5
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
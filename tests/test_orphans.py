@@ -0,0 +1,71 @@
+"""Orphan detection on a fake home folder."""
+import os
+import sys
+
+from orphans import BUNDLE_ID, REMOVED, find_orphans
+
+
+def write(path, text="x"):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def desktop_file(apps, stem, name):
+    write(os.path.join(apps, f"{stem}.desktop"), f"[Desktop Entry]\nName={name}\n")
+
+
+def names(orphans):
+    return sorted(orphan.name for orphan in orphans)
+
+
+def test_linux_desktop_folders_are_not_orphans(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "linux")
+    config = tmp_path / ".config"
+    share = tmp_path / ".local" / "share"
+    apps = str(share / "applications")
+    desktop_file(apps, "org.example.Editor", "Editor")
+    for name in ("keyrings", "dconf", "systemd", "gtk-3.0", "pulse", "editor", "sometool"):
+        write(str(config / name / "data"))
+    write(str(share / "org.gone.Player" / "library.db"), "x" * 1000)
+
+    orphans = find_orphans([apps], [str(config), str(share)], index_path=str(tmp_path / "apps.json"))
+
+    assert names(orphans) == ["org.gone.Player"]
+    assert orphans[0].reason == BUNDLE_ID
+    assert orphans[0].size == 1000
+
+
+def test_folders_of_a_removed_app_are_orphans(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "linux")
+    config = tmp_path / ".config"
+    apps = str(tmp_path / "applications")
+    index_path = str(tmp_path / "apps.json")
+    desktop_file(apps, "editor", "Editor")
+    desktop_file(apps, "player", "Player")
+    for name in ("editor", "player", "sometool"):
+        write(str(config / name / "settings"))
+
+    assert find_orphans([apps], [str(config)], index_path=index_path) == []
+
+    os.remove(os.path.join(apps, "player.desktop"))
+    orphans = find_orphans([apps], [str(config)], index_path=index_path)
+
+    assert names(orphans) == ["player"]
+    assert orphans[0].reason == REMOVED
+    assert orphans[0].closest == "Player"
+
+    # Installed again: no longer an orphan
+    desktop_file(apps, "player", "Player")
+    assert find_orphans([apps], [str(config)], index_path=index_path) == []
+
+
+def test_windows_program_folders_are_not_orphans(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "win32")
+    local = tmp_path / "AppData" / "Local"
+    programs = str(local / "Programs")
+    write(os.path.join(programs, "Editor", "editor.exe"))
+    for name in ("Programs", "Packages", "Microsoft", "CrashDumps", "SomeVendor"):
+        write(str(local / name / "data"))
+
+    assert find_orphans([programs], [str(local)], index_path=str(tmp_path / "apps.json")) == []
@@ -0,0 +1,56 @@
+"""Deletion plan checks on real temporary trees."""
+import os
+
+from archiver import archive_plan
+from planner import execute_plan, make_plan
+from targets import CacheTarget
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def replace(path):
+    """Put a different file, with a new inode, where ``path`` was."""
+    os.rename(path, path + ".old")
+    write(path, 10)
+    os.unlink(path + ".old")
+
+
+def make_tree(root):
+    for name in ("a", os.path.join("sub", "b"), os.path.join("sub", "c")):
+        write(os.path.join(root, name), 100)
+    return [CacheTarget("test", root)]
+
+
+def test_execute_plan_keeps_files_replaced_after_planning(tmp_path):
+    root = str(tmp_path / "cache")
+    plan = make_plan(make_tree(root))
+    replaced = os.path.join(root, "sub", "b")
+    replace(replaced)
+
+    result = execute_plan(plan)["test"]
+
+    assert result.changed == [replaced]
+    assert result.files == 2
+    assert result.bytes_freed == 200
+    assert os.listdir(root) == ["sub"]
+    assert os.listdir(os.path.join(root, "sub")) == ["b"]
+
+
+def test_archive_plan_reports_replaced_files_under_their_target(tmp_path):
+    root = str(tmp_path / "cache")
+    plan = make_plan(make_tree(root))
+    replaced = os.path.join(root, "a")
+    replace(replaced)
+
+    archive, results = archive_plan(plan, dest=str(tmp_path / "archive"), max_workers=2)
+
+    assert results["test"].changed == [replaced]
+    assert results["test"].files == 2
+    assert sorted(entry.path for entry in archive.entries) == [
+        os.path.join(root, "sub", "b"), os.path.join(root, "sub", "c")
+    ]
+    assert os.listdir(root) == ["a"]
@@ -0,0 +1,86 @@
+"""Incremental rescans through the scan index, on real temporary trees."""
+import os
+import time
+
+from scan_index import ScanIndex
+from size_engine import scan_sizes
+from target_engine import scan_targets
+from targets import CacheTarget
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def set_mtime(path, when):
+    os.utime(path, ns=(when, when))
+
+
+def make_tree(root):
+    write(os.path.join(root, "a"), 100)
+    write(os.path.join(root, "sub", "b"), 200)
+    write(os.path.join(root, "sub", "deep", "c"), 300)
+    return [root, os.path.join(root, "sub"), os.path.join(root, "sub", "deep")]
+
+
+def test_unchanged_tree_is_reused_including_its_root(tmp_path):
+    root = str(tmp_path / "cache")
+    old = time.time_ns() - 3600 * 1000 ** 3
+    for folder in make_tree(root):
+        set_mtime(folder, old)
+    index = ScanIndex(str(tmp_path / "index.sqlite3"))
+    target = CacheTarget("test", root)
+
+    first = scan_targets([target], index=index)["test"]
+    assert root in index.load(root)
+    second = scan_targets([target], index=index)["test"]
+
+    assert first.reused == 0
+    assert second.reused == 3
+    assert second.size == first.size == 600
+    assert second.files == 3
+
+
+def test_folder_size_reuses_its_root(tmp_path):
+    root = str(tmp_path / "cache")
+    old = time.time_ns() - 3600 * 1000 ** 3
+    for folder in make_tree(root):
+        set_mtime(folder, old)
+    index = ScanIndex(str(tmp_path / "index.sqlite3"))
+
+    first = scan_sizes([root], index=index)[root]
+    assert index.load(root)[root].own_size == 100
+    second = scan_sizes([root], index=index)[root]
+
+    assert first.reused == 0
+    assert second.reused == 3
+    assert second.size == first.size == 600
+    assert second.children == first.children == {"a": 100, "sub": 500}
+
+    write(os.path.join(root, "new"), 50)
+    set_mtime(root, old + 1000 ** 3)
+    third = scan_sizes([root], index=index)[root]
+
+    assert third.reused == 2
+    assert third.size == 650
+
+
+def test_racy_folders_are_listed_again(tmp_path):
+    root = str(tmp_path / "cache")
+    folders = make_tree(root)
+    index = ScanIndex(str(tmp_path / "index.sqlite3"))
+    target = CacheTarget("test", root)
+
+    assert scan_targets([target], index=index)["test"].size == 600
+    # A file added within the same mtime tick leaves the folder's mtime as it was
+    stamp = os.stat(root).st_mtime_ns
+    write(os.path.join(root, "late"), 50)
+    set_mtime(root, stamp)
+    second = scan_targets([target], index=index)["test"]
+
+    assert second.reused == 0
+    assert second.size == 650
+    assert index.load(root)[root].mtime_ns == -1
+    assert set(index.load(root)) == set(folders)
@@ -0,0 +1,96 @@
+"""Schedule intervals, due times and failing runs."""
+import threading
+import time
+
+import pytest
+
+import cachemgr
+import scheduler
+from history import HistoryStore
+from scheduler import MIN_INTERVAL, RETRY_AFTER, Schedule, Scheduler, parse_interval
+from targets import CacheTarget, TargetRegistry
+
+
+def test_parse_interval():
+    assert parse_interval("90s") == 90
+    assert parse_interval("45m") == 45 * 60
+    assert parse_interval("1.5h") == 5400
+    assert parse_interval(" 2D ") == 2 * 86400
+    assert parse_interval("1w") == 7 * 86400
+    assert parse_interval(MIN_INTERVAL) == MIN_INTERVAL
+    with pytest.raises(ValueError):
+        parse_interval(MIN_INTERVAL - 1)
+    with pytest.raises(ValueError):
+        parse_interval("30s")
+    with pytest.raises(ValueError):
+        parse_interval("daily")
+
+
+@pytest.fixture
+def setup(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    cache = tmp_path / "cache"
+    cache.mkdir()
+    (cache / "file").write_bytes(b"x" * 100)
+    registry = TargetRegistry([CacheTarget("one", str(cache))])
+    return registry, HistoryStore(str(tmp_path / "history.sqlite3"))
+
+
+def test_next_due_follows_the_last_run(setup):
+    registry, history = setup
+    daily = Schedule("daily", ["one"], "1d", evict=False, background=False)
+    runner = Scheduler([daily], registry, history)
+
+    assert runner.next_due(daily) == 0
+    runner.run_all()
+
+    last = history.last_run("daily")
+    assert runner.next_due(daily) == last + 86400
+    assert history.series("one")[-1].freed == 100
+
+
+def test_a_failing_run_is_reported_and_the_thread_keeps_running(setup, monkeypatch):
+    registry, history = setup
+    daily = Schedule("daily", ["one"], "1d")
+    failed = threading.Event()
+    errors = []
+
+    def broken(*args, **kwargs):
+        raise OSError("disk gone")
+
+    def on_error(schedule, error):
+        errors.append((schedule, error))
+        failed.set()
+
+    monkeypatch.setattr(scheduler, "run_schedule", broken)
+    started = time.time()
+    runner = Scheduler([daily], registry, history, on_error=on_error).start()
+    try:
+        assert failed.wait(5)
+        assert not runner.wait(0.2)
+    finally:
+        runner.stop(timeout=5)
+
+    assert errors[0][0] is daily
+    assert str(errors[0][1]) == "disk gone"
+    assert history.last_run("daily") is None
+    # Tried again after RETRY_AFTER rather than at once or only a day later
+    assert started + RETRY_AFTER <= runner.next_due(daily) <= time.time() + RETRY_AFTER
+
+
+def test_schedule_command_fails_when_a_run_fails(setup, monkeypatch):
+    registry, history = setup
+    monkeypatch.setattr(cachemgr, "schedules", lambda names=None: [Schedule("daily", ["one"], "1d")])
+    monkeypatch.setattr(cachemgr, "registry", lambda: registry)
+    monkeypatch.setattr(scheduler, "run_schedule", lambda *args, **kwargs: 1 / 0)
+
+    assert cachemgr.main(["schedule", "--once"]) == cachemgr.EXIT_FAILED
+
+
+def test_schedule_command_fails_when_the_scheduler_thread_ends(setup, monkeypatch):
+    registry, history = setup
+    monkeypatch.setattr(cachemgr, "schedules", lambda names=None: [Schedule("daily", ["one"], "1d")])
+    monkeypatch.setattr(cachemgr, "registry", lambda: registry)
+    monkeypatch.setattr(Scheduler, "_run", lambda self: None)
+
+    assert cachemgr.main(["schedule"]) == cachemgr.EXIT_FAILED
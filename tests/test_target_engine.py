@@ -0,0 +1,112 @@
+"""Single-pass scan and clear checks on real temporary trees."""
+import errno
+import os
+
+import target_engine
+from deleter import DeleteResult
+from target_engine import CLEAR, PENDING_PER_WORKER, clear_targets, scan_targets
+from targets import CacheTarget
+
+
+def write(path, size):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+
+
+def remaining(root):
+    return sorted(
+        os.path.relpath(os.path.join(folder, name), root)
+        for folder, dirs, files in os.walk(root) for name in dirs + files
+    )
+
+
+def test_clear_counts_hard_links_once(tmp_path):
+    root = tmp_path / "cache"
+    write(str(root / "a" / "data"), 100000)
+    os.link(root / "a" / "data", root / "a" / "link")
+    os.link(root / "a" / "data", root / "b")
+    target = CacheTarget("test", str(root))
+
+    scanned = scan_targets([target])["test"].size
+    result = clear_targets([target])["test"]
+
+    assert result.ok
+    assert result.files == 3
+    assert result.bytes_freed == scanned == 100000
+    assert remaining(root) == []
+
+
+def test_clear_keeps_excluded_entries(tmp_path):
+    root = tmp_path / "cache"
+    write(str(root / "old.tmp"), 300)
+    write(str(root / "sub" / "new.tmp"), 200)
+    write(str(root / "sub" / "index.keep"), 50)
+    target = CacheTarget("test", str(root), exclude=["*.keep"])
+
+    result = clear_targets([target])["test"]
+
+    assert result.ok
+    assert result.bytes_freed == 500
+    assert remaining(root) == ["sub", os.path.join("sub", "index.keep")]
+
+
+def test_retry_of_a_busy_folder_keeps_the_target_filters(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    write(str(root / "top.tmp"), 100)
+    write(str(root / "sub" / "old.tmp"), 200)
+    write(str(root / "sub" / "index.keep"), 50)
+    busy = str(root / "sub")
+    real_open = os.open
+    failed = []
+
+    def open_once_busy(path, *args, **kwargs):
+        if path == busy and not failed:
+            failed.append(path)
+            raise OSError(errno.EBUSY, "Device or resource busy", path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "open", open_once_busy)
+    target = CacheTarget("test", str(root), exclude=["*.keep"])
+
+    result = clear_targets([target])["test"]
+
+    assert failed
+    assert result.ok
+    assert result.retried == 1
+    assert result.bytes_freed == 300
+    assert remaining(root) == ["sub", os.path.join("sub", "index.keep")]
+
+
+def test_walk_keeps_a_bounded_number_of_folders_queued(tmp_path, monkeypatch):
+    root = tmp_path / "cache"
+    for i in range(60):
+        write(str(root / f"dir{i}" / "sub" / "data"), 10)
+    real_wait = target_engine.wait
+    queued = []
+
+    def counting_wait(fs, *args, **kwargs):
+        queued.append(len(fs))
+        return real_wait(fs, *args, **kwargs)
+
+    monkeypatch.setattr(target_engine, "wait", counting_wait)
+    total = scan_targets([CacheTarget("test", str(root))], max_workers=2)["test"]
+
+    assert total.files == 60
+    assert total.dirs == 120
+    assert max(queued) <= 2 * PENDING_PER_WORKER
+
+
+def test_clear_removes_emptied_folders_as_their_subtrees_finish(tmp_path):
+    root = tmp_path / "cache"
+    for name in ("a", "b", "c"):
+        write(str(root / name / "deep" / "data"), 10)
+    target = CacheTarget("test", str(root))
+
+    outcomes = [outcome for owner, outcome in target_engine._run([target], CLEAR, max_workers=1)]
+    removals = [i for i, outcome in enumerate(outcomes) if isinstance(outcome, DeleteResult)]
+    visits = [i for i, outcome in enumerate(outcomes) if not isinstance(outcome, DeleteResult)]
+
+    assert removals[0] < visits[-1]
+    assert sum(outcomes[i].dirs for i in removals) == 6
+    assert remaining(root) == []
@@ -0,0 +1,198 @@
+"""Background mode: low priority and rate-limited deletes.
+
+A Throttle attached to a job's Progress makes the delete engines call
+``charge`` after every unlink and rmdir. It moves each worker thread that
+does so to background CPU and I/O priority where the OS has one (idle I/O
+class and nice on Linux, the background band on macOS, background mode on
+Windows), and holds the workers to a token bucket of operations and bytes
+per second.
+
+The rates adapt to the disk: while the measured unlink latency stays well
+above its usual level, the rates are halved, and once it settles
+they climb back step by step. A cleanup can then run alongside editing
+work and give way whenever the disk gets busy.
+"""
+import ctypes
+import os
+import platform
+import sys
+import threading
+import time
+
+DEFAULT_OPS_PER_SECOND = 1000
+DEFAULT_BYTES_PER_SECOND = 200 * 1024 ** 2
+# Seconds of traffic a bucket may hold, so short bursts need not wait
+BURST = 0.5
+
+# Latency smoothing and adaptation
+LATENCY_ALPHA = 0.1
+BASELINE_DRIFT = 0.001
+SLOW_FACTOR = 3.0
+RECOVER_FACTOR = 1.5
+ADJUST_INTERVAL = 0.5
+MIN_SCALE = 0.05
+RECOVER_STEP = 0.1
+
+NICE_INCREMENT = 10
+
+# Linux ioprio_set: the idle class only gets the disk when nobody else wants it
+_IOPRIO_WHO_PROCESS = 1
+_IOPRIO_CLASS_IDLE = 3
+_IOPRIO_CLASS_SHIFT = 13
+_SYS_IOPRIO_SET = {"x86_64": 251, "i686": 289, "i386": 289, "aarch64": 30, "armv7l": 314, "ppc64le": 273}
+
+# macOS setpriority(PRIO_DARWIN_THREAD, 0, PRIO_DARWIN_BG): low CPU and throttled I/O
+_PRIO_DARWIN_THREAD = getattr(os, "PRIO_DARWIN_THREAD", 3)
+_PRIO_DARWIN_BG = getattr(os, "PRIO_DARWIN_BG", 0x1000)
+
+# Windows SetThreadPriority / SetPriorityClass background modes (CPU, I/O and memory)
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+
+
+def _linux_idle_io(tid):
+    number = _SYS_IOPRIO_SET.get(platform.machine())
+    if number is None:
+        return False
+    libc = ctypes.CDLL(None, use_errno=True)
+    value = _IOPRIO_CLASS_IDLE << _IOPRIO_CLASS_SHIFT
+    return libc.syscall(number, _IOPRIO_WHO_PROCESS, tid, value) == 0
+
+
+def lower_thread_priority():
+    """Move the calling thread to background CPU and I/O priority; True if it worked.
+
+    On Linux and macOS threads created afterwards by this thread inherit it.
+    """
+    try:
+        if sys.platform.startswith("linux"):
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, min(19, os.getpriority(os.PRIO_PROCESS, tid) + NICE_INCREMENT))
+            return _linux_idle_io(tid)
+        if sys.platform == "darwin":
+            os.setpriority(_PRIO_DARWIN_THREAD, 0, _PRIO_DARWIN_BG)
+            return True
+        if os.name == "nt":
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN))
+    except (OSError, AttributeError):
+        pass
+    return False
+
+
+def lower_process_priority():
+    """Move the whole process to background priority, for headless runs."""
+    if os.name == "nt":
+        try:
+            kernel32 = ctypes.windll.kernel32
+            return bool(kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), _PROCESS_MODE_BACKGROUND_BEGIN))
+        except (OSError, AttributeError):
+            return False
+    return lower_thread_priority()
+
+
+class TokenBucket:
+    """Refills ``rate`` tokens per second, holding at most BURST seconds' worth.
+
+    Tokens may be taken on credit; the taker then waits off the debt, so
+    concurrent workers queue up fairly.
+    """
+
+    def __init__(self, rate, burst=BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = rate * burst
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, amount, scale=1.0):
+        """Take ``amount`` tokens; returns the seconds to wait before going on."""
+        rate = self.rate * scale
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(rate * self.burst, self.tokens + (now - self.stamp) * rate)
+            self.stamp = now
+            self.tokens -= amount
+            return -self.tokens / rate if self.tokens < 0 else 0.0
+
+
+class Throttle:
+    """Rate limits and background priority for the workers of one job.
+
+    ``ops_per_second`` and ``bytes_per_second`` may be None for no limit.
+    """
+
+    def __init__(self, ops_per_second=DEFAULT_OPS_PER_SECOND, bytes_per_second=DEFAULT_BYTES_PER_SECOND,
+                 lower_priority=True, adaptive=True):
+        self.ops = TokenBucket(ops_per_second) if ops_per_second else None
+        self.bytes = TokenBucket(bytes_per_second) if bytes_per_second else None
+        self.lower_priority = lower_priority
+        self.adaptive = adaptive
+        # Share of the configured rates in use, lowered while the disk is slow
+        self.scale = 1.0
+        self.latency = None
+        self.baseline = None
+        self.waited = 0.0
+        self.backoffs = 0
+        self._adjusted = time.monotonic()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._released = threading.Event()
+
+    def charge(self, ops=1, nbytes=0, latency=None):
+        """Account for finished operations and sleep off any excess.
+
+        ``latency`` is how long the last operation took, in seconds. Returns
+        the seconds spent waiting, for the caller's metrics.
+        """
+        if self.lower_priority and not getattr(self._local, "lowered", False):
+            self._local.lowered = True
+            lower_thread_priority()
+        if latency is not None and self.adaptive:
+            self._observe(latency)
+        scale = self.scale
+        wait = 0.0
+        if self.ops is not None and ops:
+            wait = self.ops.take(ops, scale)
+        if self.bytes is not None and nbytes:
+            wait = max(wait, self.bytes.take(nbytes, scale))
+        if wait <= 0 or self._released.is_set():
+            return 0.0
+        self._released.wait(wait)
+        with self._lock:
+            self.waited += wait
+        return wait
+
+    def _observe(self, latency):
+        with self._lock:
+            self.latency = latency if self.latency is None else (
+                self.latency + LATENCY_ALPHA * (latency - self.latency)
+            )
+            if self.baseline is None or self.latency < self.baseline:
+                self.baseline = self.latency
+            else:
+                # Follow a disk that is slower for good, e.g. a network share
+                self.baseline += BASELINE_DRIFT * (self.latency - self.baseline)
+            now = time.monotonic()
+            if now - self._adjusted < ADJUST_INTERVAL or not self.baseline:
+                return
+            self._adjusted = now
+            if self.latency > self.baseline * SLOW_FACTOR:
+                self.scale = max(MIN_SCALE, self.scale / 2)
+                self.backoffs += 1
+            elif self.latency < self.baseline * RECOVER_FACTOR:
+                self.scale = min(1.0, self.scale + RECOVER_STEP)
+
+    def release(self):
+        """Stop waiting, e.g. because the job was cancelled."""
+        self._released.set()
+
+    def stats(self):
+        return {
+            "scale": self.scale,
+            "waited_seconds": self.waited,
+            "backoffs": self.backoffs,
+            "latency": self.latency,
+            "baseline_latency": self.baseline,
+        }
+
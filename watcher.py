@@ -0,0 +1,502 @@
+"""Keep cache sizes current by watching the target folders.
+
+A SizeTree holds the size of every counted file below the watched targets,
+grouped by folder, with a running total per target. It is filled by one walk
+and then kept current from change events instead of rescans: on Linux from
+inotify, elsewhere (and when inotify runs out of watches) by polling the
+folders' mtimes. Every event only re-reads the one path it names, so a
+steady trickle of cache writes costs a few lstat calls.
+
+A Watcher runs the tree and its event source in a background thread and
+reports new totals after each batch of events. With cleanup on, a target
+that grows past its threshold is trimmed by its eviction policy, as with
+``cachemgr clear --evict``.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import stat
+import struct
+import sys
+import threading
+import time
+
+from policies import EvictionPolicy
+
+# Seconds between two polls of the folder mtimes
+POLL_INTERVAL = 5.0
+# Every this many polls all files are stat'ed again, for files growing in place
+FULL_REFRESH_POLLS = 12
+# Events are applied in batches, at most this long after the first one
+BATCH_DELAY = 0.5
+
+# A target is trimmed once it exceeds its policy budget by this factor,
+# so it is not trimmed again for every byte written after a cleanup
+TRIGGER_RATIO = 1.1
+# Seconds before a target may be trimmed again
+CLEANUP_COOLDOWN = 300.0
+
+# inotify event bits, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW
+)
+_EVENT = struct.Struct("iIII")
+
+
+def _inside(path, root):
+    return path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+class SizeTree:
+    """Sizes of the counted files below a set of targets, kept per folder.
+
+    Files are counted as a scan counts them: symlinks as nothing, hard
+    links once, and in filtered targets only the entries the target
+    matches.
+    """
+
+    def __init__(self, targets):
+        self.targets = [target for target in targets if target.path]
+        # Deepest root first, so a nested target owns its own files
+        self._roots = sorted(self.targets, key=lambda target: len(target.path), reverse=True)
+        # folder -> {name: (size, inode key or None)}
+        self.dirs = {}
+        self.totals = {target.name: 0 for target in self.targets}
+        self.files = {target.name: 0 for target in self.targets}
+        # (dev, ino) of files with several links -> [links seen, size]
+        self._links = {}
+        self.lock = threading.Lock()
+
+    def owner(self, path):
+        """Return the deepest target containing ``path``, or None."""
+        for target in self._roots:
+            if path == target.path or _inside(path, target.path):
+                return target
+        return None
+
+    def _relative(self, path, target):
+        return path[len(target.path.rstrip(os.sep)) + 1:].replace(os.sep, "/")
+
+    def _holds_root(self, path):
+        prefix = path.rstrip(os.sep) + os.sep
+        return any(target.path.startswith(prefix) for target in self.targets)
+
+    def _add(self, folder, name, st):
+        path = os.path.join(folder, name)
+        target = self.owner(path)
+        if target is None or (not target.unfiltered and not target.matches(self._relative(path, target), name, st)):
+            return
+        size = 0 if stat.S_ISLNK(st.st_mode) else st.st_size
+        key = (st.st_dev, st.st_ino) if st.st_nlink > 1 and size else None
+        if key is None:
+            self.totals[target.name] += size
+        else:
+            link = self._links.get(key)
+            if link is None:
+                self._links[key] = [1, size]
+                self.totals[target.name] += size
+            else:
+                link[0] += 1
+                self.totals[target.name] += size - link[1]
+                link[1] = size
+        self.files[target.name] += 1
+        self.dirs.setdefault(folder, {})[name] = (size, key)
+
+    def _remove(self, folder, name):
+        entries = self.dirs.get(folder)
+        if entries is None or name not in entries:
+            return
+        size, key = entries.pop(name)
+        target = self.owner(os.path.join(folder, name))
+        self.files[target.name] -= 1
+        if key is not None:
+            link = self._links[key]
+            link[0] -= 1
+            if link[0]:
+                return
+            del self._links[key]
+            size = link[1]
+        self.totals[target.name] -= size
+
+    def _descends(self, path):
+        """False for a folder its target excludes, unless another target lies below it."""
+        target = self.owner(path)
+        if target is None or not target.exclude or path == target.path:
+            return target is not None
+        return not target.excludes(self._relative(path, target), os.path.basename(path)) or self._holds_root(path)
+
+    def _read_dir(self, folder):
+        """List one folder into the tree; return its subfolders to descend into."""
+        subdirs = []
+        self.dirs.setdefault(folder, {})
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        self._add(folder, entry.name, entry.stat(follow_symlinks=False))
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return [path for path in subdirs if self._descends(path)]
+
+    def add_tree(self, folder):
+        """Walk a new folder into the tree; returns the folders added."""
+        added = []
+        stack = [folder]
+        while stack:
+            path = stack.pop()
+            if path in self.dirs:
+                continue
+            added.append(path)
+            stack.extend(self._read_dir(path))
+        return added
+
+    def drop_tree(self, folder):
+        """Forget a folder and everything below it; returns the folders dropped."""
+        dropped = [path for path in self.dirs if path == folder or _inside(path, folder)]
+        for path in dropped:
+            for name in list(self.dirs[path]):
+                self._remove(path, name)
+            del self.dirs[path]
+        return dropped
+
+    def seed(self):
+        """Walk every target root; returns the folders read."""
+        with self.lock:
+            self.dirs = {}
+            self._links = {}
+            for name in self.totals:
+                self.totals[name] = 0
+                self.files[name] = 0
+            folders = []
+            for target in self.targets:
+                if os.path.isdir(target.path) and target.path not in self.dirs:
+                    folders.extend(self.add_tree(target.path))
+            return folders
+
+    def sync(self, path):
+        """Bring one path up to date with the disk.
+
+        Returns (folders added, folders dropped), for the event source to
+        start or stop watching them.
+        """
+        with self.lock:
+            folder, name = os.path.split(path)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                st = None
+            if st is not None and stat.S_ISDIR(st.st_mode):
+                self._remove(folder, name)
+                if path in self.dirs or folder not in self.dirs or not self._descends(path):
+                    return [], []
+                return self.add_tree(path), []
+            dropped = self.drop_tree(path) if path in self.dirs else []
+            self._remove(folder, name)
+            if st is not None and folder in self.dirs:
+                self._add(folder, name, st)
+            return [], dropped
+
+    def refresh(self, folder):
+        """Re-list one known folder, picking up every change inside it."""
+        try:
+            names = set(os.listdir(folder))
+        except OSError:
+            names = None
+        with self.lock:
+            if names is None:
+                return [], self.drop_tree(folder)
+            # Vanished subfolders are noticed when their own stat fails
+            known = set(self.dirs.get(folder, ()))
+        added, dropped = [], []
+        for name in names | known:
+            more, less = self.sync(os.path.join(folder, name))
+            added.extend(more)
+            dropped.extend(less)
+        return added, dropped
+
+    def snapshot(self):
+        """Return target name -> (bytes, files)."""
+        with self.lock:
+            return {name: (self.totals[name], self.files[name]) for name in self.totals}
+
+
+class PollingSource:
+    """Finds changes by checking folder mtimes every ``interval`` seconds.
+
+    A created, removed or renamed entry moves its folder's mtime; a file
+    growing in place does not, so every FULL_REFRESH_POLLS polls all folders
+    are re-read.
+    """
+
+    name = "polling"
+
+    def __init__(self, tree, interval=POLL_INTERVAL):
+        self.tree = tree
+        self.interval = interval
+        self.mtimes = {}
+
+    def watch(self, folders):
+        for folder in folders:
+            try:
+                self.mtimes[folder] = os.stat(folder).st_mtime_ns
+            except OSError:
+                self.mtimes.pop(folder, None)
+
+    def unwatch(self, folders):
+        for folder in folders:
+            self.mtimes.pop(folder, None)
+
+    def run(self, stop, on_batch):
+        polls = 0
+        while not stop.wait(self.interval):
+            polls += 1
+            full = polls % FULL_REFRESH_POLLS == 0
+            changed = False
+            for folder, mtime_ns in list(self.mtimes.items()):
+                if folder not in self.mtimes:
+                    continue
+                try:
+                    current = os.stat(folder).st_mtime_ns
+                except OSError:
+                    current = None
+                if current == mtime_ns and not full:
+                    continue
+                added, dropped = self.tree.refresh(folder)
+                self.unwatch(dropped)
+                self.watch(added + ([folder] if current is not None else []))
+                changed = True
+            if changed:
+                on_batch()
+
+    def close(self):
+        pass
+
+
+class InotifySource:
+    """Linux inotify events, one watch per folder.
+
+    Raises OSError when inotify is unavailable or the per-user watch limit
+    is reached, so the caller can fall back to polling.
+    """
+
+    name = "inotify"
+
+    def __init__(self, tree):
+        self.tree = tree
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.paths = {}
+        self.wds = {}
+
+    def watch(self, folders):
+        for folder in folders:
+            wd = self._add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                # A folder gone since it was listed is not a problem
+                if error in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise OSError(error, os.strerror(error), folder)
+            self.paths[wd] = folder
+            self.wds[folder] = wd
+
+    def unwatch(self, folders):
+        for folder in folders:
+            wd = self.wds.pop(folder, None)
+            if wd is not None:
+                self.paths.pop(wd, None)
+                self._rm_watch(self.fd, wd)
+
+    def _read(self):
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def run(self, stop, on_batch):
+        while not stop.is_set():
+            ready, _, _ = select.select([self.fd], [], [], 0.5)
+            if not ready:
+                continue
+            # Collect a burst of events first: a file being written fires many
+            pending = {}
+            overflow = False
+            deadline = time.monotonic() + BATCH_DELAY
+            while True:
+                for wd, mask, name in self._read():
+                    if mask & IN_Q_OVERFLOW:
+                        overflow = True
+                    elif mask & IN_IGNORED:
+                        folder = self.paths.pop(wd, None)
+                        if folder is not None and self.wds.get(folder) == wd:
+                            del self.wds[folder]
+                    elif wd in self.paths:
+                        path = os.path.join(self.paths[wd], name) if name else self.paths[wd]
+                        pending.pop(path, None)
+                        pending[path] = True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not select.select([self.fd], [], [], remaining)[0]:
+                    break
+            if overflow:
+                # Events were lost; only a new walk is trustworthy
+                self.unwatch(list(self.wds))
+                self.watch(self.tree.seed())
+            else:
+                for path in pending:
+                    added, dropped = self.tree.sync(path)
+                    self.unwatch(dropped)
+                    self.watch(added)
+            on_batch()
+
+    def close(self):
+        os.close(self.fd)
+
+
+def default_thresholds(targets):
+    """Return name -> size that triggers a cleanup, for targets with a budget."""
+    return {
+        target.name: int(target.policy.budget * TRIGGER_RATIO)
+        for target in targets if target.policy is not None and target.policy.budget
+    }
+
+
+class Watcher:
+    """Watches targets in a background thread, keeping a SizeTree current.
+
+    ``on_change(totals)`` gets target name -> (bytes, files) after every
+    batch of changes. With ``cleanup``, a target over its threshold (from
+    ``thresholds``, by default its policy budget plus a margin) is trimmed
+    by its policy, or to the threshold if it has none, and
+    ``on_cleanup(name, DeleteResult)`` is called. Both callbacks run on the
+    watcher's threads. A ``throttle`` runs the cleanups in background mode.
+    """
+
+    def __init__(self, targets, on_change=None, cleanup=False, thresholds=None, on_cleanup=None,
+                 poll=False, interval=POLL_INTERVAL, throttle=None):
+        self.tree = SizeTree(targets)
+        self.on_change = on_change
+        self.cleanup = cleanup
+        self.thresholds = default_thresholds(self.tree.targets) if thresholds is None else dict(thresholds)
+        self.on_cleanup = on_cleanup
+        self.poll = poll or not sys.platform.startswith("linux")
+        self.interval = interval
+        self.throttle = throttle
+        self.source = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._cleaning = set()
+        self._last_cleanup = {}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cache-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wait(self, timeout=None):
+        """Block until the watcher has stopped, or ``timeout`` passed; True if stopped."""
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def totals(self):
+        return self.tree.snapshot()
+
+    def _open_source(self, folders):
+        if not self.poll:
+            source = None
+            try:
+                source = InotifySource(self.tree)
+                source.watch(folders)
+                return source
+            except (OSError, AttributeError):
+                # No inotify, or too many folders for the watch limit
+                if source is not None:
+                    source.close()
+        source = PollingSource(self.tree, self.interval)
+        source.watch(folders)
+        return source
+
+    def _run(self):
+        folders = self.tree.seed()
+        self.source = self._open_source(folders)
+        self._changed()
+        try:
+            self.source.run(self._stop, self._changed)
+        finally:
+            self.source.close()
+
+    def _changed(self):
+        totals = self.tree.snapshot()
+        if self.on_change is not None:
+            self.on_change(totals)
+        if self.cleanup:
+            for target in self.tree.targets:
+                threshold = self.thresholds.get(target.name)
+                if threshold is not None and totals[target.name][0] > threshold:
+                    self._trim(target, threshold)
+
+    def _trim(self, target, threshold):
+        now = time.monotonic()
+        last = self._last_cleanup.get(target.name)
+        if target.name in self._cleaning or (last is not None and now - last < CLEANUP_COOLDOWN):
+            return
+        self._cleaning.add(target.name)
+        self._last_cleanup[target.name] = now
+        policy = target.policy or EvictionPolicy(budget=threshold)
+
+        def run():
+            from planner import evict_targets
+            from progress import Progress
+
+            try:
+                progress = Progress(throttle=self.throttle)
+                result = evict_targets([target], {target.name: policy}, progress=progress)[target.name]
+            finally:
+                self._cleaning.discard(target.name)
+            if self.on_cleanup is not None:
+                self.on_cleanup(target.name, result)
+
+        threading.Thread(target=run, name=f"cache-cleanup-{target.name}", daemon=True).start()
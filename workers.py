@@ -0,0 +1,188 @@
+"""Background workers that keep scans and deletes off the GUI thread."""
+import threading
+import time
+import traceback
+from collections import deque
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from profiling import profiled
+from progress import Progress, UPDATE_INTERVAL
+
+
+class WorkerSignals(QObject):
+    """Signals emitted by a TaskWorker, delivered on the GUI thread."""
+
+    progress = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class TaskWorker(QRunnable):
+    """Run ``fn(*args, progress=..., **kwargs)`` on the global thread pool.
+
+    Progress snapshots are emitted at most every ``interval`` seconds. With a
+    ``throttle`` the job's deletes run in background mode.
+    """
+
+    def __init__(self, fn, *args, interval=UPDATE_INTERVAL, total_bytes=None, throttle=None, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.progress = Progress(
+            callback=self.signals.progress.emit, interval=interval, total_bytes=total_bytes, throttle=throttle
+        )
+        # The caller keeps a reference and drops it once finished
+        self.setAutoDelete(False)
+
+    def run(self):
+        try:
+            name = getattr(self.fn, "__name__", "task")
+            result = profiled(name, self.fn, *self.args, progress=self.progress, **self.kwargs)
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+            return
+        self.progress.flush()
+        self.signals.finished.emit(result)
+
+    def cancel(self):
+        self.progress.cancel()
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
+
+
+class StreamSignals(QObject):
+    """Signals emitted by a StreamWorker, delivered on the GUI thread."""
+
+    items = pyqtSignal(list)
+    finished = pyqtSignal(int)
+    failed = pyqtSignal(str)
+
+
+class StreamWorker(QRunnable):
+    """Consume ``fn(*args, progress=..., **kwargs)`` and emit its items in batches.
+
+    Batches are emitted at most every ``interval`` seconds, so a fast
+    generator fills the view in a handful of updates instead of one per item.
+    """
+
+    def __init__(self, fn, *args, interval=UPDATE_INTERVAL, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.signals = StreamSignals()
+        self.progress = Progress()
+        self.setAutoDelete(False)
+
+    def run(self):
+        count = 0
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            for item in self.fn(*self.args, progress=self.progress, **self.kwargs):
+                if self.progress.cancelled:
+                    break
+                batch.append(item)
+                count += 1
+                now = time.monotonic()
+                if now - last_emit >= self.interval:
+                    self.signals.items.emit(batch)
+                    batch = []
+                    last_emit = now
+        except Exception:
+            self.signals.failed.emit(traceback.format_exc())
+            return
+        if batch:
+            self.signals.items.emit(batch)
+        self.signals.finished.emit(count)
+
+    def cancel(self):
+        self.progress.cancel()
+
+    def start(self):
+        QThreadPool.globalInstance().start(self)
+
+
+class WatchSignals(QObject):
+    """Carries a Watcher's callbacks from its threads to the GUI thread."""
+
+    changed = pyqtSignal(object)
+    cleaned = pyqtSignal(str, object)
+
+
+class ScheduleSignals(QObject):
+    """Carries a Scheduler's finished and failed runs from its thread to the GUI thread."""
+
+    ran = pyqtSignal(object, object)
+    failed = pyqtSignal(object, object)
+
+
+class SizeSignals(QObject):
+    """Signals emitted by a FolderSizeWorker, delivered on the GUI thread."""
+
+    sized = pyqtSignal(str, object)
+
+
+class FolderSizeWorker(QRunnable):
+    """Measure folders one at a time, the most urgently wanted first.
+
+    ``request`` queues folders; urgent requests (the rows on screen) replace
+    the previous urgent ones and go before the backlog. Each folder is
+    measured once. The worker only holds a pool thread while there is work
+    and restarts itself on the next request.
+    """
+
+    def __init__(self, measure):
+        super().__init__()
+        self.measure = measure
+        self.signals = SizeSignals()
+        self._urgent = deque()
+        self._backlog = deque()
+        self._done = set()
+        self._lock = threading.Lock()
+        self._running = False
+        self._cancelled = False
+        self.setAutoDelete(False)
+
+    def request(self, paths, urgent=False):
+        with self._lock:
+            if self._cancelled:
+                return
+            if urgent:
+                self._urgent = deque(path for path in paths if path not in self._done)
+            else:
+                self._backlog.extend(paths)
+            if self._running or not (self._urgent or self._backlog):
+                return
+            self._running = True
+        QThreadPool.globalInstance().start(self)
+
+    def _next(self):
+        with self._lock:
+            while not self._cancelled and (self._urgent or self._backlog):
+                path = self._urgent.popleft() if self._urgent else self._backlog.popleft()
+                if path not in self._done:
+                    self._done.add(path)
+                    return path
+            self._running = False
+            return None
+
+    def run(self):
+        while True:
+            path = self._next()
+            if path is None:
+                return
+            try:
+                size = self.measure(path)
+            except Exception:
+                size = None
+            self.signals.sized.emit(path, size)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True